@@ -0,0 +1,102 @@
+"""Per-evaluation cost of the right-hand side: reference vs precomputed kernels.
+
+Also checks every ``make_jacobian`` Jacobian against central differences of
+its right-hand side, including the valve model with an empty expansion
+chamber, and exits with status 1 if one disagrees.
+
+Usage: python benchmarks/bench_rhs.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from engine import (
+    MODELS, NOMAD, NOMAD_VALVE_DEFAULTS, SPRING_PISTON, default_params, make_jacobian, make_rhs,
+    nomad_system, spring_piston_system,
+)
+
+# Mid-shot states, so both friction branches and the pressure term are exercised
+STATES = {
+    SPRING_PISTON: np.array([0.05, 40.0, 0.04, 8.0]),
+    NOMAD: np.array([0.05, 40.0]),
+}
+REFERENCE = {SPRING_PISTON: spring_piston_system, NOMAD: nomad_system}
+
+# (label, model, parameter overrides, states) for the Jacobian check. The
+# states are clear of the breech hold, where the dart-state columns are
+# exact by design and differences are not; zero pressures are included
+# because the valve chamber starts empty when p_2 is 0.
+JACOBIAN_CASES = [
+    (SPRING_PISTON, SPRING_PISTON, {}, [STATES[SPRING_PISTON]]),
+    (NOMAD, NOMAD, {}, [STATES[NOMAD]]),
+    ("nomad valve", NOMAD, dict(NOMAD_VALVE_DEFAULTS, p_2=0.0), [
+        np.array([0.05, 40.0, 3e5, 2e5]),
+        np.array([0.05, 40.0, 3e5, 0.0]),
+        np.array([0.05, 40.0, 0.0, 0.0]),
+    ]),
+]
+
+
+def time_per_call(fn, number=20000, repeat=5):
+    """Best-of-``repeat`` time per call in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench_model(model):
+    params = default_params(model)
+    x = STATES[model]
+    reference = REFERENCE[model]
+    kernel = make_rhs(model, params)
+    return [
+        ("reference system(t, x, params)", time_per_call(lambda: reference(0.0, x, params))),
+        ("make_rhs kernel", time_per_call(lambda: kernel(0.0, x))),
+    ]
+
+
+def central_differences(rhs, x):
+    """Jacobian of ``rhs`` at ``x`` by central differences."""
+    jac = np.zeros((x.size, x.size))
+    for i in range(x.size):
+        step = 1e-6 * max(abs(x[i]), 1.0)
+        ahead, behind = x.copy(), x.copy()
+        ahead[i] += step
+        behind[i] -= step
+        jac[:, i] = (np.asarray(rhs(0.0, ahead)) - np.asarray(rhs(0.0, behind))) / (2 * step)
+    return jac
+
+
+def check_jacobians(rtol=1e-4):
+    """Compare each analytic Jacobian with differences; returns True if all agree."""
+    ok = True
+    print("\nJacobian vs central differences")
+    for label, model, overrides, states in JACOBIAN_CASES:
+        params = default_params(model)
+        params.update(overrides)
+        rhs, jac = make_rhs(model, params), make_jacobian(model, params)
+        for x in states:
+            expected = central_differences(rhs, x)
+            actual = jac(0.0, x)
+            agrees = np.allclose(actual, expected, rtol=rtol, atol=rtol * np.abs(expected).max())
+            ok = ok and agrees
+            print(f"  {label:<14} x = {np.array2string(x, precision=3):<28} "
+                  f"{'ok' if agrees else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    for model in MODELS:
+        rows = bench_model(model)
+        baseline = rows[0][1]
+        print(f"\n{model}")
+        for name, usec in rows:
+            print(f"  {name:<34} {usec:8.2f} us/eval  {baseline / usec:5.1f}x")
+    if not check_jacobians():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
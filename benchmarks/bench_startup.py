@@ -0,0 +1,71 @@
+"""Time to first window and first plot of the GUIs, from launch.
+
+Each GUI is started with ``--startup-report``, which makes it write its
+startup milestones (see ``profiling.StartupProfile``) to a JSON file and exit
+once the first simulation is plotted. The milestones are timed from the
+start of the GUI module; the script also measures the wall time from
+launching the process to its exit, which includes interpreter startup (or
+unpacking, for a frozen executable) and shutdown. A display is required.
+
+Usage:
+    python benchmarks/bench_startup.py                    # both GUIs from source
+    python benchmarks/bench_startup.py -n 10 nomad
+    python benchmarks/bench_startup.py spring_piston --executable dist/spring-piston-simulator.exe
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+sys.path.insert(0, str(SRC))
+
+from profiling import STARTUP_LABELS, STARTUP_MARKS
+
+SCRIPTS = {
+    'spring_piston': SRC / "spring_piston_gui.py",
+    'nomad': SRC / "nomad_ui.py",
+}
+
+TIMEOUT = 120.0
+
+
+def launch(command):
+    """Run ``command`` once; returns its startup marks and the launch-to-exit wall time."""
+    with tempfile.TemporaryDirectory() as scratch:
+        report = Path(scratch) / "startup.json"
+        start = time.perf_counter()
+        subprocess.run(command + ['--startup-report', str(report)], check=True, timeout=TIMEOUT)
+        elapsed = time.perf_counter() - start
+        marks = json.loads(report.read_text())['marks']
+    return marks, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time GUI startup")
+    parser.add_argument('apps', nargs='*', choices=sorted(SCRIPTS), default=sorted(SCRIPTS))
+    parser.add_argument('-n', '--repeat', type=int, default=5, help="Launches per GUI")
+    parser.add_argument('--executable', help="Time this (frozen) executable instead of the "
+                                             "source script; give a single app")
+    args = parser.parse_args(argv)
+    if args.executable and len(args.apps) != 1:
+        parser.error("--executable needs exactly one app")
+
+    for app in args.apps:
+        command = [args.executable] if args.executable else [sys.executable, str(SCRIPTS[app])]
+        runs = [launch(command) for _ in range(args.repeat)]
+        print(f"{app} (median of {args.repeat})")
+        for name in STARTUP_MARKS:
+            values = [marks[name] for marks, _ in runs if name in marks]
+            if values:
+                print(f"  {STARTUP_LABELS[name] + ':':<16s}{statistics.median(values) * 1000:8.1f} ms")
+        print(f"  {'Launch to exit:':<16s}{statistics.median(t for _, t in runs) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Timings of the hot paths on fixed configurations, compared with stored baselines.
+
+Each case is a representative configuration; for each one the suite times the
+right-hand side, a full solve and the derived-quantity block, and for
+spring-piston cases the 9-axis plot update and redraw and a hover step. Plots
+are drawn on the Agg backend, so no display is needed.
+
+Usage:
+    python benchmarks/bench_suite.py              # compare with baselines.json
+    python benchmarks/bench_suite.py --save       # record new baselines
+    python benchmarks/bench_suite.py -k hover     # only benchmarks matching 'hover'
+
+Exits with status 1 when a benchmark is slower than its baseline by more than
+the ``--threshold`` factor. Baselines are machine-specific; re-record them
+with ``--save`` after moving to new hardware.
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib.backend_bases import MouseEvent
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import engine
+from engine import NOMAD, SPRING_PISTON, make_rhs, nomad_derived, spring_piston_derived
+from plots import HoverTooltips, TrajectoryPlots
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+DEFAULT_THRESHOLD = 1.5
+
+# name: (model, parameter overrides, solve options, mid-shot state for the RHS)
+CASES = {
+    # GUI defaults: smooth, non-stiff, RK45
+    'spring_piston': (SPRING_PISTON, {}, {'method': 'RK45'}, [0.05, 40.0, 0.04, 8.0]),
+    # Heavy dart, very light plunger and narrow barrel: the plunger rings on
+    # the air cushion thousands of times faster than the shot develops
+    'spring_piston_stiff': (
+        SPRING_PISTON,
+        {'mass_d': 0.5, 'mass_p': 0.001, 'barrel_length': 1.0, 'D_b': 0.005},
+        {'method': 'LSODA'},
+        [0.05, 2.0, 0.04, 1.0],
+    ),
+    # Nomad closed-form/quadrature fast path
+    'nomad': (NOMAD, {}, {}, [0.05, 40.0]),
+    # Nomad integrated as an ODE
+    'nomad_ode': (NOMAD, {}, {'fast': False}, [0.05, 40.0]),
+    # Nomad with orifice flow from the reservoir: the overhead over nomad_ode
+    # is the cost of the valve physics
+    'nomad_valve': (NOMAD, engine.NOMAD_VALVE_DEFAULTS, {}, [0.05, 40.0, 3.0e5, 2.5e5]),
+}
+
+
+def best_time(fn, repeat=5, min_time=0.2):
+    """Best-of-``repeat`` seconds per call, with enough calls to last ``min_time``."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _hover_events(canvas, plots, n_events=200):
+    """Mouse moves along the pressure plot, landing near a different point each time."""
+    canvas.draw()
+    line = plots.lines[6]
+    points = np.column_stack(line.get_data())
+    screen = line.get_transform().transform(points)
+    picks = screen[np.linspace(0, len(screen) - 1, n_events).astype(int)]
+    return [MouseEvent('motion_notify_event', canvas, x + 2.0, y + 2.0) for x, y in picks]
+
+
+def benchmark_names(name):
+    """Names of the benchmarks ``bench_case`` can time for one case."""
+    parts = ['rhs', 'solve', 'derived']
+    if CASES[name][0] == SPRING_PISTON:
+        parts += ['plot_update', 'redraw', 'hover']
+    return [f"{name}/{part}" for part in parts]
+
+
+def bench_case(name, selected=None):
+    """``{benchmark name: seconds}`` for one case, limited to the names in ``selected``."""
+    model, overrides, options, state = CASES[name]
+    params = engine.default_params(model)
+    params.update(overrides)
+    x = np.array(state)
+    rhs = make_rhs(model, params)
+    derived = spring_piston_derived if model == SPRING_PISTON else nomad_derived
+    result = engine.simulate(model, params, **options)
+    if selected is None:
+        selected = benchmark_names(name)
+
+    timings = {}
+    if f"{name}/rhs" in selected:
+        timings[f"{name}/rhs"] = best_time(lambda: rhs(0.0, x))
+    if f"{name}/solve" in selected:
+        timings[f"{name}/solve"] = best_time(lambda: engine.solve(model, params, **options),
+                                             repeat=3)
+    if f"{name}/derived" in selected:
+        timings[f"{name}/derived"] = best_time(lambda: derived(params, result.solution.y))
+
+    plot_names = {f"{name}/{part}" for part in ('plot_update', 'redraw', 'hover')}
+    if model == SPRING_PISTON and plot_names & set(selected):
+        fig = Figure(figsize=(18, 12), dpi=100)
+        canvas = FigureCanvasAgg(fig)
+        plots = TrajectoryPlots(fig)
+        hover = HoverTooltips(canvas, plots.lines, plots.annotations)
+        hover.connect()
+
+        def redraw():
+            plots.update(result)
+            canvas.draw()
+
+        if f"{name}/plot_update" in selected:
+            timings[f"{name}/plot_update"] = best_time(lambda: plots.update(result))
+        if f"{name}/redraw" in selected:
+            timings[f"{name}/redraw"] = best_time(redraw, repeat=3, min_time=0.0)
+
+        if f"{name}/hover" in selected:
+            plots.update(result)
+            events = _hover_events(canvas, plots)
+
+            def hover_sweep():
+                for event in events:
+                    hover.on_move(event)
+
+            timings[f"{name}/hover"] = best_time(hover_sweep, repeat=3, min_time=0.0) / len(events)
+    return timings
+
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.2f} us"
+    return f"{seconds * 1e3:9.2f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument('--save', action='store_true', help="Record the results as the new baselines")
+    parser.add_argument('-k', '--filter', default='', help="Only run benchmarks whose name contains this")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown factor counted as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in CASES:
+        selected = [key for key in benchmark_names(name) if args.filter in key]
+        if selected:
+            results.update(bench_case(name, selected))
+
+    baselines = {}
+    if BASELINE_PATH.exists():
+        baselines = json.loads(BASELINE_PATH.read_text())['results']
+
+    regressions = []
+    print(f"{'benchmark':<34} {'time':>12} {'baseline':>12} {'ratio':>7}")
+    for key, seconds in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            print(f"{key:<34} {_format_time(seconds)} {'-':>12} {'-':>7}")
+            continue
+        ratio = seconds / baseline
+        flag = ''
+        if ratio > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        print(f"{key:<34} {_format_time(seconds)} {_format_time(baseline)} {ratio:6.2f}x{flag}")
+
+    if args.save:
+        baselines.update(results)
+        BASELINE_PATH.write_text(json.dumps({
+            'machine': {
+                'platform': platform.platform(),
+                'processor': platform.processor() or platform.machine(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'matplotlib': matplotlib.__version__,
+            },
+            'results': baselines,
+        }, indent=2, sort_keys=True) + "\n")
+        print(f"\nSaved {len(results)} baselines to {BASELINE_PATH.name}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold}x: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Cost of sending simulation tasks to worker processes: cold pools vs the warm pool.
+
+A cold pool is what each sweep used to create: a new ``ProcessPoolExecutor``
+whose workers start, import the simulation modules and exit again. The warm
+pool is ``workers.get_pool``, started once. Both are timed on an empty task,
+which shows the pure dispatch overhead, and on one design-map sized tile of
+spring-piston configurations, compared with running that tile in-process.
+
+Usage: python benchmarks/bench_workers.py [-j PROCESSES]
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import workers
+from engine import SPRING_PISTON, default_params
+from sweep import evaluate_configurations
+
+TILE_SIZE = 48
+
+
+def _tile():
+    """A tile of spring-constant and draw-length combinations."""
+    k = np.linspace(500.0, 2000.0, 8)
+    draw = np.linspace(0.05, 0.15, TILE_SIZE // 8)
+    return [(float(a), float(b)) for a in k for b in draw]
+
+
+def _noop():
+    return None
+
+
+def _cold(fn, *args, processes):
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=workers._warm_up) as pool:
+        pool.submit(fn, *args).result()
+    return time.perf_counter() - start
+
+
+def _warm(fn, *args, repeat):
+    pool = workers.get_pool()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pool.submit(fn, *args).result()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _in_process(fn, *args, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.1f} us"
+    return f"{seconds * 1e3:9.1f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time task dispatch to worker processes")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help="Workers per pool (default: all cores)")
+    parser.add_argument('-n', '--repeat', type=int, default=20, help="Warm-pool repetitions")
+    args = parser.parse_args(argv)
+    processes = args.processes or workers.default_processes()
+
+    tile = (evaluate_configurations, SPRING_PISTON, default_params(SPRING_PISTON), ['k', 'L_0'],
+            _tile(), 1)
+    started = time.perf_counter()
+    for future in workers.start(processes):
+        future.result()
+    startup = time.perf_counter() - started
+
+    rows = [
+        ("warm pool startup (all workers)", startup),
+        ("empty task, cold pool", _cold(_noop, processes=processes)),
+        ("empty task, warm pool", _warm(_noop, repeat=args.repeat)),
+        (f"{TILE_SIZE}-run tile, in-process", _in_process(*tile, repeat=3)),
+        (f"{TILE_SIZE}-run tile, cold pool", _cold(*tile, processes=processes)),
+        (f"{TILE_SIZE}-run tile, warm pool", _warm(*tile, repeat=args.repeat)),
+    ]
+    print(f"{processes} worker process(es)")
+    for label, seconds in rows:
+        print(f"  {label:<34}{_format_time(seconds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""Vectorized batch integration of many spring-piston configurations at once.
+
+Every configuration gets its own adaptive Dormand-Prince 5(4) step size, but all
+trajectories are advanced together so the right-hand side is a handful of NumPy
+array operations per step instead of one Python call per configuration. Each
+trajectory stops when its dart leaves the barrel or stalls, matching the terminal
+events of ``engine.solve``, and is sampled at ``n_points`` up to that moment.
+
+With the default tolerances (rtol=1e-6, atol=1e-9) the results agree with the
+single-run ``solve_ivp`` path in ``engine.solve`` (RK45, rtol=1e-3) to better
+than 0.5% in muzzle velocity and exit time and 1% in peak pressure; the
+remaining difference is the single-run path's own truncation error.
+"""
+import numpy as np
+
+from engine import EXIT, MAX_SIMULATION_TIME, STALL, TIMEOUT
+
+# Parameters that enter the physics; each may be a scalar or an array
+PHYSICS_KEYS = ('p_0', 'p_2', 'D_b', 'D_p', 'gamma', 'mass_d', 'mass_p', 'xso', 'L_0', 'k',
+                'barrel_length')
+
+# Dormand-Prince 5(4) tableau
+_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+]
+_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+_E = np.array([71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+
+_SAFETY = 0.9
+_MIN_FACTOR = 0.2
+_MAX_FACTOR = 10.0
+
+# Bisection iterations used to locate exit/stall events inside a step
+_EVENT_ITERATIONS = 50
+
+
+class BatchResult:
+    """Trajectories and summary metrics for a batch of configurations.
+
+    Trajectory arrays (including ``t``, since every configuration has its own
+    exit time) have shape ``shape + (n_points,)``; summary arrays have shape
+    ``shape``, where ``shape`` is the broadcast shape of the inputs.
+    """
+
+    def __init__(self, params, shape, t, y, pressure, volume, status, n_steps, n_rejected):
+        n_points = t.shape[-1]
+        self.params = params
+        self.shape = shape
+        self.t = t.reshape(shape + (n_points,))
+        self.dart_pos = y[0].reshape(shape + (n_points,))
+        self.dart_vel = y[1].reshape(shape + (n_points,))
+        self.plunger_pos = y[2].reshape(shape + (n_points,))
+        self.plunger_vel = y[3].reshape(shape + (n_points,))
+        self.pressure = pressure.reshape(shape + (n_points,))
+        self.volume = volume.reshape(shape + (n_points,))
+        self.status = status.reshape(shape)
+        self.n_steps = n_steps.reshape(shape)
+        self.n_rejected = n_rejected.reshape(shape)
+
+    @property
+    def exited(self):
+        return self.status == EXIT
+
+    @property
+    def muzzle_velocity(self):
+        """Dart velocity at the muzzle; zero for darts that never leave the barrel."""
+        return np.where(self.exited, self.dart_vel[..., -1], 0.0)
+
+    @property
+    def exit_time(self):
+        """Time the dart leaves the barrel; NaN for darts that never do."""
+        return np.where(self.exited, self.t[..., -1], np.nan)
+
+    @property
+    def max_dart_velocity(self):
+        return np.max(self.dart_vel, axis=-1)
+
+    @property
+    def max_pressure(self):
+        return np.max(self.pressure, axis=-1)
+
+    @property
+    def min_pressure(self):
+        return np.min(self.pressure, axis=-1)
+
+
+def _broadcast_params(params):
+    """Broadcast the physics parameters to a common shape and flatten them."""
+    missing = [key for key in PHYSICS_KEYS if key not in params]
+    if missing:
+        raise KeyError(f"Missing parameters: {', '.join(missing)}")
+    arrays = np.broadcast_arrays(*(np.asarray(params[key], dtype=float) for key in PHYSICS_KEYS))
+    shape = arrays[0].shape
+    flat = {key: np.ascontiguousarray(arr).reshape(-1) for key, arr in zip(PHYSICS_KEYS, arrays)}
+    return flat, shape
+
+
+def _derived_constants(p):
+    """Stack the per-configuration constants used by the right-hand side.
+
+    Rows: p_0, p_2, gamma, area_b, area_p, v_0, L_0, xsf, k, mass_p, mass_d,
+    barrel_length
+    """
+    area_b = np.pi * p['D_b']**2 / 4
+    area_p = np.pi * p['D_p']**2 / 4
+    v_0 = p['L_0'] * area_p
+    xsf = p['xso'] + p['L_0']
+    return np.vstack([
+        p['p_0'], p['p_2'], p['gamma'], area_b, area_p, v_0,
+        p['L_0'], xsf, p['k'], p['mass_p'], p['mass_d'], p['barrel_length'],
+    ])
+
+
+def _pressure(y, c):
+    """Gas pressure for states ``y`` (4, n) and constants ``c`` (12, n)."""
+    p_0, _, gamma, area_b, area_p, v_0, L_0 = c[:7]
+    volume_ratio = np.maximum(((L_0 - y[2]) * area_p + y[0] * area_b) / v_0, 1e-10)
+    return p_0 / volume_ratio ** gamma
+
+
+def _rhs(y, c):
+    """Vectorized form of ``engine.spring_piston_system``."""
+    _, p_2, _, area_b, area_p, _, _, xsf, k, mass_p, mass_d = c[:11]
+    p_t = _pressure(y, c)
+    acceleration = (p_t - p_2) * area_b / mass_d
+    # The dart rests against the breech until the gas pushes it forward
+    held = (y[0] <= 0.0) & (y[1] <= 0.0) & (acceleration < 0.0)
+    return np.stack([
+        y[1],
+        np.where(held, 0.0, acceleration),
+        y[3],
+        ((p_2 - p_t) * area_p + k * (xsf - y[2])) / mass_p,
+    ])
+
+
+def _error_norm(y, y_new, err, rtol, atol):
+    """Per-configuration RMS error norm, as used by ``solve_ivp``."""
+    scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+    return np.sqrt(np.mean((err / scale)**2, axis=0))
+
+
+def _initial_step(y0, f0, c, t_end, rtol, atol):
+    """Vectorized version of the Hairer-Wanner starting step heuristic."""
+    scale = atol + rtol * np.abs(y0)
+    d0 = np.sqrt(np.mean((y0 / scale)**2, axis=0))
+    d1 = np.sqrt(np.mean((f0 / scale)**2, axis=0))
+    h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+    y1 = y0 + h0 * f0
+    f1 = _rhs(y1, c)
+    d2 = np.sqrt(np.mean(((f1 - f0) / scale)**2, axis=0)) / h0
+    h1 = np.where(
+        (d1 <= 1e-15) & (d2 <= 1e-15),
+        np.maximum(1e-6, h0 * 1e-3),
+        (0.01 / np.maximum(np.maximum(d1, d2), 1e-300))**(1 / 5),
+    )
+    return np.minimum(np.minimum(100 * h0, h1), t_end)
+
+
+def _hermite(t0, t1, y0, y1, f0, f1, t):
+    """Cubic Hermite interpolation between two accepted step endpoints."""
+    h = t1 - t0
+    s = (t - t0) / h
+    s2 = s * s
+    s3 = s2 * s
+    return ((2*s3 - 3*s2 + 1) * y0 + (s3 - 2*s2 + s) * h * f0
+            + (-2*s3 + 3*s2) * y1 + (s3 - s2) * h * f1)
+
+
+def _locate_event(t0, t1, y0, y1, f0, f1, component, target):
+    """Time inside each step where ``y[component]`` crosses ``target``.
+
+    The sign of ``y[component] - target`` must differ between the step ends.
+    """
+    lo, hi = t0.copy(), t1.copy()
+    g_lo = y0[component] - target
+    for _ in range(_EVENT_ITERATIONS):
+        mid = 0.5 * (lo + hi)
+        g_mid = _hermite(t0, t1, y0[component], y1[component], f0[component], f1[component], mid) - target
+        same = np.sign(g_mid) == np.sign(g_lo)
+        lo = np.where(same, mid, lo)
+        g_lo = np.where(same, g_mid, g_lo)
+        hi = np.where(same, hi, mid)
+    return hi
+
+
+def _resample(records, t_end, n_points):
+    """Sample every trajectory on its own uniform grid over ``[0, t_end]``.
+
+    ``records`` holds accepted steps as ``(idx, t0, t1, y0, y1, f0, f1)`` arrays,
+    appended in time order for each trajectory.
+    """
+    idx, t0, t1, y0, y1, f0, f1 = (np.concatenate(parts, axis=-1) for parts in zip(*records))
+    order = np.argsort(idx, kind='stable')
+    idx, t0, t1 = idx[order], t0[order], t1[order]
+    y0, y1, f0, f1 = y0[:, order], y1[:, order], f0[:, order], f1[:, order]
+
+    # Sort key that orders steps by trajectory, then time within the trajectory
+    t_scale = np.max(t_end) * (1 + 1e-9)
+    key = idx + t1 / t_scale
+    n = t_end.size
+    grid = t_end[:, None] * np.linspace(0, 1, n_points)
+    query = np.arange(n)[:, None] + grid / t_scale
+    last = np.searchsorted(idx, np.arange(n), side='right') - 1
+    pos = np.minimum(np.searchsorted(key, query, side='left'), last[:, None])
+    y = _hermite(t0[pos], t1[pos], y0[:, pos], y1[:, pos], f0[:, pos], f1[:, pos], grid)
+    return grid, y
+
+
+def simulate_batch(params, rtol=1e-6, atol=1e-9, max_steps=100000):
+    """Integrate every configuration described by ``params`` until its dart exits or stalls.
+
+    ``params`` is a spring-piston parameter dict (same keys and SI units as
+    ``engine.SPRING_PISTON_DEFAULTS``). Physics entries, including
+    ``barrel_length``, may be arrays; they are broadcast against each other.
+    ``n_points`` must be a scalar and sets the per-configuration output grid.
+    """
+    flat, shape = _broadcast_params(params)
+    n_points = int(params['n_points'])
+    consts = _derived_constants(flat)
+    barrel_length = consts[11]
+    n = consts.shape[1]
+
+    t = np.zeros(n)
+    y = np.zeros((4, n))
+    f = _rhs(y, consts)
+    h = _initial_step(y, f, consts, MAX_SIMULATION_TIME, rtol, atol)
+    status = np.full(n, TIMEOUT, dtype=object)
+    n_steps = np.zeros(n, dtype=int)
+    n_rejected = np.zeros(n, dtype=int)
+    records = []
+    active = np.arange(n)
+    k = [None] * 7
+
+    for _ in range(max_steps):
+        if active.size == 0:
+            break
+        c = consts[:, active]
+        ya, fa, ta = y[:, active], f[:, active], t[active]
+        ha = np.minimum(h[active], MAX_SIMULATION_TIME - ta)
+
+        # Dormand-Prince stages (the 7th stage is the FSAL derivative)
+        k[0] = fa
+        for s in range(1, 6):
+            dy = sum(a * k[j] for j, a in enumerate(_A[s]))
+            k[s] = _rhs(ya + ha * dy, c)
+        y_new = ya + ha * sum(b * k[j] for j, b in enumerate(_B) if b)
+        f_new = _rhs(y_new, c)
+        k[6] = f_new
+        err = ha * sum(e * k[j] for j, e in enumerate(_E) if e)
+        err_norm = _error_norm(ya, y_new, err, rtol, atol)
+
+        accepted = err_norm < 1
+        with np.errstate(divide='ignore'):
+            factor = np.where(err_norm == 0, _MAX_FACTOR, _SAFETY * err_norm**(-1 / 5))
+        factor = np.clip(factor, _MIN_FACTOR, _MAX_FACTOR)
+        # Do not grow the step right after a rejection, as solve_ivp does
+        factor = np.where(accepted, factor, np.minimum(factor, 1.0))
+        h[active] = ha * factor
+        n_rejected[active[~accepted]] += 1
+
+        if not np.any(accepted):
+            continue
+
+        acc = active[accepted]
+        t_old = ta[accepted]
+        t_new = t_old + ha[accepted]
+        y_old, f_old = ya[:, accepted], fa[:, accepted]
+        y_acc, f_acc = y_new[:, accepted], f_new[:, accepted]
+
+        # Terminal events: dart passes the muzzle, or its velocity turns negative
+        length = barrel_length[acc]
+        exits = (y_old[0] < length) & (y_acc[0] >= length)
+        stalls = (y_old[1] >= 0) & (y_acc[1] < 0)
+        t_event = np.full(acc.size, np.inf)
+        if exits.any():
+            t_event[exits] = _locate_event(
+                t_old[exits], t_new[exits], y_old[:, exits], y_acc[:, exits],
+                f_old[:, exits], f_acc[:, exits], 0, length[exits])
+        if stalls.any():
+            t_stall = _locate_event(
+                t_old[stalls], t_new[stalls], y_old[:, stalls], y_acc[:, stalls],
+                f_old[:, stalls], f_acc[:, stalls], 1, 0.0)
+            stall_first = t_stall < t_event[stalls]
+            exits[np.nonzero(stalls)[0][stall_first]] = False
+            t_event[stalls] = np.minimum(t_event[stalls], t_stall)
+        stalls &= ~exits
+        ended = exits | stalls
+        if ended.any():
+            y_end = _hermite(t_old[ended], t_new[ended], y_old[:, ended], y_acc[:, ended],
+                             f_old[:, ended], f_acc[:, ended], t_event[ended])
+            t_new[ended] = t_event[ended]
+            y_acc[:, ended] = y_end
+            f_acc[:, ended] = _rhs(y_end, consts[:, acc[ended]])
+            status[acc[exits]] = EXIT
+            status[acc[stalls]] = STALL
+
+        records.append((acc, t_old, t_new, y_old, y_acc, f_old, f_acc))
+        t[acc] = t_new
+        y[:, acc] = y_acc
+        f[:, acc] = f_acc
+        n_steps[acc] += 1
+        done = np.zeros(n, dtype=bool)
+        done[acc[ended]] = True
+        active = active[~done[active] & (t[active] < MAX_SIMULATION_TIME)]
+    else:
+        raise RuntimeError(f"Batch integration did not finish within {max_steps} steps")
+
+    t_grid, out = _resample(records, t, n_points)
+    # End each trajectory exactly on the event state rather than its interpolant,
+    # before the pressure and volume are derived from it
+    out[:, :, -1] = y
+    pressure = _pressure(out, consts[:, :, None])
+    volume = (consts[6][:, None] - out[2]) * consts[4][:, None] + consts[3][:, None] * out[0]
+    full_params = dict(params)
+    full_params.update({key: value.reshape(shape) for key, value in flat.items()})
+    return BatchResult(full_params, shape, t_grid, out, pressure, volume, status,
+                       n_steps, n_rejected)
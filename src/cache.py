@@ -0,0 +1,241 @@
+"""Memoized simulation results.
+
+Entries are keyed by ``cache_key``, a hash of the model, the SI parameter dict
+and the solver settings, so the same configuration reached by typing, loading
+a parameter file or resetting to defaults is only solved once. ``ResultCache``
+keeps recent values in an in-memory LRU and, optionally, pickled in a
+directory whose total size is bounded.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import engine
+
+# Bump when a change to the physics or to Result makes stored entries stale
+CACHE_VERSION = 4
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Eviction frees the disk store down to this fraction of max_bytes, so a full
+# store is not rescanned on every write
+EVICT_TO_FRACTION = 0.9
+
+# Writes between rescans of the disk store's size. Other processes may write
+# to the same store, so the running total kept here can drift.
+RESCAN_WRITES = 256
+
+
+def _canonical(value):
+    """JSON-friendly form of a parameter value that ignores int/float/numpy type."""
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    try:
+        return repr(float(value))
+    except (TypeError, ValueError):
+        raise TypeError(f"Cannot hash parameter value {value!r}") from None
+
+
+def cache_key(model, params, **settings):
+    """Canonical hash of a configuration: model, SI parameters and solver settings."""
+    payload = {
+        'version': CACHE_VERSION,
+        'model': model,
+        'params': {key: _canonical(value) for key, value in params.items()},
+        'settings': {key: _canonical(value) for key, value in settings.items()},
+    }
+    text = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def default_cache_dir():
+    """Per-user directory for the on-disk store."""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+    base = Path(base) if base else Path.home() / '.cache'
+    return base / 'pneumatic-gun-simulators'
+
+
+class ResultCache:
+    """LRU cache of simulation results with an optional size-bounded disk store.
+
+    Up to ``max_entries`` values are held in memory. With ``directory`` set,
+    values are also pickled there and, once they take more than ``max_bytes``,
+    the least recently used files are removed. The store's size is tracked as
+    entries are written, so the directory is only scanned when that total
+    passes the limit or every ``RESCAN_WRITES`` writes. Disk errors are ignored,
+    since a miss only costs a re-solve. Cached values are shared, so callers
+    must not modify them.
+
+    The cache is safe to use from several threads, and can be passed to
+    worker processes, which share the disk store but not the memory LRU.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory is not None else None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Bytes in the disk store, or None until it has been scanned
+        self._disk_bytes = None
+        self._writes = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_memory'] = OrderedDict()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._memory)
+
+    def get(self, key, default=None):
+        """Return the value stored under ``key``, or ``default``."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        value = self._read(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store ``value`` under ``key`` in memory and, if enabled, on disk."""
+        with self._lock:
+            self._remember(key, value)
+        self._write(key, value)
+
+    def clear(self):
+        """Drop every entry, including the disk store."""
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = None
+        if self.directory is not None:
+            for path in self.directory.glob('*.pkl'):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def simulate(self, model, params=None, **options):
+        """``engine.simulate`` through the cache."""
+        return self.fetch(model, params, **options)[0]
+
+    def fetch(self, model, params=None, **options):
+        """Like ``simulate``, but return ``(result, hit)``, where ``hit`` is True
+        when the result came from the cache rather than a new run."""
+        full_params = engine.default_params(model)
+        if params is not None:
+            full_params.update(params)
+        key = cache_key(model, full_params, kind='result', **options)
+        result = self.get(key)
+        if result is not None:
+            return result, True
+        result = engine.simulate(model, full_params, **options)
+        self.put(key, result)
+        return result, False
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return self.directory / f"{key}.pkl"
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as infile:
+                value = pickle.load(infile)
+            os.utime(path)  # Mark as recently used for eviction
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or unreadable entry
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+    def _write(self, key, value):
+        if self.directory is None:
+            return
+        tmp_path = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write then rename so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as outfile:
+                pickle.dump(value, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+                size = outfile.tell()
+            path = self._path(key)
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            tmp_path = None
+            with self._lock:
+                self._writes += 1
+                rescan = self._disk_bytes is None or self._writes % RESCAN_WRITES == 0
+                if not rescan:
+                    self._disk_bytes += size - replaced
+                    rescan = self._disk_bytes > self.max_bytes
+            if rescan:
+                self._evict()
+        except OSError:
+            pass
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    def _evict(self):
+        """Rescan the store and, if it is over ``max_bytes``, remove the least
+        recently used files until it fits in ``EVICT_TO_FRACTION`` of it."""
+        entries = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes * EVICT_TO_FRACTION:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+        with self._lock:
+            self._disk_bytes = total
@@ -0,0 +1,177 @@
+"""Adaptive maps of a summary metric over two parameters.
+
+``DesignMap`` evaluates a metric (muzzle velocity, peak pressure, ...) on a
+square grid of two parameters. The first pass covers the grid coarsely; each
+later pass halves the spacing, but only inside the cells whose corner values
+differ by more than a set share of the metric's range, so runs go where the
+surface changes fastest. Each pass is split into tiles of configurations that
+are evaluated by worker processes (with ``sweep.evaluate_configurations``, so
+spring-piston tiles use the batch engine) and handed back as they finish, so a
+view can paint the map while the rest is still running.
+
+Example::
+
+    design = DesignMap(SPRING_PISTON, 'k', (500, 2000), 'L_0', (0.05, 0.15))
+    for tile in design.run():
+        image = design.filled()
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+
+from engine import MODELS, default_params
+from sweep import RESULT_KEYS, evaluate_configurations
+from workers import get_pool
+
+# Points per axis of the finest grid, and the spacing of the first pass in
+# grid steps. The spacing halves every pass, so (resolution - 1) must be a
+# multiple of the (power of two) initial stride.
+DEFAULT_RESOLUTION = 65
+DEFAULT_INITIAL_STRIDE = 8
+
+# A cell is refined while its corner values differ by more than this share
+# of the range of the metric over the map
+DEFAULT_TOLERANCE = 0.05
+
+# Configurations per worker task
+DEFAULT_TILE_SIZE = 48
+
+
+class DesignMap:
+    """``metric`` over a grid of ``x_key`` and ``y_key`` values, refined adaptively.
+
+    ``x_range`` and ``y_range`` are ``(low, high)`` in SI units; the other
+    parameters come from ``params`` (the model defaults if omitted).
+    ``values[iy, ix]`` holds the metric at ``(x[ix], y[iy])``, NaN where the
+    point has not been evaluated or the run failed; ``evaluated`` tells the
+    two apart. A cell is refined while its corners differ by more than
+    ``tolerance`` times the range of the metric; smaller tolerances cost more
+    runs.
+    """
+
+    def __init__(self, model, x_key, x_range, y_key, y_range, metric='muzzle_velocity', params=None,
+                 resolution=DEFAULT_RESOLUTION, initial_stride=DEFAULT_INITIAL_STRIDE,
+                 tolerance=DEFAULT_TOLERANCE):
+        if model not in MODELS:
+            raise ValueError(f"Unknown model: {model!r}")
+        if metric not in RESULT_KEYS:
+            raise ValueError(f"Unknown metric: {metric!r}")
+        if x_key == y_key:
+            raise ValueError("The two map parameters must differ")
+        if initial_stride < 1 or initial_stride & (initial_stride - 1):
+            raise ValueError("initial_stride must be a power of two")
+        if (resolution - 1) % initial_stride:
+            raise ValueError("resolution - 1 must be a multiple of initial_stride")
+        self.model = model
+        self.params = default_params(model)
+        if params is not None:
+            self.params.update(params)
+        unknown = [key for key in (x_key, y_key) if key not in self.params]
+        if unknown:
+            raise KeyError(f"Unknown parameters for {model}: {', '.join(unknown)}")
+        self.x_key, self.y_key = x_key, y_key
+        self.x = np.linspace(*x_range, resolution)
+        self.y = np.linspace(*y_range, resolution)
+        self.metric = metric
+        self.initial_stride = initial_stride
+        self.tolerance = tolerance
+        self.values = np.full((resolution, resolution), np.nan)
+        self.evaluated = np.zeros((resolution, resolution), dtype=bool)
+
+    @property
+    def n_evaluated(self):
+        return int(self.evaluated.sum())
+
+    def run(self, processes=None, tile_size=DEFAULT_TILE_SIZE):
+        """Evaluate the map pass by pass, yielding ``(iy, ix)`` index arrays of
+        each finished tile. ``processes`` defaults to the number of CPU cores;
+        with 1 everything runs in the calling process, otherwise tiles go to
+        the shared ``workers`` pool. Closing the generator cancels the tiles
+        that have not started."""
+        processes = processes or os.cpu_count() or 1
+        pool = get_pool(processes) if processes > 1 else None
+        pending = {}
+        try:
+            stride = self.initial_stride
+            points = self._coarse_points()
+            while points:
+                tiles = [points[i:i + tile_size] for i in range(0, len(points), tile_size)]
+                if pool is None:
+                    for tile in tiles:
+                        yield self._store(tile, self._evaluate(tile))
+                else:
+                    pending = {pool.submit(evaluate_configurations, self.model, self.params,
+                                           [self.x_key, self.y_key], self._combos(tile), 1): tile
+                               for tile in tiles}
+                    while pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            tile = pending.pop(future)
+                            yield self._store(tile, future.result())
+                if stride == 1:
+                    break
+                points = self._refinement_points(stride)
+                stride //= 2
+        finally:
+            # The pool is shared, so only this map's queued tiles are dropped
+            for future in pending:
+                future.cancel()
+
+    def filled(self):
+        """``values`` with each unevaluated point taking the value of the
+        nearest point of the finest pass that covered it, for display."""
+        image = np.full_like(self.values, np.nan)
+        n = self.values.shape[0]
+        stride = self.initial_stride
+        while stride >= 1:
+            index = np.minimum(np.rint(np.arange(n) / stride).astype(int) * stride, n - 1)
+            grid = np.ix_(index, index)
+            image = np.where(self.evaluated[grid], self.values[grid], image)
+            stride //= 2
+        return image
+
+    def nearest(self, x, y):
+        """Grid indices ``(iy, ix)`` of the point closest to ``(x, y)``."""
+        ix = int(np.argmin(np.abs(self.x - x)))
+        iy = int(np.argmin(np.abs(self.y - y)))
+        return iy, ix
+
+    def params_at(self, iy, ix):
+        """Full SI parameter dict of grid point ``(iy, ix)``."""
+        return dict(self.params, **{self.x_key: float(self.x[ix]), self.y_key: float(self.y[iy])})
+
+    def _coarse_points(self):
+        index = range(0, self.values.shape[0], self.initial_stride)
+        return [(iy, ix) for iy in index for ix in index]
+
+    def _refinement_points(self, stride):
+        """Unevaluated points at half ``stride`` inside the cells that change too much."""
+        n = self.values.shape[0]
+        finite = self.values[np.isfinite(self.values)]
+        threshold = self.tolerance * float(np.ptp(finite)) if finite.size else 0.0
+        half = stride // 2
+        points = set()
+        for iy in range(0, n - stride, stride):
+            for ix in range(0, n - stride, stride):
+                corners = (slice(iy, iy + stride + 1, stride), slice(ix, ix + stride + 1, stride))
+                if not self.evaluated[corners].all():
+                    continue
+                values = self.values[corners]
+                # A failed corner marks an edge of the feasible region
+                if np.isnan(values).any() or np.ptp(values) > threshold:
+                    points.update((iy + a * half, ix + b * half) for a in range(3) for b in range(3))
+        return sorted(point for point in points if not self.evaluated[point])
+
+    def _combos(self, tile):
+        return [(float(self.x[ix]), float(self.y[iy])) for iy, ix in tile]
+
+    def _evaluate(self, tile):
+        return evaluate_configurations(self.model, self.params, [self.x_key, self.y_key],
+                                       self._combos(tile), processes=1)
+
+    def _store(self, tile, summaries):
+        iy, ix = np.array(tile).T
+        self.values[iy, ix] = [summary[self.metric] for summary in summaries]
+        self.evaluated[iy, ix] = True
+        return iy, ix
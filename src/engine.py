@@ -0,0 +1,1006 @@
+"""GUI-free physics for the spring-piston and Nomad models.
+
+Everything here works on the plain SI parameter dicts used by the GUIs, so the
+same code can run inside the Tk applications and in batch/worker processes.
+"""
+import functools
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+SPRING_PISTON = 'spring_piston'
+NOMAD = 'nomad'
+MODELS = (SPRING_PISTON, NOMAD)
+
+SPRING_PISTON_DEFAULTS = {
+    'p_0': 101325,          # Initial pressure inside plunger tube (Pa)
+    'p_2': 101325,          # Ambient pressure (Pa)
+    'D_b': 0.0127,          # Diameter of barrel (m)
+    'D_p': 0.035052,        # Diameter of plunger (m)
+    'gamma': 1.4,           # Adiabatic index cp/cv for air
+    'mass_d': 0.0012,       # Mass of dart (kg)
+    'mass_p': 0.06,         # Mass of plunger (kg)
+    'fric1': 0.4,           # Static friction force (N)
+    'fric2': 0.2,           # Dynamic friction term (N)
+    'xso': 0.0254,          # Spring compression before priming (m)
+    'L_0': 0.1016,          # Plunger draw length (m)
+    'k': 523 * (11/5),      # Spring constant (N/m)
+    'barrel_length': 0.3,   # Dart travel to the muzzle (m)
+    'n_points': 1500        # Number of evaluation points
+}
+
+NOMAD_DEFAULTS = {
+    'p_0': 583633,      # Initial pressure in Pascals
+    'p_2': 101325,           # Ambient pressure in Pascals
+    'D': 0.013,         # Diameter in meters
+    'gamma': 1.4,       # Adiabatic index
+    'v_0': 1.74e-5,     # Initial volume in cubic meters
+    'v_expand': .5e-5, # Expansion Chamber volume
+    'mass': 0.0012,     # Mass in kg
+    'fric1': 4,         # Static friction force in Newtons
+    'fric2': 0.2,       # Dynamic friction term
+    'barrel_length': 0.3,  # Dart travel to the muzzle in meters
+    'n_points': 1500    # Number of evaluation points
+}
+
+# Optional Nomad valve parameters. With these in a Nomad parameter dict the
+# reservoir (v_0) and the expansion chamber (v_expand) no longer equalize
+# instantly: gas flows between them through an orifice, choked or subsonic
+# depending on the pressure ratio, and both pressures become states.
+NOMAD_VALVE_DEFAULTS = {
+    'valve_diameter': 0.004,        # Effective valve orifice diameter (m)
+    'discharge_coefficient': 0.8,   # Orifice discharge coefficient
+    'gas_temperature': 293.15,      # Initial reservoir gas temperature (K)
+}
+
+# Dart travel (m) over which the Nomad model applies static friction
+NOMAD_STATIC_FRICTION_LENGTH = 0.03
+
+# Dart travel (m) the valve model still counts as resting at the breech, so
+# solver round-off does not release a held dart or read as a stall
+NOMAD_BREECH_TOLERANCE = 1e-9
+
+# Specific gas constant of air (J/(kg K))
+GAS_CONSTANT_AIR = 287.05
+
+# Pressure ratios at which the orifice flow function is tabulated
+FLOW_TABLE_SIZE = 257
+
+# How a run ended
+EXIT = 'exit'        # Dart reached the end of the barrel
+STALL = 'stall'      # Dart stopped or reversed inside the barrel
+TIMEOUT = 'timeout'  # Neither happened within MAX_SIMULATION_TIME
+
+# Hard cap on simulated time (s); real shots finish in a few tens of ms
+MAX_SIMULATION_TIME = 1.0
+
+# Integration methods accepted by solve(); 'auto' picks one per run
+SOLVER_METHODS = ('auto', 'RK45', 'LSODA', 'Radau', 'BDF')
+IMPLICIT_METHODS = ('LSODA', 'Radau', 'BDF')
+
+# 'auto' switches to LSODA when the fastest linearized mode times the horizon
+# exceeds this, i.e. when RK45 would be limited by stability rather than accuracy
+AUTO_STIFFNESS_THRESHOLD = 2000.0
+
+
+def default_params(model):
+    """Return a fresh copy of the default parameter dict for a model."""
+    if model == SPRING_PISTON:
+        return dict(SPRING_PISTON_DEFAULTS)
+    if model == NOMAD:
+        return dict(NOMAD_DEFAULTS)
+    raise ValueError(f"Unknown model: {model!r}")
+
+
+def nomad_has_valve(params):
+    """True when a Nomad parameter dict switches on the valve flow model."""
+    return 'valve_diameter' in params
+
+
+def nomad_valve_params(params=None):
+    """Nomad defaults plus ``NOMAD_VALVE_DEFAULTS``, updated from ``params``."""
+    full_params = default_params(NOMAD)
+    full_params.update(NOMAD_VALVE_DEFAULTS)
+    if params is not None:
+        full_params.update(params)
+    return full_params
+
+
+def spring_piston_system(t, x, params):
+    """Define the system of first-order ODEs"""
+    d1, d2, p1, p2 = x  # dart and plunger variables
+
+    # Calculate areas
+    area_b = np.pi * (params['D_b']**2) / 4
+    area_p = np.pi * (params['D_p']**2) / 4
+    v_0 = params['L_0'] * area_p
+    xsf = params['xso'] + params['L_0']
+
+    # Internal pressure calculation (with safety checks)
+    volume_ratio = np.maximum(
+        ((params['L_0'] - p1) * area_p + d1 * area_b) / v_0,
+        1e-10  # Prevent division by zero
+    )
+    p_t = params['p_0'] / (volume_ratio ** params['gamma'])
+
+    # Derivatives
+    dd1dt = d2  # dart velocity
+    dp1dt = p2  # plunger velocity
+
+    # Accelerations
+    dp2dt = ((params['p_2'] - p_t) * area_p +
+            params['k'] * (xsf - p1)) / params['mass_p']
+    dd2dt = ((p_t - params['p_2']) * area_b) / params['mass_d']
+    # The dart rests against the breech until the gas pushes it forward
+    if d1 <= 0.0 and d2 <= 0.0 and dd2dt < 0.0:
+        dd2dt = 0.0
+
+    return [dd1dt, dd2dt, dp1dt, dp2dt]
+
+
+def nomad_system(t, x1x2, params):
+    """Define the system of first-order ODEs"""
+    x1, x2 = x1x2  # unpack position and velocity
+
+    # Calculate area
+    area = np.pi * (params['D']**2) / 4
+
+    # Calculate volume and pressure at current position
+    v_t = params['v_expand'] + params['v_0'] + area * x1
+    p_t = (params['p_0'] / ((v_t / params['v_0']) ** params['gamma']))
+
+    # Set the equations
+    dx1dt = x2  # velocity
+
+    # Choose friction based on position
+    friction = params['fric1'] if x1 <= NOMAD_STATIC_FRICTION_LENGTH else params['fric2']
+
+    # Calculate acceleration
+    pressure_force = (p_t - params['p_2']) * area
+    dx2dt = (pressure_force - friction) / params['mass']
+
+    return [dx1dt, dx2dt]
+
+
+class SpringPistonConstants(NamedTuple):
+    """Spring-piston quantities that stay fixed during a run (SI units)."""
+    p_0: float
+    p_2: float
+    gamma: float
+    area_b: float
+    area_p: float
+    v_0: float
+    L_0: float
+    xsf: float
+    k: float
+    mass_p: float
+    mass_d: float
+
+
+class NomadConstants(NamedTuple):
+    """Nomad quantities that stay fixed during a run (SI units)."""
+    p_0: float
+    p_2: float
+    gamma: float
+    area: float
+    v_0: float
+    v_c: float
+    mass: float
+    fric1: float
+    fric2: float
+    static_length: float
+
+
+class NomadValveConstants(NamedTuple):
+    """Fixed quantities of the Nomad valve model (SI units).
+
+    The kernel receives these followed by the ``flow_function_table`` entries.
+    """
+    p_0: float
+    p_2: float
+    gamma: float
+    area: float
+    v_reservoir: float
+    v_chamber: float
+    mass: float
+    fric1: float
+    fric2: float
+    static_length: float
+    rho_0: float
+    flow_coefficient: float
+
+
+def spring_piston_constants(params):
+    area_p = np.pi * (params['D_p']**2) / 4
+    return SpringPistonConstants(
+        p_0=float(params['p_0']),
+        p_2=float(params['p_2']),
+        gamma=float(params['gamma']),
+        area_b=float(np.pi * (params['D_b']**2) / 4),
+        area_p=float(area_p),
+        v_0=float(params['L_0'] * area_p),
+        L_0=float(params['L_0']),
+        xsf=float(params['xso'] + params['L_0']),
+        k=float(params['k']),
+        mass_p=float(params['mass_p']),
+        mass_d=float(params['mass_d']),
+    )
+
+
+def nomad_constants(params):
+    return NomadConstants(
+        p_0=float(params['p_0']),
+        p_2=float(params['p_2']),
+        gamma=float(params['gamma']),
+        area=float(np.pi * (params['D']**2) / 4),
+        v_0=float(params['v_0']),
+        v_c=float(params['v_0'] + params['v_expand']),
+        mass=float(params['mass']),
+        fric1=float(params['fric1']),
+        fric2=float(params['fric2']),
+        static_length=NOMAD_STATIC_FRICTION_LENGTH,
+    )
+
+
+def nomad_valve_constants(params):
+    # The chamber pressure is a state of the valve model, so the chamber
+    # cannot be empty the way the lumped model allows
+    if params['v_expand'] <= 0:
+        raise ValueError(f"The valve model needs a positive expansion volume v_expand, "
+                         f"got {params['v_expand']!r}")
+    valve_area = np.pi * (params['valve_diameter']**2) / 4
+    return NomadValveConstants(
+        p_0=float(params['p_0']),
+        p_2=float(params['p_2']),
+        gamma=float(params['gamma']),
+        area=float(np.pi * (params['D']**2) / 4),
+        v_reservoir=float(params['v_0']),
+        v_chamber=float(params['v_expand']),
+        mass=float(params['mass']),
+        fric1=float(params['fric1']),
+        fric2=float(params['fric2']),
+        static_length=NOMAD_STATIC_FRICTION_LENGTH,
+        rho_0=float(params['p_0'] / (GAS_CONSTANT_AIR * params['gas_temperature'])),
+        flow_coefficient=float(params['discharge_coefficient'] * valve_area),
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def flow_function_table(gamma, size=FLOW_TABLE_SIZE):
+    """Squared orifice flow function at ``size`` even pressure ratios in [0, 1].
+
+    The mass flow through an orifice is
+    ``Cd * A * sqrt(rho_up * p_up * G(p_down / p_up))``, with ``G`` constant
+    below the critical ratio (choked flow). ``G`` rather than its square root
+    is tabulated because it is smooth at a ratio of 1, where the flow
+    function itself has infinite slope, so linear interpolation stays
+    accurate as the pressures equalize.
+    """
+    r = np.linspace(0.0, 1.0, size)
+    if gamma == 1:
+        critical = np.exp(-0.5)
+        choked = np.exp(-1.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            subsonic = np.nan_to_num(-2 * r**2 * np.log(r))
+    else:
+        critical = (2 / (gamma + 1))**(gamma / (gamma - 1))
+        choked = gamma * (2 / (gamma + 1))**((gamma + 1) / (gamma - 1))
+        subsonic = 2 * gamma / (gamma - 1) * (r**(2 / gamma) - r**((gamma + 1) / gamma))
+    return tuple(np.where(r <= critical, choked, np.maximum(subsonic, 0.0)).tolist())
+
+
+def _spring_piston_kernel(x, c):
+    """``spring_piston_system`` on precomputed constants, in plain float arithmetic."""
+    d1, d2, p1, p2 = x
+    volume_ratio = ((c[6] - p1) * c[4] + d1 * c[3]) / c[5]
+    if volume_ratio < 1e-10:
+        volume_ratio = 1e-10
+    p_t = c[0] / volume_ratio ** c[2]
+    acceleration = (p_t - c[1]) * c[3] / c[10]
+    if d1 <= 0.0 and d2 <= 0.0 and acceleration < 0.0:
+        acceleration = 0.0
+    return [
+        d2,
+        acceleration,
+        p2,
+        ((c[1] - p_t) * c[4] + c[8] * (c[7] - p1)) / c[9],
+    ]
+
+
+def _nomad_kernel(x, c):
+    """``nomad_system`` on precomputed constants, in plain float arithmetic."""
+    x1, x2 = x
+    p_t = c[0] / ((c[5] + c[3] * x1) / c[4]) ** c[2]
+    friction = c[7] if x1 <= c[9] else c[8]
+    return [x2, ((p_t - c[1]) * c[3] - friction) / c[6]]
+
+
+def _nomad_valve_kernel(x, c):
+    """Nomad with orifice flow from the reservoir, on precomputed constants.
+
+    ``c`` is a ``NomadValveConstants`` followed by the flow function table.
+    The reservoir expands isentropically; gas entering the chamber brings the
+    reservoir temperature with it, and gas flowing back is taken to be at
+    that temperature too. The dart stays at the breech until the chamber
+    pressure overcomes the static friction.
+    """
+    x1, x2, p_r, p_c = x
+    # Implicit solvers may try states with non-positive pressures
+    if p_r < 1.0:
+        p_r = 1.0
+    if p_c < 1.0:
+        p_c = 1.0
+    rho_r = c[10] * (p_r / c[0]) ** (1 / c[2])
+    if p_r >= p_c:
+        ratio = p_c / p_r
+        upstream = rho_r * p_r
+        direction = 1.0
+    else:
+        ratio = p_r / p_c
+        upstream = rho_r * p_c * p_c / p_r
+        direction = -1.0
+
+    # Linear interpolation in the evenly spaced table that follows the constants
+    last = len(c) - 13
+    position = ratio * last
+    i = int(position)
+    if i >= last:
+        g = c[12 + last]
+    else:
+        g = c[12 + i] + (position - i) * (c[13 + i] - c[12 + i])
+    mass_flow = direction * c[11] * (upstream * g) ** 0.5
+
+    friction = c[7] if x1 <= c[9] else c[8]
+    acceleration = ((p_c - c[1]) * c[3] - friction) / c[6]
+    if x1 <= NOMAD_BREECH_TOLERANCE and x2 <= 0.0 and acceleration < 0.0:
+        acceleration = 0.0
+    return [
+        x2,
+        acceleration,
+        -c[2] * p_r * mass_flow / (rho_r * c[4]),
+        c[2] * (p_r / rho_r * mass_flow - p_c * c[3] * x2) / (c[5] + c[3] * x1),
+    ]
+
+
+def _spring_piston_jacobian(x, c):
+    """Analytic Jacobian of ``_spring_piston_kernel`` with respect to the state."""
+    d1, d2, p1, _ = x
+    volume = (c[6] - p1) * c[4] + d1 * c[3]
+    volume_ratio = volume / c[5]
+    jac = np.zeros((4, 4))
+    jac[0, 1] = 1.0
+    jac[2, 3] = 1.0
+    jac[3, 2] = -c[8] / c[9]
+    if volume_ratio > 1e-10:
+        # dp/dV = -gamma p / V; the clamped branch has no state dependence
+        p_t = c[0] / volume_ratio ** c[2]
+        dp_dv = -c[2] * p_t / volume
+        dp_dd1 = dp_dv * c[3]
+        dp_dp1 = -dp_dv * c[4]
+        # A dart held at the breech has no acceleration to differentiate
+        if not (d1 <= 0.0 and d2 <= 0.0 and p_t < c[1]):
+            jac[1, 0] = dp_dd1 * c[3] / c[10]
+            jac[1, 2] = dp_dp1 * c[3] / c[10]
+        jac[3, 0] = -dp_dd1 * c[4] / c[9]
+        jac[3, 2] -= dp_dp1 * c[4] / c[9]
+    return jac
+
+
+def _nomad_jacobian(x, c):
+    """Analytic Jacobian of ``_nomad_kernel`` with respect to the state."""
+    volume = c[5] + c[3] * x[0]
+    p_t = c[0] / (volume / c[4]) ** c[2]
+    # Friction is piecewise constant in position, so it adds nothing here
+    return np.array([
+        [0.0, 1.0],
+        [-c[2] * p_t / volume * c[3] * c[3] / c[6], 0.0],
+    ])
+
+
+def _nomad_valve_jacobian(x, c):
+    """Jacobian of ``_nomad_valve_kernel``: analytic in the dart state,
+    differenced in the pressures.
+
+    The tabulated flow function has no closed-form derivative, so the
+    pressure columns are forward differences. The dart-state columns are
+    exact, which keeps steps from crossing into or out of the breech hold.
+    """
+    f0 = _nomad_valve_kernel(x, c)
+    volume = c[5] + c[3] * x[0]
+    jac = np.zeros((4, 4))
+    jac[0, 1] = 1.0
+    jac[3, 0] = -f0[3] * c[3] / volume
+    # The kernel floors the chamber pressure at 1 Pa
+    jac[3, 1] = -c[2] * max(x[3], 1.0) * c[3] / volume
+    for i in (2, 3):
+        # Scaled to the pressure, but never zero: the chamber starts empty
+        step = 1.5e-8 * max(abs(x[i]), 1.0)
+        shifted = list(x)
+        shifted[i] += step
+        f = _nomad_valve_kernel(shifted, c)
+        for row in (1, 2, 3):
+            jac[row, i] = (f[row] - f0[row]) / step
+    return jac
+
+
+def make_jacobian(model, params):
+    """Jacobian ``J(t, x)`` of the ``make_rhs`` right-hand side.
+
+    Analytic, except in the pressures of the Nomad valve model, whose
+    tabulated flow function is differenced numerically.
+    """
+    if model == NOMAD and nomad_has_valve(params):
+        consts = nomad_valve_constants(params)
+        consts, jacobian = tuple(consts) + flow_function_table(consts.gamma), _nomad_valve_jacobian
+    elif model == SPRING_PISTON:
+        consts, jacobian = spring_piston_constants(params), _spring_piston_jacobian
+    elif model == NOMAD:
+        consts, jacobian = nomad_constants(params), _nomad_jacobian
+    else:
+        raise ValueError(f"Unknown model: {model!r}")
+
+    def jac(t, x):
+        return jacobian(x.tolist(), consts)
+    return jac
+
+
+# Key of the Nomad valve kernel in _KERNELS
+_NOMAD_VALVE = 'nomad_valve'
+
+_KERNELS = {
+    SPRING_PISTON: _spring_piston_kernel,
+    NOMAD: _nomad_kernel,
+    _NOMAD_VALVE: _nomad_valve_kernel,
+}
+
+
+def make_rhs(model, params):
+    """Right-hand side ``f(t, x)`` specialized to one parameter set.
+
+    Areas, volumes and the other derived constants are computed once here
+    instead of on every evaluation.
+    """
+    kernel_name = model
+    if model == SPRING_PISTON:
+        consts = spring_piston_constants(params)
+    elif model == NOMAD and nomad_has_valve(params):
+        kernel_name = _NOMAD_VALVE
+        consts = nomad_valve_constants(params)
+        consts = tuple(consts) + flow_function_table(consts.gamma)
+    elif model == NOMAD:
+        consts = nomad_constants(params)
+    else:
+        raise ValueError(f"Unknown model: {model!r}")
+    kernel = _KERNELS[kernel_name]
+
+    def rhs(t, x):
+        return kernel(x.tolist(), consts)
+    return rhs
+
+
+def spring_piston_derived(params, y):
+    """Pressure, volume and spring force along a spring-piston trajectory."""
+    d1_pos, _, p1_pos, _ = y
+    area_b = np.pi * (params['D_b']**2) / 4
+    area_p = np.pi * (params['D_p']**2) / 4
+    v_0 = params['L_0'] * area_p
+    xsf = params['xso'] + params['L_0']
+
+    # Avoid division by zero or negative values
+    volume_ratio = np.maximum(
+        ((params['L_0'] - p1_pos) * area_p + d1_pos * area_b) / v_0,
+        1e-10
+    )
+    p_t_array = params['p_0'] / (volume_ratio ** params['gamma'])
+    v_t_array = (params['L_0'] - p1_pos) * area_p + area_b * d1_pos
+    spring_force = params['k'] * (xsf - p1_pos)
+    return p_t_array, v_t_array, spring_force
+
+
+def nomad_derived(params, y):
+    """Volume and pressure along a Nomad trajectory.
+
+    With the valve model these are the expansion chamber's volume and its
+    pressure state; otherwise they cover the reservoir and chamber together.
+    """
+    area = np.pi * (params['D']**2) / 4
+    if nomad_has_valve(params):
+        return params['v_expand'] + area * y[0], y[3]
+    v_t = params['v_expand'] + params['v_0'] + area * y[0]
+    p_t = params['p_0'] / ((v_t / params['v_0']) ** params['gamma'])
+    return v_t, p_t
+
+
+def _make_events(params):
+    """Terminal events: the dart reaches the muzzle, or its velocity turns negative."""
+    barrel_length = params['barrel_length']
+    # The valve model holds the dart at rest until the chamber fills
+    held_at_breech = nomad_has_valve(params)
+
+    def dart_exit(t, x):
+        return x[0] - barrel_length
+    dart_exit.terminal = True
+    dart_exit.direction = 1
+
+    def dart_stall(t, x):
+        # A dart still at rest at the breech has not stalled, even when a
+        # solver's first step leaves its velocity at exactly zero
+        if x[0] == 0.0 and x[1] == 0.0:
+            return 1.0
+        if held_at_breech and x[0] <= NOMAD_BREECH_TOLERANCE:
+            return 1.0
+        return x[1]
+    dart_stall.terminal = True
+    dart_stall.direction = -1
+
+    return [dart_exit, dart_stall]
+
+
+def initial_state(model, params):
+    """State vector at launch."""
+    if model == SPRING_PISTON:
+        return np.zeros(4)
+    if nomad_has_valve(params):
+        return np.array([0.0, 0.0, params['p_0'], params['p_2']], dtype=float)
+    return np.zeros(2)
+
+
+def estimate_horizon(model, params):
+    """Rough upper estimate (s) of the time for the dart to leave the barrel.
+
+    Uses the stored energy as if it all went into the dart to get a speed scale;
+    ``solve`` keeps integrating past this if the dart has not exited yet.
+    """
+    if model == SPRING_PISTON:
+        xsf = params['xso'] + params['L_0']
+        energy = 0.5 * params['k'] * (xsf**2 - params['xso']**2)
+        mass = params['mass_d'] + params['mass_p']
+        # Plunger travel time under the spring alone (quarter period)
+        t_stroke = 0.5 * np.pi * np.sqrt(params['mass_p'] / params['k'])
+    else:
+        energy = _nomad_gas_work(params, params['barrel_length'])
+        mass = params['mass']
+        t_stroke = 0.0
+    speed = np.sqrt(2 * max(energy, 1e-12) / mass)
+    horizon = 4 * (t_stroke + params['barrel_length'] / speed)
+    return float(min(max(horizon, 1e-4), MAX_SIMULATION_TIME))
+
+
+def stiffness_estimate(model, params):
+    """Spectral radius of the Jacobian at launch times the time horizon.
+
+    Explicit methods need on the order of this many steps just to stay stable.
+    """
+    jac = make_jacobian(model, params)(0.0, initial_state(model, params))
+    radius = np.max(np.abs(np.linalg.eigvals(jac)))
+    return float(radius * estimate_horizon(model, params))
+
+
+def choose_method(model, params, method='auto'):
+    """Resolve ``method`` to a concrete ``solve_ivp`` method name."""
+    if method not in SOLVER_METHODS:
+        raise ValueError(f"Unknown solver method: {method!r}")
+    if method != 'auto':
+        return method
+    if stiffness_estimate(model, params) > AUTO_STIFFNESS_THRESHOLD:
+        return 'LSODA'
+    return 'RK45'
+
+
+class Solution:
+    """Trajectory sampled at ``n_points`` between launch and the end of the shot.
+
+    ``status`` is EXIT, STALL or TIMEOUT; ``t_exit``/``y_exit`` hold the time and
+    state where the run ended (the muzzle when ``status == EXIT``). ``dense``
+    evaluates the continuous solution at any times in [0, t_exit], and
+    ``t_steps`` holds the solver's own step times (or quadrature nodes), where
+    the trajectory has the most detail. ``n_steps`` counts accepted steps and
+    ``n_rejected`` rejected ones, or is None when the method does not say.
+    """
+
+    def __init__(self, t, y, status, t_exit, y_exit, nfev, njev=0, method=None,
+                 dense=None, t_steps=None, n_steps=0, n_rejected=0):
+        self.t = t
+        self.y = y
+        self.status = status
+        self.t_exit = t_exit
+        self.y_exit = y_exit
+        self.nfev = nfev
+        self.njev = njev
+        self.method = method
+        self.dense = dense
+        self.t_steps = t if t_steps is None else t_steps
+        self.n_steps = n_steps
+        self.n_rejected = n_rejected
+        self.success = True
+
+    def sample(self, t):
+        """State at times ``t`` (clipped to the run), shape ``(n_states, len(t))``."""
+        t = np.clip(np.asarray(t, dtype=float), 0.0, self.t_exit)
+        if self.dense is None:
+            return np.vstack([np.interp(t, self.t, row) for row in self.y])
+        return self.dense(t)
+
+
+class _SegmentedDenseOutput:
+    """Dense output of an integration split into consecutive solve_ivp runs."""
+
+    def __init__(self, interpolants, bounds, n_states):
+        self.interpolants = interpolants
+        self.bounds = bounds
+        self.n_states = n_states
+
+    def __call__(self, t):
+        which = np.searchsorted(self.bounds, t, side='right')
+        y = np.empty((self.n_states, t.size))
+        for i, interpolant in enumerate(self.interpolants):
+            mask = which == i
+            if mask.any():
+                y[:, mask] = interpolant(t[mask])
+        return y
+
+
+class _QuadratureDenseOutput:
+    """Nomad state at any time from the tabulated inverse of t(x)."""
+
+    def __init__(self, params, t_u, u):
+        self.params = params
+        self.t_u = t_u
+        self.u = u
+
+    def __call__(self, t):
+        x = np.interp(t, self.t_u, self.u)**2
+        return np.vstack((x, _nomad_dart_speed(self.params, x)))
+
+
+# Gauss-Legendre rule for the exit-time quadrature
+_GAUSS_NODES, _GAUSS_WEIGHTS = np.polynomial.legendre.leggauss(32)
+
+# Parameters understood by the Nomad energy integral. Any other key in a Nomad
+# parameter dict is taken to switch on a model term the integral does not cover,
+# and the ODE is used instead.
+NOMAD_CLOSED_FORM_KEYS = frozenset(NOMAD_DEFAULTS)
+
+
+def nomad_has_closed_form(params):
+    """True when the Nomad run reduces to the one-dimensional energy integral."""
+    return set(params) <= NOMAD_CLOSED_FORM_KEYS
+
+
+def _nomad_gas_work(params, x):
+    """Work (J) done by the expanding gas over the first ``x`` meters of dart travel."""
+    area = np.pi * (params['D']**2) / 4
+    gamma = params['gamma']
+    v_0 = params['v_0']
+    v_c = params['v_0'] + params['v_expand']
+    if gamma == 1:
+        return params['p_0'] * v_0 * np.log((v_c + area * x) / v_c)
+    return (params['p_0'] * v_0**gamma / (gamma - 1)
+            * (v_c**(1 - gamma) - (v_c + area * x)**(1 - gamma)))
+
+
+def _nomad_work(params, x):
+    """Net work (J) done on the dart over its first ``x`` meters of travel."""
+    area = np.pi * (params['D']**2) / 4
+    gas = _nomad_gas_work(params, x)
+    static = NOMAD_STATIC_FRICTION_LENGTH
+    friction = (params['fric1'] * np.minimum(x, static)
+                + params['fric2'] * np.maximum(x - static, 0))
+    return gas - params['p_2'] * area * x - friction
+
+
+def _nomad_dart_speed(params, x):
+    return np.sqrt(2 * np.maximum(_nomad_work(params, x), 0) / params['mass'])
+
+
+def _nomad_start_force(params):
+    """Net force (N) on the dart at launch."""
+    area = np.pi * (params['D']**2) / 4
+    v_c = params['v_0'] + params['v_expand']
+    pressure = params['p_0'] * (params['v_0'] / v_c)**params['gamma']
+    return (pressure - params['p_2']) * area - params['fric1']
+
+
+def _nomad_time_integrand(params, u):
+    """Integrand of t = integral of 2u / v(u^2) du for u > 0."""
+    return 2 * u / _nomad_dart_speed(params, u * u)
+
+
+def _nomad_segments(params):
+    """Integration segments in u = sqrt(x), split where the friction changes."""
+    u_exit = np.sqrt(params['barrel_length'])
+    u_static = np.sqrt(NOMAD_STATIC_FRICTION_LENGTH)
+    if u_static < u_exit:
+        return [(0.0, u_static), (u_static, u_exit)]
+    return [(0.0, u_exit)]
+
+
+def nomad_exit(params):
+    """Muzzle velocity (m/s) and exit time (s) of a Nomad shot without an ODE solve.
+
+    The velocity comes from the closed-form energy integral and the exit time
+    from Gauss-Legendre quadrature of dt = dx / v(x). Returns None if the dart
+    stalls before the muzzle.
+    """
+    if _nomad_start_force(params) <= 0:
+        return None
+
+    # The work is concave between friction changes, so checking the segment
+    # ends is enough to know the dart keeps moving all the way out
+    segments = np.array(_nomad_segments(params))
+    lo, hi = segments[:, :1], segments[:, 1:]
+    if np.any(_nomad_work(params, hi * hi) <= 0):
+        return None
+
+    u = 0.5 * (hi - lo) * _GAUSS_NODES + 0.5 * (hi + lo)
+    exit_time = np.sum(0.5 * (hi - lo) * (_nomad_time_integrand(params, u) @ _GAUSS_WEIGHTS)[:, None])
+    return float(_nomad_dart_speed(params, params['barrel_length'])), float(exit_time)
+
+
+def nomad_quadrature(params):
+    """Nomad trajectory from the energy integral, or None when the ODE is needed.
+
+    Position is recovered by inverting the cumulative time integral t(x) on a
+    fine grid; velocity follows from the energy integral at each position.
+    """
+    if not nomad_has_closed_form(params):
+        return None
+    exit_state = nomad_exit(params)
+    if exit_state is None:
+        return None
+    muzzle_velocity, exit_time = exit_state
+
+    n_points = int(params['n_points'])
+    u_parts = [np.linspace(lo, hi, max(n_points, 200)) for lo, hi in _nomad_segments(params)]
+    u = np.concatenate([u_parts[0]] + [part[1:] for part in u_parts[1:]])
+    integrand = np.empty_like(u)
+    integrand[1:] = _nomad_time_integrand(params, u[1:])
+    # Near launch v ~ u * sqrt(2 F0 / m), so 2u / v tends to 2 / sqrt(2 F0 / m)
+    integrand[0] = 2 / np.sqrt(2 * _nomad_start_force(params) / params['mass'])
+    t_u = np.concatenate(([0.0], np.cumsum(0.5 * (integrand[1:] + integrand[:-1]) * np.diff(u))))
+    # Match the more accurate Gauss-Legendre exit time
+    t_u *= exit_time / t_u[-1]
+
+    dense = _QuadratureDenseOutput(dict(params), t_u, u)
+    t = np.linspace(0, exit_time, n_points)
+    y = dense(t)
+    y_exit = np.array([params['barrel_length'], muzzle_velocity])
+    y[:, -1] = y_exit
+    return Solution(t, y, EXIT, exit_time, y_exit, 0, method='quadrature',
+                    dense=dense, t_steps=t_u)
+
+
+def _nomad_max_speed(params):
+    """Highest dart speed (m/s) over the barrel.
+
+    The chamber pressure falls monotonically, so within each friction segment
+    the speed peaks where the net force crosses zero, or at a segment end.
+    """
+    area = np.pi * (params['D']**2) / 4
+    v_c = params['v_0'] + params['v_expand']
+    static = NOMAD_STATIC_FRICTION_LENGTH
+    segments = [(0.0, min(static, params['barrel_length']), params['fric1']),
+                (min(static, params['barrel_length']), params['barrel_length'], params['fric2'])]
+    candidates = [params['barrel_length']]
+    for lo, hi, friction in segments:
+        balance = params['p_2'] + friction / area
+        if balance > 0:
+            x = (params['v_0'] * (params['p_0'] / balance)**(1 / params['gamma']) - v_c) / area
+            candidates.append(min(max(x, lo), hi))
+        else:
+            candidates.append(hi)
+    return float(np.max(_nomad_dart_speed(params, np.array(candidates))))
+
+
+def nomad_summary(params):
+    """``summarize`` output for a Nomad shot straight from ``nomad_exit``.
+
+    The chamber only expands, so the peak pressure is the launch pressure and
+    the minimum the pressure at the muzzle. Returns None when the ODE is needed.
+    """
+    if not nomad_has_closed_form(params):
+        return None
+    exit_state = nomad_exit(params)
+    if exit_state is None:
+        return None
+    area = np.pi * (params['D']**2) / 4
+    v_c = params['v_0'] + params['v_expand']
+    v_exit = v_c + area * params['barrel_length']
+    return {
+        'muzzle_velocity': exit_state[0],
+        'max_dart_velocity': _nomad_max_speed(params),
+        'peak_pressure': float(params['p_0'] * (params['v_0'] / v_c)**params['gamma']),
+        'min_pressure': float(params['p_0'] * (params['v_0'] / v_exit)**params['gamma']),
+        'exit_time': exit_state[1],
+    }
+
+
+# Right-hand side evaluations per attempted step of the explicit methods, and
+# per solve_ivp call for the first derivative and the initial step size
+_RK_STAGES = {'RK45': 6}
+_RK_STARTUP_EVALS = 2
+
+
+def _rejected_steps(method, sol):
+    """Rejected steps of one solve_ivp run, or None if they cannot be told apart.
+
+    solve_ivp only reports evaluation counts. An explicit Runge-Kutta step
+    costs the same number of evaluations whether or not it is accepted, so
+    the rejected ones follow from the total; implicit methods reuse work
+    across attempts and do not allow this.
+    """
+    if method not in _RK_STAGES:
+        return None
+    attempts = (sol.nfev - _RK_STARTUP_EVALS) // _RK_STAGES[method]
+    return max(attempts - (sol.t.size - 1), 0)
+
+
+def solve(model, params, fast=True, method='RK45', rtol=1e-3, atol=1e-6):
+    """Run a model from rest until the dart exits the barrel or stalls.
+
+    With ``fast`` set, Nomad runs use ``nomad_quadrature`` when it applies.
+    Otherwise the ODE is integrated with the ``make_rhs`` kernel using
+    ``method``, one of ``SOLVER_METHODS``. Implicit methods get the analytic
+    Jacobian, and 'auto' switches to LSODA for stiff configurations; ``rtol``
+    and ``atol`` are the ODE tolerances. The time horizon is chosen
+    automatically: integration starts with ``estimate_horizon`` and is
+    extended until a terminal event fires or ``MAX_SIMULATION_TIME`` is
+    reached.
+    """
+    if model == NOMAD and fast:
+        sol = nomad_quadrature(params)
+        if sol is not None:
+            return sol
+
+    # scipy.integrate takes longer to import than everything else here, so
+    # it loads with the first solve rather than with the GUIs
+    from scipy.integrate import solve_ivp
+
+    system = make_rhs(model, params)
+    x0 = initial_state(model, params)
+    events = _make_events(params)
+    method = choose_method(model, params, method)
+    options = {'jac': make_jacobian(model, params)} if method in IMPLICIT_METHODS else {}
+    segments = []
+    t_start = 0.0
+    segment_length = estimate_horizon(model, params)
+    status = TIMEOUT
+    nfev = njev = n_steps = 0
+    n_rejected = 0 if method in _RK_STAGES else None
+    while t_start < MAX_SIMULATION_TIME:
+        t_stop = min(t_start + segment_length, MAX_SIMULATION_TIME)
+        sol = solve_ivp(system, (t_start, t_stop), x0, method=method, events=events,
+                        dense_output=True, rtol=rtol, atol=atol, **options)
+        if not sol.success:
+            raise Exception("ODE solver failed")
+        segments.append(sol)
+        nfev += sol.nfev
+        njev += sol.njev
+        n_steps += sol.t.size - 1
+        if n_rejected is not None:
+            n_rejected += _rejected_steps(method, sol)
+        if sol.status == 1:
+            status = EXIT if sol.t_events[0].size else STALL
+            break
+        t_start, x0 = sol.t[-1], sol.y[:, -1]
+        segment_length *= 2
+
+    t_end = segments[-1].t[-1]
+    dense = _SegmentedDenseOutput([seg.sol for seg in segments],
+                                  [seg.t[-1] for seg in segments[:-1]], len(x0))
+    t = np.linspace(0, t_end, int(params['n_points']))
+    y = dense(t)
+    y[:, -1] = segments[-1].y[:, -1]
+    t_steps = np.concatenate([segments[0].t] + [seg.t[1:] for seg in segments[1:]])
+    return Solution(t, y, status, t_end, segments[-1].y[:, -1].copy(), nfev, njev, method,
+                    dense=dense, t_steps=t_steps, n_steps=n_steps, n_rejected=n_rejected)
+
+
+def summarize(model, params, sol):
+    """Summary metrics of a run.
+
+    ``muzzle_velocity`` and ``max_dart_velocity`` in m/s, ``peak_pressure``
+    and ``min_pressure`` in Pa, and ``exit_time`` in s. A dart that stalls or
+    times out inside the barrel has zero muzzle velocity and a NaN exit time.
+    """
+    if model == SPRING_PISTON:
+        pressure = spring_piston_derived(params, sol.y)[0]
+    else:
+        pressure = nomad_derived(params, sol.y)[1]
+    exited = sol.status == EXIT
+    return {
+        'muzzle_velocity': float(sol.y_exit[1]) if exited else 0.0,
+        'max_dart_velocity': float(np.max(sol.y[1])),
+        'peak_pressure': float(np.max(pressure)),
+        'min_pressure': float(np.min(pressure)),
+        'exit_time': float(sol.t_exit) if exited else float('nan'),
+    }
+
+
+def _series(model, params, y):
+    """Named state and derived-quantity arrays for states ``y``."""
+    if model == SPRING_PISTON:
+        pressure, volume, spring_force = spring_piston_derived(params, y)
+        return {
+            'dart_pos': y[0], 'dart_vel': y[1],
+            'plunger_pos': y[2], 'plunger_vel': y[3],
+            'pressure': pressure, 'volume': volume, 'spring_force': spring_force,
+        }
+    volume, pressure = nomad_derived(params, y)
+    series = {
+        'dart_pos': y[0], 'dart_vel': y[1],
+        'volume': volume, 'pressure': pressure,
+    }
+    if nomad_has_valve(params):
+        series['reservoir_pressure'] = y[2]
+    return series
+
+
+class Result:
+    """A finished run: trajectory, derived quantities and summary metrics.
+
+    ``series`` maps names (``dart_pos``, ``dart_vel``, ``pressure``, ...) to
+    arrays sampled at ``t``; the same names are readable as attributes.
+    ``muzzle_velocity``, ``max_dart_velocity``, ``peak_pressure``,
+    ``min_pressure`` and ``exit_time`` are the ``summarize`` metrics, and ``solution`` is the underlying ``Solution``.
+    ``timings`` holds the wall time in seconds spent on the ``'solve'`` and
+    ``'post_process'`` phases of the run that produced it.
+    """
+
+    def __init__(self, model, params, solution, series, timings=None):
+        self.model = model
+        self.params = params
+        self.solution = solution
+        self.series = series
+        self.timings = {} if timings is None else timings
+        self.t = solution.t
+        self.status = solution.status
+        summary = summarize(model, params, solution)
+        self.muzzle_velocity = summary['muzzle_velocity']
+        self.max_dart_velocity = summary['max_dart_velocity']
+        self.peak_pressure = summary['peak_pressure']
+        self.min_pressure = summary['min_pressure']
+        self.exit_time = summary['exit_time']
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['series'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def exited(self):
+        return self.status == EXIT
+
+    def sample(self, t):
+        """``series`` evaluated from the dense solution at times ``t``."""
+        return _series(self.model, self.params, self.solution.sample(t))
+
+    def summary(self):
+        """The summary metrics as a dict, as returned by ``summarize``."""
+        return {
+            'muzzle_velocity': self.muzzle_velocity,
+            'max_dart_velocity': self.max_dart_velocity,
+            'peak_pressure': self.peak_pressure,
+            'min_pressure': self.min_pressure,
+            'exit_time': self.exit_time,
+        }
+
+
+def simulate(model, params=None, **options):
+    """Run ``model`` and return a ``Result``.
+
+    ``params`` overrides entries of ``default_params(model)``; ``options`` are
+    passed to ``solve``. Nothing here imports matplotlib or tkinter, so this is
+    the entry point for scripts and worker processes.
+    """
+    full_params = default_params(model)
+    if params is not None:
+        full_params.update(params)
+    start = time.perf_counter()
+    sol = solve(model, full_params, **options)
+    solved = time.perf_counter()
+    result = Result(model, full_params, sol, _series(model, full_params, sol.y))
+    result.timings = {'solve': solved - start, 'post_process': time.perf_counter() - solved}
+    return result
@@ -0,0 +1,96 @@
+"""Bounded history of recent spring-piston runs for overlay plots.
+
+``RunHistory`` keeps the display series of the last runs (in plot units, see
+``plots.display_series``) in one preallocated float32 ring buffer. Each run is
+sampled from its dense output and reduced with min/max decimation to at most
+``points`` samples, so a stored run costs a fixed number of bytes and the
+buffer never grows: once it is full the oldest run is overwritten.
+"""
+import numpy as np
+
+from plots import display_series, minmax_indices
+
+# Stored series, with 'time' (ms) first
+HISTORY_SERIES = ('time', 'dart_pos', 'dart_vel', 'plunger_pos', 'plunger_vel', 'pressure', 'volume')
+
+DEFAULT_MAX_RUNS = 50
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_POINTS = 2048
+
+# Dense-output samples per stored sample, before decimation
+_OVERSAMPLE = 4
+
+
+class RunHistory:
+    """The last ``capacity`` runs, decimated to ``points`` samples each.
+
+    ``capacity`` is ``max_runs`` or as many runs as fit in ``max_bytes``,
+    whichever is smaller. Runs get increasing integer ids; ``series(run_id)``
+    returns float32 views into the buffer, valid until that run is
+    overwritten, and raises KeyError once it has been.
+    """
+
+    def __init__(self, max_runs=DEFAULT_MAX_RUNS, max_bytes=DEFAULT_MAX_BYTES, points=DEFAULT_POINTS):
+        bytes_per_run = len(HISTORY_SERIES) * points * np.dtype(np.float32).itemsize
+        self.capacity = max(1, min(max_runs, max_bytes // bytes_per_run))
+        self.points = points
+        self._data = np.empty((self.capacity, len(HISTORY_SERIES), points), dtype=np.float32)
+        self._lengths = np.zeros(self.capacity, dtype=int)
+        self._ids = [None] * self.capacity
+        self._labels = [None] * self.capacity
+        self._next_id = 0
+
+    def __len__(self):
+        return sum(run_id is not None for run_id in self._ids)
+
+    def __contains__(self, run_id):
+        return run_id in self._ids
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def add(self, result, label):
+        """Store a spring-piston ``Result`` under ``label``; returns its run id."""
+        # Every series is reduced with the same bucketed min/max, so 2 of each
+        # per bucket (plus both ends) must fit in the slot
+        n_buckets = max(1, (self.points - 2) // (2 * (len(HISTORY_SERIES) - 1)))
+        t = np.union1d(np.linspace(0.0, result.solution.t_exit, _OVERSAMPLE * self.points),
+                       result.solution.t_steps)
+        series = display_series(t, result.sample(t))
+        keep = minmax_indices([series[key] for key in HISTORY_SERIES[1:]], n_buckets)
+
+        run_id = self._next_id
+        self._next_id += 1
+        slot = run_id % self.capacity
+        for row, key in enumerate(HISTORY_SERIES):
+            self._data[slot, row, :keep.size] = series[key][keep]
+        self._lengths[slot] = keep.size
+        self._ids[slot] = run_id
+        self._labels[slot] = label
+        return run_id
+
+    def runs(self):
+        """``(run_id, label)`` of every stored run, oldest first."""
+        stored = [(run_id, label) for run_id, label in zip(self._ids, self._labels) if run_id is not None]
+        return sorted(stored)
+
+    def label(self, run_id):
+        return self._labels[self._slot(run_id)]
+
+    def series(self, run_id):
+        """Display series of a stored run, keyed by ``HISTORY_SERIES`` name."""
+        slot = self._slot(run_id)
+        n = self._lengths[slot]
+        return {key: self._data[slot, row, :n] for row, key in enumerate(HISTORY_SERIES)}
+
+    def clear(self):
+        self._ids = [None] * self.capacity
+        self._labels = [None] * self.capacity
+        self._lengths[:] = 0
+
+    def _slot(self, run_id):
+        slot = run_id % self.capacity
+        if self._ids[slot] != run_id:
+            raise KeyError(run_id)
+        return slot
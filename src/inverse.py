@@ -0,0 +1,206 @@
+"""Inverse design: find the parameter value that gives a target muzzle velocity.
+
+Only one parameter is varied; every other entry of the parameter dict stays
+fixed. The root is found with Brent's method (inverse quadratic interpolation
+safeguarded by bisection) on a bracket that is widened geometrically until the
+muzzle velocity crosses the target. scipy.optimize is excluded from the frozen
+builds, so the root finder is implemented here.
+"""
+import math
+
+from engine import NOMAD, SPRING_PISTON, default_params, nomad_summary, solve, summarize
+
+# Parameters that can be solved for, with the search bracket used when none is given
+DEFAULT_BRACKETS = {
+    SPRING_PISTON: {
+        'k': (100.0, 5000.0),
+        'L_0': (0.02, 0.3),
+    },
+    NOMAD: {
+        'p_0': (1.5e5, 2e6),
+    },
+}
+
+# Limits on bracket growth, so a target that cannot be reached fails in a few
+# runs. All supported parameters are positive, so the bracket is scaled.
+_MAX_EXPANSIONS = 6
+_EXPANSION_FACTOR = 2.0
+
+
+class _OutOfSimulations(Exception):
+    """Raised when the simulation budget of a search is used up."""
+
+
+class InverseResult:
+    """Outcome of ``solve_for_velocity``.
+
+    ``value`` is the SI parameter value found and ``muzzle_velocity`` the
+    velocity it gives (m/s). ``n_simulations`` counts the runs this call made;
+    ``evaluations`` maps every parameter value tried so far to its muzzle
+    velocity and can be passed to the next call to reuse them.
+    """
+
+    def __init__(self, key, target, value, muzzle_velocity, n_simulations, evaluations, converged):
+        self.key = key
+        self.target = target
+        self.value = value
+        self.muzzle_velocity = muzzle_velocity
+        self.n_simulations = n_simulations
+        self.evaluations = evaluations
+        self.converged = converged
+
+
+def muzzle_velocity(model, params, **options):
+    """Muzzle velocity (m/s) for one configuration, 0 if the dart does not exit.
+
+    ``options`` are passed to ``solve``.
+    """
+    if model == NOMAD and options.get('fast', True):
+        summary = nomad_summary(params)
+        if summary is not None:
+            return summary['muzzle_velocity']
+    # Only the exit state is needed, so skip the dense output grid
+    params = dict(params, n_points=2)
+    return summarize(model, params, solve(model, params, **options))['muzzle_velocity']
+
+
+def _brent(f, a, fa, b, fb, xtol, ftol, max_iter):
+    """Brent's method on a bracket with ``fa`` and ``fb`` of opposite sign.
+
+    Follows the layout of scipy's brentq: ``cur`` is the best estimate, ``blk``
+    the opposite end of the bracket and ``pre`` the previous estimate. Returns
+    ``(x, fx, converged)`` for the best point found.
+    """
+    x_pre, f_pre, x_cur, f_cur = a, fa, b, fb
+    x_blk = f_blk = s_pre = s_cur = 0.0
+    for _ in range(max_iter):
+        if f_pre * f_cur < 0:
+            x_blk, f_blk = x_pre, f_pre
+            s_pre = s_cur = x_cur - x_pre
+        if abs(f_blk) < abs(f_cur):
+            x_pre, x_cur, x_blk = x_cur, x_blk, x_cur
+            f_pre, f_cur, f_blk = f_cur, f_blk, f_cur
+
+        delta = 0.5 * (xtol + 4 * 2.2e-16 * abs(x_cur))
+        s_bis = 0.5 * (x_blk - x_cur)
+        if abs(f_cur) <= ftol or abs(s_bis) < delta:
+            return x_cur, f_cur, True
+
+        if abs(s_pre) > delta and abs(f_cur) < abs(f_pre):
+            if x_pre == x_blk:
+                # Secant step
+                s_try = -f_cur * (x_cur - x_pre) / (f_cur - f_pre)
+            else:
+                # Inverse quadratic interpolation
+                d_pre = (f_pre - f_cur) / (x_pre - x_cur)
+                d_blk = (f_blk - f_cur) / (x_blk - x_cur)
+                s_try = -f_cur * (f_blk * d_blk - f_pre * d_pre) / (d_blk * d_pre * (f_blk - f_pre))
+            if 2 * abs(s_try) < min(abs(s_pre), 3 * abs(s_bis) - delta):
+                s_pre, s_cur = s_cur, s_try
+            else:
+                s_pre = s_cur = s_bis
+        else:
+            s_pre = s_cur = s_bis
+
+        x_pre, f_pre = x_cur, f_cur
+        x_cur += s_cur if abs(s_cur) > delta else math.copysign(delta, s_bis)
+        f_cur = f(x_cur)
+    return x_cur, f_cur, False
+
+
+def _tightest_bracket(evaluations, target):
+    """Closest pair of earlier evaluations that straddles the target, or None."""
+    below = [(x, v) for x, v in evaluations.items() if v < target]
+    above = [(x, v) for x, v in evaluations.items() if v >= target]
+    best = None
+    for x_lo, v_lo in below:
+        for x_hi, v_hi in above:
+            if best is None or abs(x_hi - x_lo) < abs(best[2] - best[0]):
+                best = (x_lo, v_lo, x_hi, v_hi)
+    return best
+
+
+def solve_for_velocity(model, key, target, params=None, bracket=None, vtol=0.01,
+                       xtol=None, max_simulations=30, evaluations=None, **options):
+    """Find the value of ``params[key]`` that gives a muzzle velocity of ``target``.
+
+    ``target`` is in m/s and ``bracket`` is a ``(low, high)`` pair of SI values
+    to search (``DEFAULT_BRACKETS`` if omitted); it is widened when it does not
+    contain the target. The search stops once the muzzle velocity is within
+    ``vtol`` m/s of the target or the bracket is narrower than ``xtol``
+    (1e-9 of the bracket width by default). ``options`` are passed to
+    ``engine.solve``, e.g. ``method`` to pick the ODE solver.
+
+    ``evaluations`` maps parameter values to known muzzle velocities for the
+    same ``params`` and ``options``; it is updated in place, so passing the
+    dict from an earlier call (e.g. for a different target) lets the search
+    start from a tight bracket. Raises ValueError if no bracket containing the
+    target is found.
+    """
+    full_params = default_params(model)
+    if params is not None:
+        full_params.update(params)
+    if key not in full_params:
+        raise KeyError(f"Unknown parameter for {model}: {key!r}")
+    if bracket is None:
+        try:
+            bracket = DEFAULT_BRACKETS[model][key]
+        except KeyError:
+            raise ValueError(f"No default bracket for {key!r}; pass one explicitly") from None
+    lo, hi = sorted(float(v) for v in bracket)
+    if xtol is None:
+        xtol = 1e-9 * (hi - lo)
+
+    if evaluations is None:
+        evaluations = {}
+    n_simulations = 0
+
+    def velocity(value):
+        nonlocal n_simulations
+        if value not in evaluations:
+            if n_simulations >= max_simulations:
+                raise _OutOfSimulations
+            n_simulations += 1
+            evaluations[value] = muzzle_velocity(model, dict(full_params, **{key: value}), **options)
+        return evaluations[value]
+
+    def result(value, converged):
+        return InverseResult(key, target, value, evaluations[value], n_simulations,
+                             evaluations, converged)
+
+    try:
+        straddle = _tightest_bracket(evaluations, target)
+        if straddle is None:
+            v_lo, v_hi = velocity(lo), velocity(hi)
+            for expansion in range(_MAX_EXPANSIONS + 1):
+                if (v_lo - target) * (v_hi - target) <= 0:
+                    break
+                if expansion == _MAX_EXPANSIONS:
+                    raise ValueError(
+                        f"Target {target:.3f} m/s not reached for {key} between "
+                        f"{lo:.6g} and {hi:.6g} (muzzle velocity {v_lo:.3f} to {v_hi:.3f} m/s)"
+                    )
+                # Widen towards the side the target lies on, assuming the
+                # velocity changes monotonically with the parameter
+                increasing = v_hi > v_lo
+                if (target > max(v_lo, v_hi)) == increasing:
+                    lo, v_lo = hi, v_hi
+                    hi *= _EXPANSION_FACTOR
+                    v_hi = velocity(hi)
+                else:
+                    hi, v_hi = lo, v_lo
+                    lo /= _EXPANSION_FACTOR
+                    v_lo = velocity(lo)
+            straddle = (lo, v_lo, hi, v_hi)
+
+        x_a, v_a, x_b, v_b = straddle
+        for x, v in ((x_a, v_a), (x_b, v_b)):
+            if abs(v - target) <= vtol:
+                return result(x, True)
+        value, _, converged = _brent(lambda x: velocity(x) - target, x_a, v_a - target,
+                                     x_b, v_b - target, xtol, vtol, max_simulations)
+        return result(value, converged)
+    except _OutOfSimulations:
+        # Out of simulations: report the closest evaluation
+        value = min(evaluations, key=lambda x: abs(evaluations[x] - target))
+        return result(value, False)
@@ -1,34 +1,50 @@
+import time
+
+# Startup milestones are timed from here, before the heavy imports below
+_START_TIME = time.perf_counter()
+
+import argparse
+import json
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from scipy.integrate import solve_ivp
+from matplotlib.figure import Figure
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
+
+from cache import ResultCache, default_cache_dir
+from engine import EXIT, NOMAD, NOMAD_VALVE_DEFAULTS, default_params
+from profiling import StartupProfile
+from scheduler import JobScheduler
 
 class SpringerSimulatorGUI:
-    def __init__(self, root):
+    def __init__(self, root, startup=None, startup_report=None):
         self.root = root
+        self.startup = startup or StartupProfile(NOMAD, time.perf_counter())
+        self.startup_report = startup_report
         self.root.title("Nomad Simulation Calculator")
         self.root.geometry("1400x900")  # Larger window
         
         # Default parameters
-        self.params = {
-            'p_0': 583633,      # Initial pressure in Pascals
-            'p_2': 101325,           # Ambient pressure in Pascals
-            'D': 0.013,         # Diameter in meters
-            'gamma': 1.4,       # Adiabatic index
-            'v_0': 1.74e-5,     # Initial volume in cubic meters
-            'v_expand': .5e-5, # Expansion Chamber volume
-            'mass': 0.0012,     # Mass in kg
-            'fric1': 4,         # Static friction force in Newtons
-            'fric2': 0.2,       # Dynamic friction term
-            'end_time': 0.02,   # Simulation end time
-            'n_points': 1500    # Number of evaluation points
-        }
+        self.params = default_params(NOMAD)
+        self.result_cache = ResultCache(directory=default_cache_dir())
+        self.scheduler = JobScheduler(root)
         
         self.setup_gui()
-        self.run_simulation()  # Initial simulation
+        # Solve the first run in the background so the window shows at once
+        self.root.bind('<Map>', self._on_map, add='+')
+        self.root.after_idle(self.run_simulation_threaded)
+        
+    def _on_map(self, event):
+        if event.widget is self.root and self.startup.mark('first_window'):
+            self._write_startup_report()
+    
+    def _write_startup_report(self):
+        """With --startup-report, save the startup timings and quit once all are in"""
+        if self.startup_report is None or not self.startup.complete:
+            return
+        with open(self.startup_report, 'w') as outfile:
+            json.dump(self.startup.to_dict(), outfile, indent=2)
+        self.root.after(0, self.root.destroy)
         
     def setup_gui(self):
         # Create main frames with specific widths
@@ -95,7 +111,7 @@ class SpringerSimulatorGUI:
             'mass': ('Mass (kg)', 0.0001, 0.01),
             'fric1': ('Static Friction (N)', 0, 50),
             'fric2': ('Dynamic Friction (N)', 0, 10),
-            'end_time': ('End Time (s)', 0.001, 1.0),
+            'barrel_length': ('Barrel Length (m)', 0.05, 1.0),
             'n_points': ('Number of Points', 100, 5000)
         }
         
@@ -120,11 +136,34 @@ class SpringerSimulatorGUI:
             
             # Bind enter key to run simulation
             entry.bind('<Return>', lambda e: self.run_simulation_threaded())
+        
+        # Valve flow model: off by default, so the reservoir and expansion
+        # chamber equalize instantly as before
+        valve_info = {
+            'valve_diameter': 'Valve Diameter (m)',
+            'discharge_coefficient': 'Discharge Coefficient',
+            'gas_temperature': 'Gas Temperature (K)',
+        }
+        self.valve_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(scrollable_frame, text="Valve flow model", variable=self.valve_enabled,
+                        command=self.run_simulation_threaded).pack(anchor=tk.W, pady=(10, 5))
+        
+        self.valve_vars = {}
+        for key, label in valve_info.items():
+            param_frame = ttk.Frame(scrollable_frame)
+            param_frame.pack(fill=tk.X, pady=5)
+            ttk.Label(param_frame, text=label, width=20).pack(side=tk.LEFT)
+            var = tk.DoubleVar(value=NOMAD_VALVE_DEFAULTS[key])
+            self.valve_vars[key] = var
+            entry = ttk.Entry(param_frame, textvariable=var, width=12)
+            entry.pack(side=tk.LEFT, padx=5)
+            self.param_entries[key] = entry
+            entry.bind('<Return>', lambda e: self.run_simulation_threaded())
             
     def create_plots(self, parent):
         # Create matplotlib figure with subplots - larger figure size
-        self.fig, ((self.ax1, self.ax2), (self.ax3, self.ax4)) = plt.subplots(
-            2, 2, figsize=(12, 10))
+        self.fig = Figure(figsize=(12, 10))
+        ((self.ax1, self.ax2), (self.ax3, self.ax4)) = self.fig.subplots(2, 2)
         self.fig.suptitle('Nomad Simulation Results', fontsize=18)
         
         # Adjust spacing between subplots
@@ -135,50 +174,32 @@ class SpringerSimulatorGUI:
         self.canvas = FigureCanvasTkAgg(self.fig, parent)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
-    def system(self, t, x1x2):
-        """Define the system of first-order ODEs"""
-        x1, x2 = x1x2  # unpack position and velocity
-        
-        # Calculate area
-        area = np.pi * (self.params['D']**2) / 4
-        
-        # Calculate volume and pressure at current position
-        v_t = self.params['v_expand']+self.params['v_0'] + area * x1 
-        p_t = (self.params['p_0'] / ((v_t / self.params['v_0']) ** self.params['gamma']))
-        
-        # Set the equations
-        dx1dt = x2  # velocity
-        
-        # Choose friction based on position
-        friction = self.params['fric1'] if x1 <= 0.03 else self.params['fric2']
-        
-        # Calculate acceleration
-        pressure_force = (p_t - self.params['p_2']) * area
-        dx2dt = (pressure_force - friction) / self.params['mass']
-        
-        return [dx1dt, dx2dt]
-        
-    def run_simulation(self):
+    def run_simulation_threaded(self):
+        """Solve in the background, superseding any earlier request"""
         try:
             # Update parameters from GUI
             for key, var in self.param_vars.items():
                 self.params[key] = var.get()
-            
-            # Initial conditions
-            x0 = [0, 0]  # Initial state [x(0), x'(0)]
-            t_span = (0, self.params['end_time'])
-            t_eval = np.linspace(0, self.params['end_time'], int(self.params['n_points']))
-            
-            # Solve ODE
-            sol = solve_ivp(self.system, t_span, x0, t_eval=t_eval)
-            
-            if not sol.success:
-                raise Exception("ODE solver failed")
-            
-            # Calculate derived quantities
-            area = np.pi * (self.params['D']**2) / 4
-            v_t = self.params['v_expand']+self.params['v_0'] + area * sol.y[0]
-            p_t = self.params['p_0'] / ((v_t / self.params['v_0']) ** self.params['gamma'])
+            for key, var in self.valve_vars.items():
+                if self.valve_enabled.get():
+                    self.params[key] = var.get()
+                else:
+                    self.params.pop(key, None)
+        except Exception as e:
+            self.simulation_failed(e)
+            return
+        
+        # Solve (or reuse an earlier run of the same configuration)
+        params = dict(self.params)
+        self.status_label.config(text="Running simulation...", foreground="orange")
+        self.scheduler.submit(lambda: self.result_cache.simulate(NOMAD, params),
+                              self.show_result, self.simulation_failed)
+    
+    def show_result(self, result):
+        """Plot a finished run and show its key results"""
+        try:
+            sol = result.solution
+            v_t, p_t = result.volume, result.pressure
             
             # Clear previous plots
             for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
@@ -206,7 +227,11 @@ class SpringerSimulatorGUI:
             self.ax3.grid(True)
             
             # Plot 4: Pressure vs Time
-            self.ax4.plot(sol.t, p_t, 'c-', linewidth=2)
+            self.ax4.plot(sol.t, p_t, 'c-', linewidth=2, label='Chamber')
+            if 'reservoir_pressure' in result.series:
+                self.ax4.plot(sol.t, result.series['reservoir_pressure'], 'k--', linewidth=1.5,
+                              label='Reservoir')
+                self.ax4.legend()
             self.ax4.set_xlabel('Time (s)')
             self.ax4.set_ylabel('Pressure (Pa)')
             self.ax4.set_title('Pressure vs Time')
@@ -215,6 +240,8 @@ class SpringerSimulatorGUI:
             # Update layout and canvas
             self.fig.tight_layout()
             self.canvas.draw()
+            if self.startup.mark('first_plot'):
+                self._write_startup_report()
             
             # Update status
             self.status_label.config(text=f"Simulation completed successfully", 
@@ -225,43 +252,41 @@ class SpringerSimulatorGUI:
             max_vel = np.max(sol.y[1])
             min_pressure = np.min(p_t)
             
-            result_text = f"Max Position: {max_pos:.6f} m | Max Velocity: {max_vel:.3f} m/s | Min Pressure: {min_pressure:.0f} Pa"
+            if sol.status == EXIT:
+                exit_text = f"Muzzle Velocity: {sol.y_exit[1]:.3f} m/s at {sol.t_exit * 1000:.2f} ms"
+            else:
+                exit_text = "Dart did not leave the barrel"
+            result_text = f"{exit_text} | Max Position: {max_pos:.6f} m | Max Velocity: {max_vel:.3f} m/s | Min Pressure: {min_pressure:.0f} Pa"
             self.status_label.config(text=result_text)
             
         except Exception as e:
-            messagebox.showerror("Error", f"Simulation failed: {str(e)}")
-            self.status_label.config(text="Simulation failed", foreground="red")
+            self.simulation_failed(e)
     
-    def run_simulation_threaded(self):
-        """Run simulation in a separate thread to prevent GUI freezing"""
-        self.status_label.config(text="Running simulation...", foreground="orange")
-        thread = threading.Thread(target=self.run_simulation)
-        thread.daemon = True
-        thread.start()
+    def simulation_failed(self, error):
+        messagebox.showerror("Error", f"Simulation failed: {str(error)}")
+        self.status_label.config(text="Simulation failed", foreground="red")
     
     def reset_parameters(self):
         """Reset all parameters to default values"""
-        defaults = {
-            'p_0': 482633,
-            'p_2': 0,
-            'D': 0.013,
-            'gamma': 1.4,
-            'v_0': 1.74e-5,
-            'mass': 0.0012,
-            'fric1': 4,
-            'fric2': 0.2,
-            'end_time': 0.02,
-            'n_points': 1500
-        }
+        defaults = default_params(NOMAD)
         
         for key, value in defaults.items():
             self.param_vars[key].set(value)
+        for key, value in NOMAD_VALVE_DEFAULTS.items():
+            self.valve_vars[key].set(value)
         
         self.run_simulation_threaded()
 
-def main():
+def main(argv=None):
+    startup = StartupProfile(NOMAD, _START_TIME)
+    startup.mark('imports')
+    parser = argparse.ArgumentParser(description="Nomad simulator")
+    parser.add_argument('--startup-report', metavar='FILE',
+                        help="Write the startup timings to FILE as JSON and exit after the first plot")
+    args, _ = parser.parse_known_args(argv)
+
     root = tk.Tk()
-    app = SpringerSimulatorGUI(root)
+    app = SpringerSimulatorGUI(root, startup, args.startup_report)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,481 @@
+"""Persistent 3x3 trajectory plots for the spring-piston simulator.
+
+``TrajectoryPlots`` builds its axes, lines, tick formatters and tooltip
+annotations once; each run only swaps the line data and recomputes limits.
+Line data comes from the solver's dense output, sampled at a few points per
+pixel of plot width and reduced with min/max decimation, so drawing cost
+follows the plot size rather than ``n_points`` and narrow pressure peaks stay
+visible. Zooming or panning resamples the visible range.
+``HoverTooltips`` shows the nearest data point under the mouse by blitting
+the tooltip over a cached background. Earlier runs can be overlaid behind the
+current one with ``TrajectoryPlots.set_overlays``. Nothing here depends on Tk, so the same
+pipeline can be drawn on an Agg canvas for benchmarks.
+"""
+import time
+
+import numpy as np
+from matplotlib.ticker import MaxNLocator, ScalarFormatter
+from matplotlib.transforms import Bbox
+
+# Display units, shared with the GUI's entries and results panel
+MM_PER_METER = 1000.0
+GRAMS_PER_KG = 1000.0
+FPS_PER_MPS = 3.280839895013123
+BAR_PER_PASCAL = 1e-5
+ML_PER_M3 = 1_000_000.0
+MS_PER_S = 1000.0
+
+# Dense-output samples per pixel of plot width, before decimation to two
+# points (the bucket minimum and maximum) per pixel
+OVERSAMPLE = 4
+MIN_PIXEL_WIDTH = 50
+
+# (x series, y series, title, x label, y label, colour); a 'time' x axis
+# always starts at zero
+PLOT_SPECS = [
+    ('time', 'dart_pos', 'Dart Position vs Time', 'Time (ms)', 'Position (mm)', 'blue'),
+    ('time', 'dart_vel', 'Dart Velocity vs Time', 'Time (ms)', 'Velocity (fps)', 'red'),
+    ('dart_pos', 'dart_vel', 'Dart Velocity vs Dart Position', 'Dart Position (mm)', 'Velocity (fps)', 'purple'),
+    ('time', 'plunger_pos', 'Plunger Position vs Time', 'Time (ms)', 'Position (mm)', 'green'),
+    ('time', 'plunger_vel', 'Plunger Velocity vs Time', 'Time (ms)', 'Velocity (fps)', 'magenta'),
+    ('dart_pos', 'plunger_pos', 'Plunger Position vs Dart Position', 'Dart Position (mm)', 'Plunger Position (mm)', 'brown'),
+    ('time', 'pressure', 'System Pressure vs Time', 'Time (ms)', 'Pressure (bar)', 'cyan'),
+    ('time', 'volume', 'System Volume vs Time', 'Time (ms)', 'Volume (mL)', 'orange'),
+    ('dart_pos', 'pressure', 'Pressure vs Dart Position', 'Dart Position (mm)', 'Pressure (bar)', 'teal'),
+]
+
+# Colours of overlaid earlier runs, reused in order
+OVERLAY_COLORS = ('dimgray', 'tab:olive', 'tab:pink', 'tab:brown', 'tab:purple', 'tab:blue',
+                  'tab:green', 'tab:red')
+
+
+def display_series(t, series):
+    """Spring-piston series at times ``t`` converted to the units shown in the plots."""
+    return {
+        'time': t * MS_PER_S,
+        'dart_pos': series['dart_pos'] * MM_PER_METER,
+        'dart_vel': series['dart_vel'] * FPS_PER_MPS,
+        'plunger_pos': series['plunger_pos'] * MM_PER_METER,
+        'plunger_vel': series['plunger_vel'] * FPS_PER_MPS,
+        'pressure': series['pressure'] * BAR_PER_PASCAL,
+        'volume': series['volume'] * ML_PER_M3,
+    }
+
+
+def minmax_indices(arrays, n_buckets):
+    """Indices to keep when drawing ``arrays`` (equal-length) ``n_buckets`` wide.
+
+    The samples are split into ``n_buckets`` consecutive runs, and the first
+    and last sample plus the minimum and maximum of every array in each run
+    are kept, so no peak or trough is lost.
+    """
+    n = len(arrays[0])
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    pad = n_buckets * size - n
+    offsets = np.arange(n_buckets) * size
+    keep = [np.array([0, n - 1])]
+    for values in arrays:
+        if pad:
+            values = np.concatenate((values, np.full(pad, values[-1])))
+        blocks = values.reshape(n_buckets, size)
+        keep.append(offsets + np.argmin(blocks, axis=1))
+        keep.append(offsets + np.argmax(blocks, axis=1))
+    return np.unique(np.minimum(np.concatenate(keep), n - 1))
+
+
+def _plain_formatter():
+    formatter = ScalarFormatter(useMathText=False)
+    formatter.set_scientific(False)
+    formatter.set_useOffset(False)
+    return formatter
+
+
+class TrajectoryPlots:
+    """The nine trajectory plots on ``fig``, updated in place.
+
+    ``lines`` and ``annotations`` (axis -> hidden tooltip annotation) are
+    created once and reused for every run. ``overlay_lines`` holds, per axis,
+    the lines used for overlaid runs; they grow to the largest number of
+    overlays shown and are hidden when not needed.
+    """
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.axes = []
+        self.lines = []
+        self.overlay_lines = []
+        self.annotations = {}
+        self._result = None
+        self._base = None
+        self._overlays = []
+        self._updating = False
+
+        for i, (_, _, title, xlabel, ylabel, color) in enumerate(PLOT_SPECS):
+            ax = fig.add_subplot(3, 3, i + 1)
+            line, = ax.plot([], [], color=color, linewidth=3)
+            ax.set_xlabel(xlabel, fontsize=12)
+            ax.set_ylabel(ylabel, fontsize=12)
+            ax.set_title(title, fontsize=14, fontweight='bold')
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(axis='both', labelsize=11)
+            ax.tick_params(axis='x', labelrotation=0)
+
+            # Keep both axes in plain notation
+            ax.xaxis.set_major_formatter(_plain_formatter())
+            ax.yaxis.set_major_formatter(_plain_formatter())
+            ax.xaxis.set_major_locator(MaxNLocator(nbins=5))
+
+            annotation = ax.annotate(
+                "",
+                xy=(0, 0),
+                xytext=(15, 15),
+                textcoords="offset points",
+                bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=1.0),
+                arrowprops=dict(arrowstyle="->", color="black"),
+                zorder=20
+            )
+            annotation.set_visible(False)
+            annotation.set_clip_on(False)
+            # Left out of full draws; HoverTooltips blits it on its own
+            annotation.set_animated(True)
+            if annotation.arrow_patch is not None:
+                annotation.arrow_patch.set_zorder(19)
+                annotation.arrow_patch.set_clip_on(False)
+
+            ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+            self.axes.append(ax)
+            self.lines.append(line)
+            self.overlay_lines.append([])
+            self.annotations[ax] = annotation
+
+        # Adjust subplot parameters for maximum readability
+        fig.subplots_adjust(
+            left=0.08,      # Left margin
+            bottom=0.07,    # Bottom margin
+            right=0.97,     # Right margin
+            top=0.93,       # Top margin
+            wspace=0.35,    # Width spacing between subplots
+            hspace=0.45     # Height spacing between subplots
+        )
+
+    def _pixel_width(self, ax):
+        return max(int(ax.get_window_extent().width), MIN_PIXEL_WIDTH)
+
+    def _sample(self, t_start, t_stop, n):
+        """Display series on ``n`` even times plus the solver steps in between."""
+        steps = self._result.solution.t_steps
+        steps = steps[(steps > t_start) & (steps < t_stop)]
+        t = np.union1d(np.linspace(t_start, t_stop, n), steps)
+        return display_series(t, self._result.sample(t))
+
+    def _set_line(self, i, series):
+        x_key, y_key = PLOT_SPECS[i][:2]
+        x_data, y_data = series[x_key], series[y_key]
+        keep = minmax_indices((x_data, y_data), self._pixel_width(self.axes[i]))
+        self.lines[i].set_data(x_data[keep], y_data[keep])
+
+    def update(self, result):
+        """Show a spring-piston ``Result``; returns the time taken in seconds."""
+        start = time.perf_counter()
+        for annotation in self.annotations.values():
+            annotation.set_visible(False)
+
+        self._result = result
+        width = max(self._pixel_width(ax) for ax in self.axes)
+        self._base = self._sample(0.0, result.solution.t_exit, OVERSAMPLE * width)
+        for i in range(len(self.axes)):
+            self._set_line(i, self._base)
+        self._update_limits()
+        return time.perf_counter() - start
+
+    def set_overlays(self, overlays):
+        """Show earlier runs behind the current one.
+
+        ``overlays`` is a sequence of ``(label, series)`` pairs, with series in
+        display units as from ``display_series`` (``history.RunHistory.series``
+        returns them ready decimated). Pass an empty sequence to clear them.
+        """
+        self._overlays = list(overlays)
+        for i, ((x_key, y_key, *_), ax) in enumerate(zip(PLOT_SPECS, self.axes)):
+            pool = self.overlay_lines[i]
+            while len(pool) < len(self._overlays):
+                line, = ax.plot([], [], linewidth=1.5, alpha=0.8, zorder=1)
+                pool.append(line)
+            for j, line in enumerate(pool):
+                if j < len(self._overlays):
+                    label, series = self._overlays[j]
+                    line.set_data(series[x_key], series[y_key])
+                    line.set_color(OVERLAY_COLORS[j % len(OVERLAY_COLORS)])
+                    line.set_label(label)
+                    line.set_visible(True)
+                else:
+                    line.set_data([], [])
+                    line.set_visible(False)
+
+        legend_ax = self.axes[0]
+        if self._overlays:
+            handles = [self.lines[0]] + self.overlay_lines[0][:len(self._overlays)]
+            legend_ax.legend(handles, ["Current"] + [label for label, _ in self._overlays],
+                             fontsize=9, loc='best')
+        elif legend_ax.get_legend() is not None:
+            legend_ax.get_legend().remove()
+        if self._result is not None:
+            self._update_limits()
+
+    def _update_limits(self):
+        """Fit every axis to the current run and the overlays."""
+        # Setting limits here must not trigger the zoom resampling
+        self._updating = True
+        try:
+            for i, ((x_key, y_key, *_), ax) in enumerate(zip(PLOT_SPECS, self.axes)):
+                shown = [self._base] + [series for _, series in self._overlays]
+                x_data = np.concatenate([series[x_key] for series in shown])
+                y_data = np.concatenate([series[y_key] for series in shown])
+
+                if x_key == 'time':
+                    ax.set_xlim(0, np.nanmax(x_data))
+                else:
+                    x_min = np.nanmin(x_data)
+                    x_max = np.nanmax(x_data)
+                    if np.isfinite(x_min) and np.isfinite(x_max):
+                        if x_min == x_max:
+                            span = abs(x_min) * 0.05 or 1.0
+                            ax.set_xlim(x_min - span, x_max + span)
+                        else:
+                            ax.set_xlim(x_min, x_max)
+
+                # set_ylim below switches autoscaling off, so turn it back on
+                ax.set_autoscaley_on(True)
+                ax.relim(visible_only=True)
+                ax.autoscale_view(scalex=False)
+                if np.nanmin(y_data) >= 0:
+                    ax.set_ylim(bottom=0)
+        finally:
+            self._updating = False
+
+    def _on_xlim_changed(self, ax):
+        """Resample an axis at full resolution over the range it now shows."""
+        if self._updating or self._result is None:
+            return
+        i = self.axes.index(ax)
+        x_key = PLOT_SPECS[i][0]
+        x_min, x_max = sorted(ax.get_xlim())
+        x_data = self._base[x_key]
+        inside = np.flatnonzero((x_data >= x_min) & (x_data <= x_max))
+        if inside.size == 0:
+            return
+        # Extend by one base sample each side so the line reaches the edges
+        t_base = self._base['time'] / MS_PER_S
+        t_start = t_base[max(inside[0] - 1, 0)]
+        t_stop = t_base[min(inside[-1] + 1, t_base.size - 1)]
+        self._set_line(i, self._sample(t_start, t_stop, OVERSAMPLE * self._pixel_width(ax)))
+
+
+def format_tooltip_value(value):
+    """Format numeric values for display inside the tooltip."""
+    if not np.isfinite(value):
+        return "NaN"
+
+    abs_val = abs(value)
+    if abs_val >= 1e4 or (abs_val > 0 and abs_val < 1e-3):
+        return f"{value:.3e}"
+    if abs_val < 1:
+        return f"{value:.4f}"
+    if abs_val < 100:
+        return f"{value:.3f}"
+    if abs_val < 1000:
+        return f"{value:.2f}"
+    return f"{value:.1f}"
+
+
+class _LineIndex:
+    """Screen positions of a line's points, sorted by screen x.
+
+    Only points within ``threshold`` pixels horizontally of the mouse can be
+    within ``threshold`` pixels of it, so a lookup binary-searches that window
+    and measures distances there alone.
+    """
+
+    def __init__(self, line):
+        self.xdata = np.asarray(line.get_xdata(orig=False), dtype=float)
+        self.ydata = np.asarray(line.get_ydata(orig=False), dtype=float)
+        screen = line.get_transform().transform(np.column_stack((self.xdata, self.ydata)))
+        screen_x, screen_y = screen[:, 0], screen[:, 1]
+        # Trajectories plotted against time (or dart position) are already sorted
+        if np.all(screen_x[1:] >= screen_x[:-1]):
+            self.order = None
+        else:
+            self.order = np.argsort(screen_x, kind='stable')
+            screen_x, screen_y = screen_x[self.order], screen_y[self.order]
+        self.screen_x = screen_x
+        self.screen_y = screen_y
+
+    def nearest(self, x, y, threshold):
+        """``(distance_sq, index)`` of the closest point within ``threshold``, or None."""
+        lo = np.searchsorted(self.screen_x, x - threshold, side='left')
+        hi = np.searchsorted(self.screen_x, x + threshold, side='right')
+        if hi <= lo:
+            return None
+        dx = self.screen_x[lo:hi] - x
+        dy = self.screen_y[lo:hi] - y
+        distances_sq = dx * dx + dy * dy
+        i = int(np.nanargmin(distances_sq)) if np.isfinite(distances_sq).any() else None
+        if i is None or distances_sq[i] > threshold * threshold:
+            return None
+        index = lo + i
+        if self.order is not None:
+            index = int(self.order[index])
+        return distances_sq[i], index
+
+
+# Half-size (points) of a box around a tooltip's data point that holds its arrow head
+_ARROW_HEAD_POINTS = 8
+
+
+class HoverTooltips:
+    """Tooltips with the exact values of the point nearest the mouse.
+
+    ``annotations`` maps each axis to an animated annotation. After every
+    full draw the figure is saved as a background; a mouse move restores
+    only the area the old tooltip covered, draws the new one and blits the
+    union of the two, so hovering never re-renders the plots or pushes the
+    whole figure to the screen. A tooltip may extend past its axes.
+    """
+
+    def __init__(self, canvas, lines, annotations, threshold_pixels=25):
+        self.canvas = canvas
+        self.lines = lines
+        self.annotations = annotations
+        self.threshold_pixels = threshold_pixels
+        self._background = None
+        # Display box the drawn tooltip covers, restored before the next one
+        self._extent = None
+        self._indexes = {}
+        self._shown = None
+        self._connections = []
+
+    def connect(self):
+        """Start following mouse moves and full redraws on the canvas."""
+        self._connections = [
+            self.canvas.mpl_connect("motion_notify_event", self.on_move),
+            self.canvas.mpl_connect("draw_event", self.on_draw),
+        ]
+
+    def on_draw(self, event=None):
+        """Cache the freshly drawn figure and re-index the lines."""
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._extent = None
+        self._indexes = {}
+        self._shown = None
+        for annotation in self.annotations.values():
+            annotation.set_visible(False)
+
+    def _index(self, line):
+        index = self._indexes.get(line)
+        if index is None and line.axes is not None and len(line.get_xdata(orig=False)):
+            index = self._indexes[line] = _LineIndex(line)
+        return index
+
+    def nearest(self, ax, x, y):
+        """``(line, index)`` of the point on ``ax`` nearest screen position (x, y)."""
+        best = None
+        for line in self.lines:
+            if line.axes is not ax:
+                continue
+            index = self._index(line)
+            if index is None:
+                continue
+            hit = index.nearest(x, y, self.threshold_pixels)
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = (hit[0], line, hit[1])
+        return None if best is None else best[1:]
+
+    def on_move(self, event):
+        """Show, move or hide the tooltip for a mouse move."""
+        ax = event.inaxes
+        hit = None
+        if ax in self.annotations and event.xdata is not None:
+            hit = self.nearest(ax, event.x, event.y)
+        shown = None if hit is None else (ax, hit[0], hit[1])
+        if shown == self._shown:
+            return
+        if self._shown is not None:
+            self.annotations[self._shown[0]].set_visible(False)
+        self._shown = shown
+        annotation = None
+        if shown is not None:
+            line, index = hit
+            annotation = self.annotations[ax]
+            self._place(ax, annotation, line.get_xdata(orig=False)[index],
+                        line.get_ydata(orig=False)[index])
+        self._blit(ax if annotation is not None else None, annotation)
+
+    def _place(self, ax, annotation, x_val, y_val):
+        """Point ``annotation`` at a data point, keeping it inside the axes."""
+        annotation.xy = (x_val, y_val)
+        ax_bbox = ax.get_window_extent()
+        point_disp = ax.transData.transform((x_val, y_val))
+
+        offset_x = 15
+        offset_y = 15
+        horiz_align = 'left'
+        vert_align = 'bottom'
+
+        if point_disp[0] > ax_bbox.x0 + ax_bbox.width * 0.7:
+            offset_x = -15
+            horiz_align = 'right'
+
+        if point_disp[1] > ax_bbox.y0 + ax_bbox.height * 0.7:
+            offset_y = -15
+            vert_align = 'top'
+
+        annotation.xytext = (offset_x, offset_y)
+        annotation.set_ha(horiz_align)
+        annotation.set_va(vert_align)
+        annotation.set_text(
+            f"{ax.get_xlabel()}: {format_tooltip_value(x_val)}\n"
+            f"{ax.get_ylabel()}: {format_tooltip_value(y_val)}"
+        )
+        annotation.set_visible(True)
+
+    def _blit(self, ax, annotation):
+        """Replace the drawn tooltip with ``annotation`` on ``ax`` (None to hide it)."""
+        if self._background is None:
+            # Nothing drawn yet; the next full draw will capture the background
+            self.canvas.draw_idle()
+            return
+        figure_box = self.canvas.figure.bbox
+        if self._extent is not None:
+            # The saved background counts rows from the top of the figure
+            x0, y0, x1, y1 = self._extent.extents
+            self.canvas.restore_region(
+                self._background,
+                bbox=(int(x0), int(figure_box.height - y1), int(x1), int(figure_box.height - y0)),
+                xy=(0, 0))
+        extent = None
+        if annotation is not None:
+            ax.draw_artist(annotation)
+            extent = self._covered(ax, annotation)
+        boxes = [box for box in (self._extent, extent) if box is not None]
+        if boxes:
+            self.canvas.blit(Bbox.union(boxes))
+        self._extent = extent
+
+    def _covered(self, ax, annotation):
+        """Whole-pixel display box of a drawn annotation's text, box and arrow."""
+        # The box patch surrounds the text, and the arrow runs from it to the
+        # data point. Asking the annotation or its arrow for an extent would
+        # clip the arrow path again, which costs more than the rest of the blit.
+        text_box = annotation.get_bbox_patch().get_window_extent(self.canvas.get_renderer())
+        x, y = ax.transData.transform(annotation.xy)
+        head = _ARROW_HEAD_POINTS * self.canvas.figure.dpi / 72
+        point_box = Bbox.from_extents(x - head, y - head, x + head, y + head)
+        # A pixel of margin for antialiasing, kept inside the figure
+        x0, y0, x1, y1 = Bbox.union([text_box, point_box]).padded(2).extents
+        width, height = self.canvas.figure.bbox.size
+        return Bbox.from_extents(max(np.floor(x0), 0), max(np.floor(y0), 0),
+                                 min(np.ceil(x1), width), min(np.ceil(y1), height))
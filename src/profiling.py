@@ -0,0 +1,147 @@
+"""Per-run timing of the simulation pipeline.
+
+A ``RunProfile`` records the wall time of each phase of one run (reading the
+parameters, solving, computing derived quantities, updating the plots and
+drawing them) together with the solver's statistics. Profiles print as a short
+block for the results panel and export as JSON, so timings from many runs can
+be collected and compared. A ``StartupProfile`` records how long a GUI took
+to show its window and its first plot.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+# Phases in pipeline order. 'solve' and 'post_process' are timed in
+# engine.simulate and taken from the Result.
+PHASES = ('parse', 'solve', 'post_process', 'plot', 'draw')
+
+PHASE_LABELS = {
+    'parse': 'Parse',
+    'solve': 'Solve',
+    'post_process': 'Post-process',
+    'plot': 'Plot',
+    'draw': 'Draw',
+}
+
+
+def solver_stats(solution):
+    """Method, evaluation and step counts of an ``engine.Solution``."""
+    return {
+        'method': solution.method,
+        'nfev': int(solution.nfev),
+        'njev': int(solution.njev),
+        'accepted_steps': int(solution.n_steps),
+        'rejected_steps': None if solution.n_rejected is None else int(solution.n_rejected),
+    }
+
+
+class RunProfile:
+    """Wall time (s) per phase and solver statistics for one run.
+
+    ``phases`` maps names from ``PHASES`` to seconds; phases a run skipped
+    are absent. ``cache_hit`` is True when the result was reused, in which
+    case no solve or post-processing time was spent.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.timestamp = time.time()
+        self.phases = {}
+        self.solver = {}
+        self.cache_hit = False
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a ``with`` block as phase ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def record_result(self, result, cache_hit=False):
+        """Take the solve and post-process times and solver statistics from a ``Result``."""
+        self.cache_hit = cache_hit
+        for name in ('solve', 'post_process'):
+            self.phases[name] = 0.0 if cache_hit else result.timings.get(name, 0.0)
+        self.solver = solver_stats(result.solution)
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def to_dict(self):
+        return {
+            'model': self.model,
+            'timestamp': self.timestamp,
+            'cache_hit': self.cache_hit,
+            'phases': {name: self.phases[name] for name in PHASES if name in self.phases},
+            'total': self.total,
+            'solver': dict(self.solver),
+        }
+
+    def format(self):
+        """Plain-text block for a results panel, times in milliseconds."""
+        lines = [f"Total: {self.total * 1000:.1f} ms" + (" (cached result)" if self.cache_hit else "")]
+        for name in PHASES:
+            if name in self.phases:
+                lines.append(f"  {PHASE_LABELS[name] + ':':<14s}{self.phases[name] * 1000:8.2f} ms")
+        if self.solver:
+            rejected = self.solver['rejected_steps']
+            lines.append(f"Steps: {self.solver['accepted_steps']} accepted, "
+                         f"{'n/a' if rejected is None else rejected} rejected")
+        return "\n".join(lines)
+
+
+# Startup milestones in order: modules imported, window on screen, first
+# simulation plotted. Each is timed from the start of the GUI module.
+STARTUP_MARKS = ('imports', 'first_window', 'first_plot')
+
+STARTUP_LABELS = {
+    'imports': 'Imports',
+    'first_window': 'First window',
+    'first_plot': 'First plot',
+}
+
+
+class StartupProfile:
+    """Seconds from ``start`` (a ``time.perf_counter`` value) to each of ``STARTUP_MARKS``.
+
+    Only the first ``mark`` of each milestone counts, so the GUIs can mark
+    every plot and window event without tracking which one came first.
+    """
+
+    def __init__(self, model, start):
+        self.model = model
+        self.start = start
+        self.timestamp = time.time()
+        self.marks = {}
+
+    def mark(self, name):
+        """Record milestone ``name`` now; returns True if it had not been reached before."""
+        if name in self.marks:
+            return False
+        self.marks[name] = time.perf_counter() - self.start
+        return True
+
+    @property
+    def complete(self):
+        return all(name in self.marks for name in STARTUP_MARKS)
+
+    def to_dict(self):
+        return {
+            'model': self.model,
+            'timestamp': self.timestamp,
+            'marks': {name: self.marks[name] for name in STARTUP_MARKS if name in self.marks},
+        }
+
+    def format(self):
+        """Plain-text block for a results panel, times in milliseconds."""
+        return "\n".join(f"  {STARTUP_LABELS[name] + ':':<14s}{self.marks[name] * 1000:8.1f} ms"
+                         for name in STARTUP_MARKS if name in self.marks)
+
+
+def write_json(profiles, path):
+    """Write ``RunProfile`` objects to ``path`` as a JSON list."""
+    with open(path, 'w') as outfile:
+        json.dump([profile.to_dict() for profile in profiles], outfile, indent=2)
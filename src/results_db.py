@@ -0,0 +1,219 @@
+"""SQLite database of parameter sets and their summary metrics.
+
+Each row holds one configuration of either model: the full SI parameter dict
+(as JSON) and the ``sweep.RESULT_KEYS`` metrics, each of which is indexed so
+range queries over large sweeps stay fast. A configuration is stored once;
+adding it again replaces its metrics. Everything is in SI units.
+
+Command line usage::
+
+    python src/sweep.py spring_piston k=500:2000:200 L_0=0.05:0.15:200 --db runs.sqlite
+    python src/results_db.py runs.sqlite muzzle_velocity=42.7:48.8 peak_pressure=:3e5
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+
+from engine import MODELS
+
+METRICS = ('muzzle_velocity', 'max_dart_velocity', 'peak_pressure', 'min_pressure', 'exit_time')
+
+# Rows per executemany call in add_many
+INSERT_BATCH_SIZE = 1000
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    model TEXT NOT NULL,
+    params TEXT NOT NULL,
+    {', '.join(f'{metric} REAL' for metric in METRICS)},
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model);
+{''.join(f'CREATE INDEX IF NOT EXISTS runs_{metric} ON runs ({metric});' for metric in METRICS)}
+"""
+
+_INSERT = f"""
+INSERT INTO runs (key, model, params, {', '.join(METRICS)}, created)
+VALUES (?, ?, ?, {', '.join('?' for _ in METRICS)}, ?)
+ON CONFLICT (key) DO UPDATE SET
+    {', '.join(f'{metric} = excluded.{metric}' for metric in METRICS)},
+    created = excluded.created
+"""
+
+_PARAM_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _configuration_key(model, params):
+    """Identity of a stored configuration: a hash of the model and its parameters."""
+    text = json.dumps([model, {key: repr(value) for key, value in params.items()}], sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _metric_value(value):
+    """Metrics as stored: NaN (a failed run or a dart that never exits) becomes NULL."""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+class ResultsDatabase:
+    """Parameter sets and summary metrics in an SQLite file.
+
+    Rows come back from ``query`` and ``get`` as dicts with ``id``, ``model``,
+    ``params`` (a dict) and one entry per ``METRICS`` name, where missing
+    values are None. The connection may be shared between threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def add(self, model, params, summary):
+        """Store one configuration with its ``summarize``-style metrics."""
+        self.add_many(model, [(params, summary)])
+
+    def add_result(self, result):
+        """Store an ``engine.Result``."""
+        self.add(result.model, result.params, result.summary())
+
+    def add_many(self, model, rows):
+        """Store ``(params, summary)`` pairs, ``INSERT_BATCH_SIZE`` per statement,
+        in a single transaction."""
+        if model not in MODELS:
+            raise ValueError(f"Unknown model: {model!r}")
+        created = time.time()
+        batch = []
+        with self._lock, self._connection:
+            for params, summary in rows:
+                params = {key: float(value) for key, value in params.items()}
+                batch.append((
+                    _configuration_key(model, params),
+                    model,
+                    json.dumps(params, sort_keys=True),
+                    *(_metric_value(summary.get(metric, math.nan)) for metric in METRICS),
+                    created,
+                ))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    self._connection.executemany(_INSERT, batch)
+                    batch = []
+            if batch:
+                self._connection.executemany(_INSERT, batch)
+
+    def query(self, model=None, order_by='muzzle_velocity', descending=True, limit=None, **ranges):
+        """Rows whose values fall in ``ranges``.
+
+        Each keyword is a metric or a parameter key mapped to ``(low, high)``
+        (inclusive; None leaves that end open). Metric ranges use the indexes;
+        parameter ranges are read from the stored JSON. ``order_by`` may be a
+        metric, ``'id'`` or None.
+        """
+        clauses = []
+        arguments = []
+        if model is not None:
+            clauses.append("model = ?")
+            arguments.append(model)
+        for name, (low, high) in ranges.items():
+            if name in METRICS:
+                column = name
+            elif _PARAM_NAME.match(name):
+                column = f"json_extract(params, '$.{name}')"
+            else:
+                raise ValueError(f"Invalid parameter name: {name!r}")
+            if low is not None:
+                clauses.append(f"{column} >= ?")
+                arguments.append(float(low))
+            if high is not None:
+                clauses.append(f"{column} <= ?")
+                arguments.append(float(high))
+
+        sql = "SELECT * FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by is not None:
+            if order_by not in METRICS + ('id',):
+                raise ValueError(f"Cannot order by {order_by!r}")
+            sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            arguments.append(int(limit))
+        with self._lock:
+            rows = self._connection.execute(sql, arguments).fetchall()
+        return [self._row(row) for row in rows]
+
+    def get(self, run_id):
+        """The row with ``id`` ``run_id``."""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(run_id)
+        return self._row(row)
+
+    @staticmethod
+    def _row(row):
+        record = {'id': row['id'], 'model': row['model'], 'params': json.loads(row['params'])}
+        record.update({metric: row[metric] for metric in METRICS})
+        return record
+
+
+def _parse_range(text):
+    """Parse ``name=low:high`` (either end may be empty) into a name and a pair."""
+    name, _, spec = text.partition('=')
+    low, sep, high = spec.partition(':')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected name=low:high, got {text!r}")
+    try:
+        return name, (float(low) if low else None, float(high) if high else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid range: {text!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a results database")
+    parser.add_argument('database')
+    parser.add_argument('ranges', nargs='*', type=_parse_range,
+                        help="metric=low:high or parameter=low:high (SI units, ends optional)")
+    parser.add_argument('--model', choices=MODELS, default=None)
+    parser.add_argument('--order-by', default='muzzle_velocity', help="Metric to sort by (descending)")
+    parser.add_argument('-n', '--limit', type=int, default=20, help="Rows to show")
+    args = parser.parse_intermixed_args(argv)
+
+    with ResultsDatabase(args.database) as database:
+        rows = database.query(model=args.model, order_by=args.order_by, limit=args.limit,
+                              **dict(args.ranges))
+    if not rows:
+        print("No matching runs")
+        return
+    print("\t".join(('id', 'model') + METRICS + ('params',)))
+    for row in rows:
+        metrics = ['' if row[metric] is None else f"{row[metric]:.6g}" for metric in METRICS]
+        print("\t".join([str(row['id']), row['model']] + metrics + [json.dumps(row['params'])]))
+
+
+if __name__ == "__main__":
+    main()
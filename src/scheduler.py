@@ -0,0 +1,117 @@
+"""Single-flight background jobs for the Tk applications.
+
+Tk widgets may only be used from the thread that runs the main loop, and a
+solve can take long enough for several newer requests to arrive while it
+runs. ``JobScheduler`` runs at most one job at a time on a worker thread. A
+job submitted while another is waiting replaces it, so rapid edits never
+pile up work. A job that was superseded while it ran still has its result
+shown, as long as nothing newer has been shown yet: during a slider drag
+the plots keep up with the newest finished run instead of freezing until
+the mouse stops. Results travel back through a queue that the main loop
+polls with ``root.after``, so every callback runs on the Tk thread.
+"""
+import queue
+import threading
+
+# Milliseconds between checks of the result queue while a job is in flight
+POLL_INTERVAL_MS = 20
+
+
+class JobScheduler:
+    """At most one job in flight, the latest one waiting, results on the Tk thread.
+
+    ``submit`` and ``cancel`` must be called from the Tk thread. A job is a
+    callable that runs on the worker thread, so it must not touch widgets or
+    Tk variables; read those before submitting. When it returns, ``on_done``
+    gets its value on the Tk thread, unless a newer job's result has already
+    been delivered or ``cancel`` was called in the meantime. ``on_error``
+    gets its exception only if no newer job was submitted, since an error
+    about an outdated request is of no use.
+    """
+
+    def __init__(self, root, poll_interval=POLL_INTERVAL_MS):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._generation = 0
+        # Generation of the newest result delivered (or cancelled); older
+        # results are dropped
+        self._delivered = 0
+        self._lock = threading.Lock()
+        self._pending = None
+        self._running = False
+        self._thread = None
+        self._results = queue.Queue()
+        self._poll_id = None
+
+    @property
+    def busy(self):
+        """True while a job is running or waiting to run."""
+        with self._lock:
+            return self._running or self._pending is not None
+
+    def submit(self, job, on_done, on_error=None):
+        """Run ``job()`` after the current job, replacing any job still waiting.
+
+        Returns the job's generation number. Exceptions with no ``on_error``
+        are dropped.
+        """
+        self._generation += 1
+        with self._lock:
+            self._pending = (self._generation, job, on_done, on_error)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, daemon=True)
+                self._thread.start()
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_interval, self._poll)
+        return self._generation
+
+    def cancel(self):
+        """Drop the waiting job and the result of the running one."""
+        self._generation += 1
+        self._delivered = self._generation
+        with self._lock:
+            self._pending = None
+
+    def _work(self):
+        """Run the latest waiting job until none are left"""
+        while True:
+            with self._lock:
+                request, self._pending = self._pending, None
+                if request is None:
+                    self._running = False
+                    self._thread = None
+                    return
+                self._running = True
+            generation, job, on_done, on_error = request
+            try:
+                outcome = (True, on_done, job())
+            except Exception as exc:
+                outcome = (False, on_error, exc)
+            # Queued before _running is cleared, so _poll sees either the
+            # result or a busy scheduler
+            self._results.put((generation,) + outcome)
+
+    def _poll(self):
+        self._poll_id = None
+        try:
+            # Only the newest of the results that arrived since the last poll
+            # is drawn; the ones it supersedes would be overwritten at once
+            newest = None
+            while True:
+                try:
+                    item = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                generation, succeeded, _, _ = item
+                if generation <= self._delivered:
+                    continue
+                if succeeded or generation == self._generation:
+                    newest = item
+            if newest is not None:
+                generation, _, callback, value = newest
+                self._delivered = generation
+                if callback is not None:
+                    callback(value)
+        finally:
+            if self.busy or not self._results.empty():
+                self._poll_id = self.root.after(self.poll_interval, self._poll)
@@ -0,0 +1,257 @@
+"""Forward sensitivity analysis of muzzle velocity and peak pressure.
+
+``sensitivity_analysis`` integrates the forward sensitivity equations
+``dS/dt = J S + df/dp`` alongside the state, so a single solve gives the
+derivatives of the muzzle velocity and peak pressure with respect to every
+parameter, instead of one extra run per parameter. The sensitivities are
+integrated scaled by each parameter's value (``p dx/dp``), so every column
+has the units of the state and shares its tolerances. ``J`` is the
+``engine.make_jacobian`` Jacobian; ``df/dp`` is a one-sided difference of the
+``make_rhs`` kernel, which costs one kernel call per parameter, not a solve.
+
+Command line usage (values in SI units)::
+
+    python src/sensitivity.py spring_piston k=1500 mass_d=0.0012
+"""
+import argparse
+
+import numpy as np
+
+from engine import (
+    EXIT, IMPLICIT_METHODS, MAX_SIMULATION_TIME, MODELS, NOMAD, NOMAD_STATIC_FRICTION_LENGTH,
+    SPRING_PISTON, STALL, TIMEOUT,
+    _make_events, choose_method, default_params, initial_state, make_jacobian, make_rhs,
+    nomad_derived, spring_piston_derived,
+)
+
+METRICS = ('muzzle_velocity', 'peak_pressure')
+
+# Parameters that only set the output resolution
+EXCLUDED_PARAMS = ('n_points',)
+
+# Relative parameter step for the differenced derivatives
+PARAM_STEP = 1e-7
+
+
+def _scale(value):
+    """Scale of a parameter: its magnitude, or 1 for a parameter that is zero."""
+    return abs(float(value)) or 1.0
+
+
+def _pressure(model, params, x):
+    if model == SPRING_PISTON:
+        return spring_piston_derived(params, x)[0]
+    return nomad_derived(params, x)[1]
+
+
+class SensitivityResult:
+    """Derivatives of the muzzle velocity and peak pressure from one solve.
+
+    ``values`` holds the two ``METRICS`` (m/s and Pa) and ``gradients[metric]``
+    maps each parameter key to the derivative of that metric in SI units.
+    ``elasticities[metric]`` are the same derivatives made dimensionless,
+    ``param / metric * derivative``: the percent change in the metric per
+    percent change in the parameter. ``ranked`` sorts by these, since raw
+    derivatives in different units cannot be compared. A dart that does not
+    leave the barrel has zero muzzle velocity and zero velocity gradients.
+    """
+
+    def __init__(self, model, params, status, values, gradients, nfev):
+        self.model = model
+        self.params = params
+        self.status = status
+        self.values = values
+        self.gradients = gradients
+        self.nfev = nfev
+        self.elasticities = {
+            metric: {key: (params[key] / values[metric] * derivative if values[metric] else 0.0)
+                     for key, derivative in gradients[metric].items()}
+            for metric in METRICS
+        }
+
+    def ranked(self, metric='muzzle_velocity'):
+        """``(key, elasticity)`` pairs, largest magnitude first."""
+        return sorted(self.elasticities[metric].items(), key=lambda item: abs(item[1]), reverse=True)
+
+
+def sensitivity_analysis(model, params=None, method='auto', rtol=1e-6, atol=1e-9):
+    """Solve ``model`` with its forward sensitivities; returns a ``SensitivityResult``.
+
+    ``params`` overrides the model defaults; every parameter except
+    ``EXCLUDED_PARAMS`` gets a gradient. ``method`` is one of
+    ``engine.SOLVER_METHODS``. The tolerances apply to the state and the
+    scaled sensitivities alike, and are tighter than ``engine.solve``'s
+    because derivatives lose accuracy before values do.
+    """
+    from scipy.integrate import solve_ivp  # loaded on first use, as in engine.solve
+
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model!r}")
+    full_params = default_params(model)
+    if params is not None:
+        full_params.update(params)
+    keys = [key for key in full_params if key not in EXCLUDED_PARAMS]
+    scales = np.array([_scale(full_params[key]) for key in keys])
+    shifted = [dict(full_params, **{key: full_params[key] + PARAM_STEP * scale})
+               for key, scale in zip(keys, scales)]
+
+    rhs = make_rhs(model, full_params)
+    shifted_rhs = [make_rhs(model, p) for p in shifted]
+    jacobian = make_jacobian(model, full_params)
+    x0 = initial_state(model, full_params)
+    n, m = x0.size, len(keys)
+    s0 = np.column_stack([(initial_state(model, p) - x0) / PARAM_STEP for p in shifted])
+
+    def system(t, z):
+        x = z[:n]
+        f = np.asarray(rhs(t, x))
+        f_p = (np.column_stack([g(t, x) for g in shifted_rhs]) - f[:, None]) / PARAM_STEP
+        ds = jacobian(t, x) @ z[n:].reshape(n, m) + f_p
+        return np.concatenate((f, ds.ravel()))
+
+    method = choose_method(model, full_params, method)
+    options = {}
+    if method in IMPLICIT_METHODS:
+        # The sensitivity rows' dependence on the state is left out; Newton
+        # iterations converge with this approximate Jacobian
+        def augmented_jacobian(t, z):
+            jac = jacobian(t, z[:n])
+            full = np.zeros((n * (m + 1), n * (m + 1)))
+            full[:n, :n] = jac
+            full[n:, n:] = np.kron(jac, np.eye(m))
+            return full
+        options['jac'] = augmented_jacobian
+
+    # The Nomad friction force drops when the dart passes the static
+    # friction length. The right-hand side jumps there, and so do the
+    # sensitivities, so integration stops at the switch to apply the jump.
+    events = _make_events(full_params)
+    if model == NOMAD:
+        def friction_switch(t, z):
+            return z[0] - NOMAD_STATIC_FRICTION_LENGTH
+        friction_switch.terminal = True
+        friction_switch.direction = 1
+        events.append(friction_switch)
+
+    segments = []
+    t_start, z0 = 0.0, np.concatenate((x0, s0.ravel()))
+    while True:
+        sol = solve_ivp(system, (t_start, MAX_SIMULATION_TIME), z0, method=method, events=events,
+                        dense_output=True, rtol=rtol, atol=atol, **options)
+        if not sol.success:
+            raise Exception(f"ODE solver failed: {sol.message}")
+        segments.append(sol)
+        if len(events) < 3 or not sol.t_events[2].size:
+            break
+        t_start, z0 = sol.t_events[2][0], sol.y_events[2][0].copy()
+        events = events[:2]
+        z0[n:] = _friction_jump(rhs, t_start, z0[:n], z0[n:].reshape(n, m)).ravel()
+        # Restart on the far side, where the kernel applies the sliding friction
+        z0[0] = np.nextafter(NOMAD_STATIC_FRICTION_LENGTH, np.inf)
+
+    if sol.t_events[0].size:
+        status = EXIT
+    elif sol.t_events[1].size:
+        status = STALL
+    else:
+        status = TIMEOUT
+
+    gradients = {metric: dict.fromkeys(keys, 0.0) for metric in METRICS}
+    values = {'muzzle_velocity': 0.0}
+    if status == EXIT:
+        z_exit = sol.y_events[0][0]
+        x_exit, s_exit = z_exit[:n], z_exit[n:].reshape(n, m)
+        f_exit = np.asarray(rhs(sol.t_events[0][0], x_exit))
+        # The exit event is dart_pos = barrel_length, so its time moves with
+        # the dart position and with barrel_length itself
+        event_p = np.array([scale if key == 'barrel_length' else 0.0
+                            for key, scale in zip(keys, scales)])
+        dt_exit = (event_p - s_exit[0]) / f_exit[0]
+        values['muzzle_velocity'] = float(x_exit[1])
+        velocity = (s_exit[1] + f_exit[1] * dt_exit) / scales
+        gradients['muzzle_velocity'] = dict(zip(keys, velocity.tolist()))
+
+    # At an interior peak dP/dt = 0, so moving the peak time adds nothing
+    t_grid = np.linspace(0.0, sol.t[-1], int(full_params['n_points']))
+    z = np.hstack([seg.sol(np.union1d(t_grid[(t_grid >= seg.t[0]) & (t_grid <= seg.t[-1])], seg.t))
+                   for seg in segments])
+    peak = int(np.argmax(_pressure(model, full_params, z[:n])))
+    x_peak, s_peak = z[:n, peak], z[n:, peak].reshape(n, m)
+    p_peak = float(_pressure(model, full_params, x_peak))
+    dp_dx = np.empty(n)
+    for i in range(n):
+        step = PARAM_STEP * max(abs(x_peak[i]), 1.0)
+        shifted_x = x_peak.copy()
+        shifted_x[i] += step
+        dp_dx[i] = (_pressure(model, full_params, shifted_x) - p_peak) / step
+    dp_dp = np.array([(_pressure(model, p, x_peak) - p_peak) / PARAM_STEP for p in shifted])
+    values['peak_pressure'] = p_peak
+    gradients['peak_pressure'] = dict(zip(keys, ((dp_dx @ s_peak + dp_dp) / scales).tolist()))
+
+    return SensitivityResult(model, full_params, status, values, gradients,
+                             sum(seg.nfev for seg in segments))
+
+
+def _friction_jump(rhs, t, x, s):
+    """Sensitivities just after the dart passes the static friction length.
+
+    A parameter change moves the crossing time by ``-s[0] / v``. Over that
+    shift the trajectory follows the other side of the jump, so ``s`` changes
+    by the jump times ``s[0] / v``.
+    """
+    before = x.copy()
+    before[0] = NOMAD_STATIC_FRICTION_LENGTH
+    after = x.copy()
+    after[0] = np.nextafter(NOMAD_STATIC_FRICTION_LENGTH, np.inf)
+    jump = np.asarray(rhs(t, after)) - np.asarray(rhs(t, before))
+    return s + np.outer(jump, s[0] / x[1])
+
+
+def format_table(result, labels=None, derivatives=False):
+    """Plain-text table of a ``SensitivityResult``, ranked by muzzle velocity.
+
+    Columns are elasticities (% change per 1% change of the parameter);
+    ``derivatives`` adds the raw SI derivatives. ``labels`` optionally maps
+    keys to display names.
+    """
+    labels = labels or {}
+    header = f"  {'Parameter':<16s}{'Velocity':>9s}{'Pressure':>9s}"
+    if derivatives:
+        header += f"{'dv/dp':>12s}{'dP/dp':>12s}"
+    lines = ["% change per 1% change:", header]
+    for key, velocity in result.ranked('muzzle_velocity'):
+        line = (f"  {labels.get(key, key):<16.16s}{velocity:+9.3f}"
+                f"{result.elasticities['peak_pressure'][key]:+9.3f}")
+        if derivatives:
+            line += (f"{result.gradients['muzzle_velocity'][key]:12.4g}"
+                     f"{result.gradients['peak_pressure'][key]:12.4g}")
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _parse_value(text):
+    """Parse ``key=value`` into a key and a float."""
+    key, sep, value = text.partition('=')
+    try:
+        if not sep:
+            raise ValueError
+        return key, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got {text!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sensitivities of muzzle velocity and peak pressure")
+    parser.add_argument('model', choices=MODELS)
+    parser.add_argument('params', nargs='*', type=_parse_value, help="key=value overrides (SI units)")
+    args = parser.parse_args(argv)
+
+    result = sensitivity_analysis(args.model, dict(args.params))
+    print(f"Muzzle velocity: {result.values['muzzle_velocity']:.3f} m/s")
+    print(f"Peak pressure: {result.values['peak_pressure']:.0f} Pa")
+    print()
+    print(format_table(result, derivatives=True))
+
+
+if __name__ == "__main__":
+    main()
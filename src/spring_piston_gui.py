@@ -1,45 +1,98 @@
+import time
+
+# Startup milestones are timed from here, before the heavy imports below
+_START_TIME = time.perf_counter()
+
+import argparse
+import json
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-from matplotlib.ticker import MaxNLocator, ScalarFormatter
-from scipy.integrate import solve_ivp
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
+import multiprocessing
 import pickle
+import queue
+from collections import deque
 from pathlib import Path
 
-MM_PER_METER = 1000.0
-GRAMS_PER_KG = 1000.0
-FPS_PER_MPS = 3.280839895013123
-BAR_PER_PASCAL = 1e-5
-ML_PER_M3 = 1_000_000.0
-MS_PER_S = 1000.0
+from cache import ResultCache, default_cache_dir
+from design_map import DesignMap
+from engine import EXIT, SOLVER_METHODS, SPRING_PISTON, STALL, TIMEOUT, default_params, simulate
+from history import RunHistory
+from inverse import solve_for_velocity
+from plots import (
+    BAR_PER_PASCAL, FPS_PER_MPS, GRAMS_PER_KG, ML_PER_M3, MM_PER_METER, MS_PER_S, HoverTooltips,
+    TrajectoryPlots,
+)
+from profiling import RunProfile, StartupProfile, write_json
+from results_db import ResultsDatabase
+from scheduler import POLL_INTERVAL_MS, JobScheduler
+from sensitivity import format_table, sensitivity_analysis
+from tolerance import DISTRIBUTIONS, format_report, tolerance_analysis
+from trajectories import write_trajectories
+import workers
+
+# Parameters added after the first saved parameter files
+OPTIONAL_PARAM_KEYS = ('barrel_length',)
+
+STATUS_DESCRIPTIONS = {
+    EXIT: "Dart left the barrel",
+    STALL: "Dart stalled in the barrel",
+    TIMEOUT: "Dart did not exit",
+}
+
+# Parameters offered in the tolerance analysis window, with their labels
+TOLERANCE_PARAMS = {
+    'mass_d': 'Dart Mass (g)',
+    'mass_p': 'Plunger Mass (g)',
+    'D_b': 'Barrel Diameter (mm)',
+    'D_p': 'Plunger Diameter (mm)',
+    'xso': 'Spring Precompression (mm)',
+    'L_0': 'Plunger Draw Length (mm)',
+    'k': 'Spring Constant (N/m)',
+}
+
+# Live slider mode: each drag shows a quick low-resolution preview, and the
+# full-accuracy run follows once the slider has been still for LIVE_SETTLE_MS
+LIVE_PREVIEW_POINTS = 150
+LIVE_PREVIEW_RTOL = 1e-2
+LIVE_PREVIEW_ATOL = 1e-4
+LIVE_SETTLE_MS = 250
+
+# Rows listed at once in the results database window
+DATABASE_QUERY_LIMIT = 500
+
+# Run history for overlays: at most this many runs, in at most this much memory
+RUN_HISTORY_MAX_RUNS = 50
+RUN_HISTORY_MAX_BYTES = 8 * 1024 * 1024
+
+# Run profiles kept for export
+PROFILE_HISTORY = 1000
+
+# Metrics offered in the design map window: label -> (metric, display scale)
+DESIGN_MAP_METRICS = {
+    'Muzzle Velocity (fps)': ('muzzle_velocity', FPS_PER_MPS),
+    'Peak Pressure (bar)': ('peak_pressure', BAR_PER_PASCAL),
+}
+
+# Parameters the target-velocity solver can adjust, by display label
+TARGET_PARAMS = {
+    'Spring Constant': 'k',
+    'Draw Length': 'L_0',
+}
 
 class DartPlungerSimulatorGUI:
-    def __init__(self, root):
+    def __init__(self, root, startup=None, startup_report=None):
         self.root = root
+        self.startup = startup or StartupProfile(SPRING_PISTON, time.perf_counter())
+        self.startup_report = startup_report
         self.root.title("Spring Plunger Simulator")
         self._configure_window()
         
         # Default parameters
-        self.params = {
-            'p_0': 101325,          # Initial pressure inside plunger tube (Pa)
-            'p_2': 101325,          # Ambient pressure (Pa)
-            'D_b': 0.0127,          # Diameter of barrel (m)
-            'D_p': 0.035052,        # Diameter of plunger (m)
-            'gamma': 1.4,           # Adiabatic index cp/cv for air
-            'mass_d': 0.0012,       # Mass of dart (kg)
-            'mass_p': 0.06,         # Mass of plunger (kg)
-            'fric1': 0.4,           # Static friction force (N)
-            'fric2': 0.2,           # Dynamic friction term (N)
-            'xso': 0.0254,          # Spring compression before priming (m)
-            'L_0': 0.1016,          # Plunger draw length (m)
-            'k': 523 * (11/5),      # Spring constant (N/m)
-            'end_time': 0.02,       # Simulation end time (s)
-            'n_points': 1500        # Number of evaluation points
-        }
+        self.params = default_params(SPRING_PISTON)
         self.display_converters = {
             'p_0': (lambda v: v * BAR_PER_PASCAL, lambda v: v / BAR_PER_PASCAL),
             'p_2': (lambda v: v * BAR_PER_PASCAL, lambda v: v / BAR_PER_PASCAL),
@@ -49,19 +102,44 @@ class DartPlungerSimulatorGUI:
             'mass_p': (lambda v: v * GRAMS_PER_KG, lambda v: v / GRAMS_PER_KG),
             'xso': (lambda v: v * MM_PER_METER, lambda v: v / MM_PER_METER),
             'L_0': (lambda v: v * MM_PER_METER, lambda v: v / MM_PER_METER),
-            'end_time': (lambda v: v * MS_PER_S, lambda v: v / MS_PER_S),
+            'barrel_length': (lambda v: v * MM_PER_METER, lambda v: v / MM_PER_METER),
         }
         self.current_param_file = None
-        self.hover_lines = []
-        self.hover_annotations = {}
-        self._hover_threshold_pixels = 25
-        self._hover_threshold_pixels_sq = self._hover_threshold_pixels ** 2
-        self._hover_connection = None
-        self._draw_connection = None
-        self._hover_cache = {}
+        self.last_result = None
+        self.last_sensitivity = None
+        self.run_history = RunHistory(max_runs=RUN_HISTORY_MAX_RUNS, max_bytes=RUN_HISTORY_MAX_BYTES)
+        self._history_listed = []
+        self._history_last_result = None
+        self.overlay_ids = []
+        self.last_profile = None
+        self.profiles = deque(maxlen=PROFILE_HISTORY)
+        self._target_evaluations = {}
+        self._target_evaluations_key = None
+        self.result_cache = ResultCache(directory=default_cache_dir())
+        self.param_scales = {}
+        self._syncing_scales = False
+        # Runs, slider previews, target solves and sensitivities share one
+        # scheduler, so a new request supersedes whichever of them is waiting
+        self.scheduler = JobScheduler(root)
+        self._refine_after_id = None
         
         self.setup_gui()
-        self.run_simulation()  # Initial simulation
+        # The first run is solved in the background once the main loop is
+        # up, so the window appears without waiting for it (or for scipy)
+        self.root.bind('<Map>', self._on_map, add='+')
+        self.root.after_idle(self.run_simulation_threaded)
+
+    def _on_map(self, event):
+        if event.widget is self.root and self.startup.mark('first_window'):
+            self._write_startup_report()
+
+    def _write_startup_report(self):
+        """With --startup-report, save the startup timings and quit once all are in"""
+        if self.startup_report is None or not self.startup.complete:
+            return
+        with open(self.startup_report, 'w') as outfile:
+            json.dump(self.startup.to_dict(), outfile, indent=2)
+        self.root.after(0, self.root.destroy)
 
     def _configure_window(self):
         """Try to maximize the window cross-platform; fall back to full-screen geometry."""
@@ -128,11 +206,13 @@ class DartPlungerSimulatorGUI:
             'xso': ('Spring Precompression (mm)', 10, 50),
             'L_0': ('Plunger Draw Length (mm)', 50, 200),
             'k': ('Spring Constant (N/m)', 100, 2000),
-            'end_time': ('End Time (ms)', 5, 100),
+            'barrel_length': ('Barrel Length (mm)', 100, 1000),
             'n_points': ('Number of Points', 500, 3000)
         }
         
         self.param_vars = {}
+        self.param_labels = {key: label.split(' (')[0] for key, (label, _, _) in param_info.items()}
+        self.param_ranges = {key: (min_val, max_val) for key, (_, min_val, max_val) in param_info.items()}
         
         for key, (label, min_val, max_val) in param_info.items():
             param_frame = ttk.Frame(params_container)
@@ -149,6 +229,41 @@ class DartPlungerSimulatorGUI:
             entry = ttk.Entry(param_frame, textvariable=var, width=12, font=('Arial', 10))
             entry.pack(side=tk.LEFT, padx=5)
             entry.bind('<Return>', lambda e: self.run_simulation_threaded())
+
+            # Slider for live updates (not for the output resolution)
+            if key != 'n_points':
+                scale = ttk.Scale(param_frame, from_=min_val, to=max_val, orient=tk.HORIZONTAL)
+                scale.set(display_value)
+                scale.configure(command=lambda value, key=key: self._on_slider(key, value))
+                scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
+                self.param_scales[key] = scale
+        
+        # Solver selection ('auto' switches to a stiff solver when needed)
+        solver_frame = ttk.Frame(params_container)
+        solver_frame.pack(fill=tk.X, pady=3)
+        ttk.Label(solver_frame, text="Solver", width=22).pack(side=tk.LEFT)
+        self.solver_var = tk.StringVar(value='auto')
+        solver_box = ttk.Combobox(solver_frame, textvariable=self.solver_var, values=SOLVER_METHODS,
+                                  state='readonly', width=10)
+        solver_box.pack(side=tk.LEFT, padx=5)
+        
+        # Inverse design: adjust one parameter to hit a muzzle velocity
+        target_frame = ttk.Frame(params_container)
+        target_frame.pack(fill=tk.X, pady=3)
+        ttk.Label(target_frame, text="Target Velocity (fps)", width=22).pack(side=tk.LEFT)
+        self.target_velocity_var = tk.DoubleVar(value=150.0)
+        target_entry = ttk.Entry(target_frame, textvariable=self.target_velocity_var, width=12,
+                                 font=('Arial', 10))
+        target_entry.pack(side=tk.LEFT, padx=5)
+        target_entry.bind('<Return>', lambda e: self.solve_for_target_threaded())
+
+        target_param_frame = ttk.Frame(params_container)
+        target_param_frame.pack(fill=tk.X, pady=3)
+        ttk.Label(target_param_frame, text="Adjust", width=22).pack(side=tk.LEFT)
+        self.target_param_var = tk.StringVar(value=next(iter(TARGET_PARAMS)))
+        target_param_box = ttk.Combobox(target_param_frame, textvariable=self.target_param_var,
+                                        values=list(TARGET_PARAMS), state='readonly', width=16)
+        target_param_box.pack(side=tk.LEFT, padx=5)
         
         # Action buttons
         button_frame = ttk.Frame(parent)
@@ -164,9 +279,53 @@ class DartPlungerSimulatorGUI:
                                command=self.run_simulation_threaded)
         run_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(5, 0))
         
+        target_button = ttk.Button(parent, text="Solve for Target Velocity",
+                                   command=self.solve_for_target_threaded)
+        target_button.pack(fill=tk.X, pady=(0, 10))
+        
+        tolerance_button = ttk.Button(parent, text="Tolerance Analysis...",
+                                      command=self.open_tolerance_window)
+        tolerance_button.pack(fill=tk.X, pady=(0, 10))
+        
+        sensitivity_button = ttk.Button(parent, text="Sensitivity Analysis",
+                                        command=self.run_sensitivity_threaded)
+        sensitivity_button.pack(fill=tk.X, pady=(0, 10))
+        
+        database_button = ttk.Button(parent, text="Results Database...",
+                                     command=self.open_database_window)
+        database_button.pack(fill=tk.X, pady=(0, 10))
+        
+        design_map_button = ttk.Button(parent, text="Design Map...",
+                                       command=self.open_design_map_window)
+        design_map_button.pack(fill=tk.X, pady=(0, 10))
+        
+        export_frame = ttk.Frame(parent)
+        export_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        export_trajectory_button = ttk.Button(export_frame, text="Export Trajectory...",
+                                              command=self.export_trajectory)
+        export_trajectory_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        
+        export_timings_button = ttk.Button(export_frame, text="Export Timings...",
+                                           command=self.export_timings)
+        export_timings_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(5, 0))
+        
         self.file_label = ttk.Label(parent, text="No parameter file selected")
         self.file_label.pack(fill=tk.X, pady=(0, 10))
         
+        # Earlier runs to overlay on the plots
+        ttk.Label(parent, text="Run History:", font=('Arial', 12, 'bold')).pack(pady=(10, 5))
+        self.history_list = tk.Listbox(parent, selectmode=tk.EXTENDED, height=6, font=('Courier', 9))
+        self.history_list.pack(fill=tk.X)
+        history_buttons = ttk.Frame(parent)
+        history_buttons.pack(fill=tk.X, pady=5)
+        overlay_button = ttk.Button(history_buttons, text="Overlay Selected",
+                                    command=self.overlay_selected_runs)
+        overlay_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        clear_overlay_button = ttk.Button(history_buttons, text="Clear Overlay",
+                                          command=self.clear_overlay)
+        clear_overlay_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(5, 0))
+        
         # Results display
         results_label = ttk.Label(parent, text="Results Summary:", font=('Arial', 12, 'bold'))
         results_label.pack(pady=(20, 5))
@@ -187,21 +346,9 @@ class DartPlungerSimulatorGUI:
         # Create very large matplotlib figure for maximum readability
         self.fig = Figure(figsize=(18, 12), dpi=100)
         
-        # Create 3x3 subplot layout with generous spacing
-        self.axes = []
-        for i in range(9):
-            ax = self.fig.add_subplot(3, 3, i+1)
-            self.axes.append(ax)
-        
-        # Adjust subplot parameters for maximum readability
-        self.fig.subplots_adjust(
-            left=0.08,      # Left margin
-            bottom=0.07,    # Bottom margin  
-            right=0.97,     # Right margin
-            top=0.93,       # Top margin
-            wspace=0.35,    # Width spacing between subplots
-            hspace=0.45     # Height spacing between subplots
-        )
+        # 3x3 plots, built once and updated in place for each run
+        self.plots = TrajectoryPlots(self.fig)
+        self.axes = self.plots.axes
         
         # Embed in tkinter with scrollbars if needed
         canvas_frame = ttk.Frame(parent)
@@ -209,8 +356,8 @@ class DartPlungerSimulatorGUI:
         
         self.canvas = FigureCanvasTkAgg(self.fig, canvas_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        self._hover_connection = self.canvas.mpl_connect("motion_notify_event", self._on_plot_hover)
-        self._draw_connection = self.canvas.mpl_connect("draw_event", self._on_canvas_draw)
+        self.hover = HoverTooltips(self.canvas, self.plots.lines, self.plots.annotations)
+        self.hover.connect()
         
         # Add navigation toolbar (with error handling)
         toolbar_frame = tk.Frame(canvas_frame)
@@ -223,291 +370,89 @@ class DartPlungerSimulatorGUI:
         except Exception as e:
             print(f"Navigation toolbar not available: {e}")
 
-    def _on_plot_hover(self, event):
-        """Handle mouse motion events to show tooltips with exact values."""
-        if not self.hover_annotations or not self.hover_lines:
-            return
+    def _read_params(self):
+        """Parse the entries into ``self.params``; returns a profile holding the parse time"""
+        profile = RunProfile(SPRING_PISTON)
+        with profile.phase('parse'):
+            self._update_params_from_vars()
+        return profile
 
-        needs_redraw = self._hide_all_annotations(except_axis=event.inaxes)
+    def _fetch(self, params, method):
+        """Job that solves ``params``, or reuses an earlier run of the same configuration"""
+        return lambda: self.result_cache.fetch(SPRING_PISTON, params, method=method)
 
-        ax = event.inaxes
-        if ax not in self.hover_annotations or event.xdata is None or event.ydata is None:
-            if needs_redraw:
-                self.canvas.draw_idle()
-            return
+    def _finish_run(self, fetched, profile, final=True):
+        """Show a ``(result, cache_hit)`` pair from ``_fetch``; final runs enter the history"""
+        result, cache_hit = fetched
+        profile.record_result(result, cache_hit)
+        if final:
+            self._record_run(result)
+        self.display_result(result, profile)
 
-        annotation = self.hover_annotations[ax]
-        closest_point = None
-        closest_distance_sq = np.inf
-        mouse_point = np.array([event.x, event.y])
-
-        for line in self.hover_lines:
-            if line.axes is not ax:
-                continue
-
-            cache = self._hover_cache.get(line)
-            if cache is None:
-                cache = self._build_line_cache(line)
-                if cache is not None:
-                    self._hover_cache[line] = cache
-
-            if cache is None:
-                continue
-
-            screen_points, xdata, ydata = cache
-            diff = screen_points - mouse_point
-            distances_sq = np.sum(diff * diff, axis=1)
-            if distances_sq.size == 0:
-                continue
-
-            idx = np.argmin(distances_sq)
-            distance_sq = distances_sq[idx]
-            if distance_sq < closest_distance_sq:
-                closest_distance_sq = distance_sq
-                closest_point = (xdata[idx], ydata[idx])
-
-        if closest_point is None or closest_distance_sq > self._hover_threshold_pixels_sq:
-            if annotation.get_visible():
-                annotation.set_visible(False)
-                needs_redraw = True
-            if needs_redraw:
-                self.canvas.draw_idle()
-            return
+    def _simulation_failed(self, error):
+        messagebox.showerror("Error", f"Simulation failed: {str(error)}")
+        self.status_label.config(text="Simulation failed", foreground="red")
 
-        x_val, y_val = closest_point
-        annotation.xy = (x_val, y_val)
-        ax_bbox = ax.get_window_extent()
-        point_disp = ax.transData.transform((x_val, y_val))
-
-        offset_x = 15
-        offset_y = 15
-        horiz_align = 'left'
-        vert_align = 'bottom'
-
-        if point_disp[0] > ax_bbox.x0 + ax_bbox.width * 0.7:
-            offset_x = -15
-            horiz_align = 'right'
-
-        if point_disp[1] > ax_bbox.y0 + ax_bbox.height * 0.7:
-            offset_y = -15
-            vert_align = 'top'
-
-        annotation.xytext = (offset_x, offset_y)
-        annotation.set_ha(horiz_align)
-        annotation.set_va(vert_align)
-        annotation.set_text(
-            f"{ax.get_xlabel()}: {self._format_tooltip_value(x_val)}\n"
-            f"{ax.get_ylabel()}: {self._format_tooltip_value(y_val)}"
-        )
-        if not annotation.get_visible():
-            annotation.set_visible(True)
-        needs_redraw = True
-
-        if needs_redraw:
-            self.canvas.draw_idle()
-
-    def _on_canvas_draw(self, event):
-        """Recalculate cached display coordinates when the canvas redraws."""
-        self._hover_cache = {}
-        for line in self.hover_lines:
-            cache = self._build_line_cache(line)
-            if cache is not None:
-                self._hover_cache[line] = cache
-
-    def _build_line_cache(self, line):
-        """Build or refresh the cached screen-space data for a line."""
-        if line.axes is None:
-            return None
-        xdata = np.asarray(line.get_xdata(orig=False))
-        ydata = np.asarray(line.get_ydata(orig=False))
-        if xdata.size == 0 or ydata.size == 0:
-            return None
-        data_points = np.column_stack((xdata, ydata))
-        screen_points = line.get_transform().transform(data_points)
-        return screen_points, xdata, ydata
-
-    def _hide_all_annotations(self, except_axis=None):
-        """Hide all tooltip annotations except the one tied to except_axis."""
-        changed = False
-        for ax, annotation in self.hover_annotations.items():
-            if ax is except_axis:
-                continue
-            if annotation.get_visible():
-                annotation.set_visible(False)
-                changed = True
-        return changed
-
-    @staticmethod
-    def _format_tooltip_value(value):
-        """Format numeric values for display inside the tooltip."""
-        if not np.isfinite(value):
-            return "NaN"
-
-        abs_val = abs(value)
-        if abs_val >= 1e4 or (abs_val > 0 and abs_val < 1e-3):
-            return f"{value:.3e}"
-        if abs_val < 1:
-            return f"{value:.4f}"
-        if abs_val < 100:
-            return f"{value:.3f}"
-        if abs_val < 1000:
-            return f"{value:.2f}"
-        return f"{value:.1f}"
-        
-    def system(self, t, x):
-        """Define the system of first-order ODEs"""
-        d1, d2, p1, p2 = x  # dart and plunger variables
-        
-        # Calculate areas
-        area_b = np.pi * (self.params['D_b']**2) / 4
-        area_p = np.pi * (self.params['D_p']**2) / 4
-        v_0 = self.params['L_0'] * area_p
-        xsf = self.params['xso'] + self.params['L_0']
-        
-        # Internal pressure calculation (with safety checks)
-        volume_ratio = np.maximum(
-            ((self.params['L_0'] - p1) * area_p + d1 * area_b) / v_0,
-            1e-10  # Prevent division by zero
-        )
-        p_t = self.params['p_0'] / (volume_ratio ** self.params['gamma'])
-        
-        # Derivatives
-        dd1dt = d2  # dart velocity
-        dp1dt = p2  # plunger velocity
+    def display_result(self, result, profile):
+        """Plot a ``Result`` and show its summary, timing both into ``profile``"""
+        sol = result.solution
         
-        # Accelerations
-        dp2dt = ((self.params['p_2'] - p_t) * area_p + 
-                self.params['k'] * (xsf - p1)) / self.params['mass_p']
-        dd2dt = ((p_t - self.params['p_2']) * area_b) / self.params['mass_d']
-        
-        return [dd1dt, dd2dt, dp1dt, dp2dt]
-        
-    def run_simulation(self):
-        try:
-            # Update parameters
-            self._update_params_from_vars()
-            
-            # Solve ODE
-            x0 = [0, 0, 0, 0]
-            t_span = (0, self.params['end_time'])
-            t_eval = np.linspace(0, self.params['end_time'], int(self.params['n_points']))
-            
-            sol = solve_ivp(self.system, t_span, x0, t_eval=t_eval)
-            
-            if not sol.success:
-                raise Exception("ODE solver failed")
-            
-            # Extract results
-            d1_pos, d1_vel, p1_pos, p1_vel = sol.y
-            time_ms = sol.t * MS_PER_S
-            
-            # Calculate derived quantities
-            area_b = np.pi * (self.params['D_b']**2) / 4
-            area_p = np.pi * (self.params['D_p']**2) / 4
-            v_0 = self.params['L_0'] * area_p
-            xsf = self.params['xso'] + self.params['L_0']
-            
-            # Avoid division by zero or negative values
-            volume_ratio = np.maximum(
-                ((self.params['L_0'] - p1_pos) * area_p + d1_pos * area_b) / v_0,
-                1e-10
-            )
-            p_t_array = self.params['p_0'] / (volume_ratio ** self.params['gamma'])
-            v_t_array = (self.params['L_0'] - p1_pos) * area_p + area_b * d1_pos
-            spring_force = self.params['k'] * (xsf - p1_pos)
-
-            # Prepare data in display units
-            d1_pos_mm = d1_pos * MM_PER_METER
-            d1_vel_fps = d1_vel * FPS_PER_MPS
-            p1_pos_mm = p1_pos * MM_PER_METER
-            p1_vel_fps = p1_vel * FPS_PER_MPS
-            p_t_bar = p_t_array * BAR_PER_PASCAL
-            v_t_ml = v_t_array * ML_PER_M3
-            
-            # Clear and plot with large, readable formatting
-            self.hover_lines = []
-            self.hover_annotations = {}
-            self._hover_cache = {}
-            for ax in self.axes:
-                ax.clear()
-            
-            # Configure all axes for maximum readability
-            plot_configs = [
-                (time_ms, d1_pos_mm, 'Dart Position vs Time', 'Time (ms)', 'Position (mm)', 'blue', True),
-                (time_ms, d1_vel_fps, 'Dart Velocity vs Time', 'Time (ms)', 'Velocity (fps)', 'red', True),
-                (d1_pos_mm, d1_vel_fps, 'Dart Velocity vs Dart Position', 'Dart Position (mm)', 'Velocity (fps)', 'purple', False),
-                (time_ms, p1_pos_mm, 'Plunger Position vs Time', 'Time (ms)', 'Position (mm)', 'green', True),
-                (time_ms, p1_vel_fps, 'Plunger Velocity vs Time', 'Time (ms)', 'Velocity (fps)', 'magenta', True),
-                (d1_pos_mm, p1_pos_mm, 'Plunger Position vs Dart Position', 'Dart Position (mm)', 'Plunger Position (mm)', 'brown', False),
-                (time_ms, p_t_bar, 'System Pressure vs Time', 'Time (ms)', 'Pressure (bar)', 'cyan', True),
-                (time_ms, v_t_ml, 'System Volume vs Time', 'Time (ms)', 'Volume (mL)', 'orange', True),
-                (d1_pos_mm, p_t_bar, 'Pressure vs Dart Position', 'Dart Position (mm)', 'Pressure (bar)', 'teal', False),
-            ]
-            
-            for i, (x_data, y_data, title, xlabel, ylabel, color, use_time_xlim) in enumerate(plot_configs):
-                ax = self.axes[i]
-                line, = ax.plot(x_data, y_data, color=color, linewidth=3)
-                self.hover_lines.append(line)
-                ax.set_xlabel(xlabel, fontsize=12)
-                ax.set_ylabel(ylabel, fontsize=12)
-                ax.grid(True, alpha=0.3)
-                ax.tick_params(axis='both', labelsize=11)
-                ax.tick_params(axis='x', labelrotation=0)
-                if use_time_xlim:
-                    ax.set_xlim(left=0, right=self.params['end_time'] * MS_PER_S)
-                else:
-                    x_min = np.nanmin(x_data)
-                    x_max = np.nanmax(x_data)
-                    if np.isfinite(x_min) and np.isfinite(x_max):
-                        if x_min == x_max:
-                            span = abs(x_min) * 0.05 or 1.0
-                            ax.set_xlim(x_min - span, x_max + span)
-                        else:
-                            ax.set_xlim(x_min, x_max)
-                if np.nanmin(y_data) >= 0:
-                    ax.set_ylim(bottom=0)
-                ax.set_title(title, fontsize=14, fontweight='bold')
-
-                # Keep both axes in plain notation
-                x_formatter = ScalarFormatter(useMathText=False)
-                x_formatter.set_scientific(False)
-                x_formatter.set_useOffset(False)
-                ax.xaxis.set_major_formatter(x_formatter)
-
-                y_formatter = ScalarFormatter(useMathText=False)
-                y_formatter.set_scientific(False)
-                y_formatter.set_useOffset(False)
-                ax.yaxis.set_major_formatter(y_formatter)
-                ax.xaxis.set_major_locator(MaxNLocator(nbins=5))
-
-                annotation = ax.annotate(
-                    "",
-                    xy=(0, 0),
-                    xytext=(15, 15),
-                    textcoords="offset points",
-                    bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=1.0),
-                    arrowprops=dict(arrowstyle="->", color="black"),
-                    zorder=20
-                )
-                annotation.set_visible(False)
-                annotation.set_clip_on(False)
-                if annotation.arrow_patch is not None:
-                    annotation.arrow_patch.set_zorder(19)
-                    annotation.arrow_patch.set_clip_on(False)
-                self.hover_annotations[ax] = annotation
-            
+        # Extract results
+        d1_pos, d1_vel, p1_pos, p1_vel = sol.y
+        p_t_array, v_t_array = result.pressure, result.volume
+
+        # Swap the new data into the existing lines, then redraw
+        with profile.phase('plot'):
+            self.plots.update(result)
+        with profile.phase('draw'):
             self.canvas.draw()
-            
-            # Update results summary
-            self.update_results_summary(sol, d1_pos, d1_vel, p1_pos, p1_vel, p_t_array, v_t_array)
-            
-            self.status_label.config(text="Simulation completed successfully", 
-                                   foreground="green")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Simulation failed: {str(e)}")
-            self.status_label.config(text="Simulation failed", foreground="red")
+        if self.startup.mark('first_plot'):
+            # Started only now so the workers do not compete with the first solve
+            if workers.default_processes() > 1:
+                workers.start()
+            self._write_startup_report()
+        self.last_result = result
+        self.last_profile = profile
+        self.profiles.append(profile)
+        
+        # Update results summary
+        self.update_results_summary(sol, d1_pos, d1_vel, p1_pos, p1_vel, p_t_array, v_t_array)
     
+    def _record_run(self, result):
+        """Add a finished run to the history, dropping overlays of runs it pushes out"""
+        if result is self._history_last_result:
+            return
+        self._history_last_result = result
+        run_id = self.run_history.add(
+            result, f"{result.muzzle_velocity * FPS_PER_MPS:6.1f} fps ({time.strftime('%H:%M:%S')})")
+        self._history_listed.insert(0, run_id)
+        self.history_list.insert(0, f"#{run_id + 1:<3d} {self.run_history.label(run_id)}")
+        while len(self._history_listed) > len(self.run_history):
+            self._history_listed.pop()
+            self.history_list.delete(tk.END)
+
+        kept = [overlay_id for overlay_id in self.overlay_ids if overlay_id in self.run_history]
+        if kept != self.overlay_ids:
+            self.overlay_ids = kept
+            self._apply_overlays()
+
+    def _apply_overlays(self):
+        self.plots.set_overlays([(f"#{run_id + 1} {self.run_history.label(run_id).strip()}",
+                                  self.run_history.series(run_id))
+                                 for run_id in self.overlay_ids])
+
+    def overlay_selected_runs(self):
+        """Overlay the runs selected in the history list on all nine plots"""
+        self.overlay_ids = [self._history_listed[i] for i in self.history_list.curselection()]
+        self._apply_overlays()
+        self.canvas.draw()
+
+    def clear_overlay(self):
+        self.overlay_ids = []
+        self.history_list.selection_clear(0, tk.END)
+        self._apply_overlays()
+        self.canvas.draw()
+
     def update_results_summary(self, sol, d1_pos, d1_vel, p1_pos, p1_vel, p_t_array, v_t_array):
         """Update the results text widget"""
         final_dart_pos_mm = d1_pos[-1] * MM_PER_METER
@@ -523,16 +468,32 @@ class DartPlungerSimulatorGUI:
         final_volume_ml = v_t_array[-1] * ML_PER_M3
         max_volume_ml = np.max(v_t_array) * ML_PER_M3
 
+        exit_label = "Muzzle Velocity" if sol.status == EXIT else "Final Velocity"
+        profile_block = ""
+        if self.last_profile is not None:
+            profile_block = f"\nTIMINGS\n{'-'*20}\n{self.last_profile.format()}\n"
+            if len(self.profiles) == 1:
+                profile_block += f"Startup:\n{self.startup.format()}\n"
+        # Sensitivities are shown while the displayed run has the same parameters
+        sensitivity_block = ""
+        sensitivity = self.last_sensitivity
+        if (sensitivity is not None and self.last_result is not None
+                and sensitivity.params == self.last_result.params):
+            sensitivity_block = (f"\nSENSITIVITY\n{'-'*20}\n"
+                                 f"{format_table(sensitivity, self.param_labels)}\n")
+
         results = f"""SIMULATION RESULTS
 {'='*40}
-Time: {self.params['end_time'] * MS_PER_S:.3f} ms
+Outcome: {STATUS_DESCRIPTIONS[sol.status]}
+Time: {sol.t_exit * MS_PER_S:.3f} ms
 Points: {len(sol.t)}
+Solver: {sol.method} ({sol.nfev} evals, {sol.njev} Jacobians)
 Success: {sol.success}
-
+{profile_block}
 DART RESULTS
 {'-'*20}
 Final Position: {final_dart_pos_mm:.3f} mm
-Final Velocity: {final_dart_vel_fps:.3f} fps
+{exit_label}: {final_dart_vel_fps:.3f} fps
 Max Velocity: {max_dart_vel_fps:.3f} fps
 
 PLUNGER RESULTS  
@@ -547,18 +508,561 @@ Final Pressure: {final_pressure_bar:.3f} bar
 Min Pressure: {min_pressure_bar:.3f} bar
 Final Volume: {final_volume_ml:.3f} mL
 Max Volume: {max_volume_ml:.3f} mL
-"""
+{sensitivity_block}"""
         
         self.results_text.delete(1.0, tk.END)
         self.results_text.insert(1.0, results)
     
     def run_simulation_threaded(self):
-        """Run simulation in thread to prevent GUI freezing"""
+        """Solve the current parameters in the background, superseding any earlier request"""
+        self._cancel_live_runs()
+        self._sync_scales()
+        try:
+            profile = self._read_params()
+        except Exception as e:
+            self._simulation_failed(e)
+            return
         self.status_label.config(text="Running simulation...", foreground="orange")
-        thread = threading.Thread(target=self.run_simulation)
-        thread.daemon = True
-        thread.start()
+
+        def done(fetched):
+            self._finish_run(fetched, profile)
+            self.status_label.config(text="Simulation completed successfully", foreground="green")
+
+        self.scheduler.submit(self._fetch(dict(self.params), self.solver_var.get()), done,
+                              self._simulation_failed)
+    
+    def _sync_scales(self):
+        """Set every slider from its parameter entry without triggering live runs"""
+        self._syncing_scales = True
+        try:
+            for key, scale in self.param_scales.items():
+                try:
+                    scale.set(self.param_vars[key].get())
+                except tk.TclError:
+                    pass
+        finally:
+            self._syncing_scales = False
+
+    def _on_slider(self, key, value):
+        """Preview the new value right away and schedule the full run"""
+        if self._syncing_scales:
+            return
+        self.param_vars[key].set(float(f"{float(value):.4g}"))
+        try:
+            profile = self._read_params()
+        except tk.TclError:
+            return  # Another entry holds invalid text
+
+        preview_params = dict(self.params, n_points=min(LIVE_PREVIEW_POINTS, self.params['n_points']))
+        preview_options = {'method': self.solver_var.get(), 'rtol': LIVE_PREVIEW_RTOL,
+                           'atol': LIVE_PREVIEW_ATOL}
+        self._submit_live_run(preview_params, preview_options, False, profile)
+
+        if self._refine_after_id is not None:
+            self.root.after_cancel(self._refine_after_id)
+        self._refine_after_id = self.root.after(LIVE_SETTLE_MS, self._refine_live_run)
+
+    def _refine_live_run(self):
+        """Full-accuracy run once the slider has settled"""
+        self._refine_after_id = None
+        self._submit_live_run(dict(self.params), {'method': self.solver_var.get()}, True,
+                              RunProfile(SPRING_PISTON))
+
+    def _cancel_live_runs(self):
+        """Drop a pending refinement so it does not overwrite a newer result"""
+        if self._refine_after_id is not None:
+            self.root.after_cancel(self._refine_after_id)
+            self._refine_after_id = None
+
+    def _submit_live_run(self, params, options, final, profile):
+        """Queue a live run, replacing any request that has not started yet"""
+        def job():
+            if final:
+                return self.result_cache.fetch(SPRING_PISTON, params, **options)
+            # Previews are cheap and numerous, so they skip the cache
+            return simulate(SPRING_PISTON, params, **options), False
+
+        # Drawn even if the slider has moved on since, so the plots keep
+        # tracking a drag whose previews take longer than the motion events
+        def done(fetched):
+            self._finish_run(fetched, profile, final)
+            if final and not self.scheduler.busy:
+                self.status_label.config(text="Simulation completed successfully",
+                                         foreground="green")
+            else:
+                self.status_label.config(text="Preview (refining...)", foreground="orange")
+
+        def failed(error):
+            if final:
+                self.status_label.config(text="Simulation failed", foreground="red")
+
+        self.scheduler.submit(job, done, failed)
+
+    def solve_for_target_threaded(self):
+        """Adjust the selected parameter in the background until the dart hits the target velocity"""
+        self._cancel_live_runs()
+        try:
+            profile = self._read_params()
+            key = TARGET_PARAMS[self.target_param_var.get()]
+            target = self.target_velocity_var.get() / FPS_PER_MPS
+        except Exception as e:
+            self._target_failed(e)
+            return
+
+        # Earlier evaluations stay valid while the solver and every other
+        # parameter are unchanged
+        method = self.solver_var.get()
+        fixed = tuple(sorted((k, v) for k, v in self.params.items() if k != key))
+        if self._target_evaluations_key != (key, fixed, method):
+            self._target_evaluations = {}
+            self._target_evaluations_key = (key, fixed, method)
+        params = dict(self.params)
+        evaluations = self._target_evaluations
+        label = self.target_param_var.get()
+
+        def job():
+            result = solve_for_velocity(SPRING_PISTON, key, target, params=params,
+                                        evaluations=evaluations, method=method)
+            return result, self._fetch(dict(params, **{key: result.value}), method)()
+
+        def done(value):
+            result, fetched = value
+            self.params[key] = result.value
+            self.param_vars[key].set(self._param_to_display(key, result.value))
+            self._sync_scales()
+            self._finish_run(fetched, profile)
+            achieved = result.muzzle_velocity * FPS_PER_MPS
+            if result.converged:
+                status = f"{label} set for {achieved:.1f} fps"
+                color = "green"
+            else:
+                status = f"Closest found: {achieved:.1f} fps"
+                color = "orange"
+            self.status_label.config(text=f"{status} ({result.n_simulations} runs)", foreground=color)
+
+        self.status_label.config(text="Solving for target velocity...", foreground="orange")
+        self.scheduler.submit(job, done, self._target_failed)
+
+    def _target_failed(self, error):
+        messagebox.showerror("Error", f"Target solve failed: {str(error)}")
+        self.status_label.config(text="Target solve failed", foreground="red")
+
+    def run_sensitivity_threaded(self):
+        """Solve the current configuration with its sensitivities in the background and show them"""
+        self._cancel_live_runs()
+        try:
+            profile = self._read_params()
+        except Exception as e:
+            self._sensitivity_failed(e)
+            return
+        params = dict(self.params)
+        method = self.solver_var.get()
+
+        def job():
+            return (sensitivity_analysis(SPRING_PISTON, params, method=method),
+                    self._fetch(params, method)())
+
+        def done(value):
+            self.last_sensitivity, fetched = value
+            self._finish_run(fetched, profile)
+            self.status_label.config(text="Sensitivity analysis completed", foreground="green")
+
+        self.status_label.config(text="Computing sensitivities...", foreground="orange")
+        self.scheduler.submit(job, done, self._sensitivity_failed)
+
+    def _sensitivity_failed(self, error):
+        messagebox.showerror("Error", f"Sensitivity analysis failed: {str(error)}")
+        self.status_label.config(text="Sensitivity analysis failed", foreground="red")
     
+    def open_tolerance_window(self):
+        """Window for a Monte Carlo tolerance analysis of muzzle velocity"""
+        window = tk.Toplevel(self.root)
+        window.title("Tolerance Analysis")
+
+        controls = ttk.Frame(window)
+        controls.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+        ttk.Label(controls, text="Manufacturing Tolerances", font=('Arial', 12, 'bold')).grid(
+            row=0, column=0, columnspan=3, pady=(0, 10))
+        ttk.Label(controls, text="Parameter").grid(row=1, column=0, sticky=tk.W)
+        ttk.Label(controls, text="± Width").grid(row=1, column=1)
+        ttk.Label(controls, text="Distribution").grid(row=1, column=2)
+
+        tolerance_vars = {}
+        for row, (key, label) in enumerate(TOLERANCE_PARAMS.items(), start=2):
+            ttk.Label(controls, text=label, width=26).grid(row=row, column=0, sticky=tk.W, pady=2)
+            width_var = tk.DoubleVar(value=0.0)
+            ttk.Entry(controls, textvariable=width_var, width=10).grid(row=row, column=1, padx=5)
+            kind_var = tk.StringVar(value='normal')
+            ttk.Combobox(controls, textvariable=kind_var, values=DISTRIBUTIONS, state='readonly',
+                         width=8).grid(row=row, column=2)
+            tolerance_vars[key] = (width_var, kind_var)
+
+        row = len(TOLERANCE_PARAMS) + 2
+        ttk.Label(controls, text="Shots").grid(row=row, column=0, sticky=tk.W, pady=(10, 2))
+        samples_var = tk.IntVar(value=2048)
+        ttk.Entry(controls, textvariable=samples_var, width=10).grid(row=row, column=1, padx=5,
+                                                                     pady=(10, 2))
+        ttk.Label(controls, text="Normal widths are one standard deviation",
+                  foreground="gray").grid(row=row + 1, column=0, columnspan=3, sticky=tk.W)
+
+        report = scrolledtext.ScrolledText(controls, width=44, height=18, font=('Courier', 9))
+        report.grid(row=row + 3, column=0, columnspan=3, pady=(10, 0))
+        status = ttk.Label(controls, text="Enter tolerances and press Run", foreground="green")
+        status.grid(row=row + 4, column=0, columnspan=3, pady=5)
+
+        fig = Figure(figsize=(7, 5), dpi=100)
+        ax = fig.add_subplot(1, 1, 1)
+        canvas = FigureCanvasTkAgg(fig, window)
+        canvas.get_tk_widget().pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+
+        # The window's own scheduler, so a run here does not supersede the main view's
+        scheduler = JobScheduler(window)
+
+        def failed(error):
+            messagebox.showerror("Error", f"Tolerance analysis failed: {str(error)}")
+            status.config(text="Tolerance analysis failed", foreground="red")
+
+        def run():
+            try:
+                self._update_params_from_vars()
+                tolerances = {}
+                for key, (width_var, kind_var) in tolerance_vars.items():
+                    width = abs(width_var.get())
+                    if width > 0:
+                        # Display converters are pure scale factors, so they apply to widths
+                        tolerances[key] = (kind_var.get(), self._param_from_display(key, width))
+                n_samples = samples_var.get()
+            except Exception as e:
+                failed(e)
+                return
+            params = dict(self.params)
+            status.config(text="Running tolerance analysis...", foreground="orange")
+            # The batch engine evaluates thousands of shots in well under a
+            # second, far less than starting a process pool would take
+            scheduler.submit(lambda: tolerance_analysis(SPRING_PISTON, tolerances, params=params,
+                                                        n_samples=n_samples, processes=1),
+                             lambda result: self._show_tolerance_analysis(result, report, status,
+                                                                          ax, canvas),
+                             failed)
+
+        ttk.Button(controls, text="Run", command=run).grid(row=row + 2, column=0, columnspan=3,
+                                                           sticky=tk.EW, pady=(10, 0))
+
+    def open_design_map_window(self):
+        """Window mapping a metric over two parameters, painted as tiles finish"""
+        window = tk.Toplevel(self.root)
+        window.title("Design Map")
+
+        controls = ttk.Frame(window)
+        controls.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+        ttk.Label(controls, text="Design Map", font=('Arial', 12, 'bold')).grid(
+            row=0, column=0, columnspan=3, pady=(0, 10))
+
+        keys_by_label = {self.param_labels[key]: key for key in self.param_labels if key != 'n_points'}
+        axis_vars = []
+        for row, (axis, default) in enumerate((('X', 'k'), ('Y', 'L_0'))):
+            label_var = tk.StringVar(value=self.param_labels[default])
+            low_var = tk.DoubleVar(value=self.param_ranges[default][0])
+            high_var = tk.DoubleVar(value=self.param_ranges[default][1])
+            ttk.Label(controls, text=f"{axis} Parameter").grid(row=2 * row + 1, column=0, sticky=tk.W)
+            box = ttk.Combobox(controls, textvariable=label_var, values=list(keys_by_label),
+                               state='readonly', width=24)
+            box.grid(row=2 * row + 1, column=1, columnspan=2, pady=2)
+            ttk.Label(controls, text="From / To").grid(row=2 * row + 2, column=0, sticky=tk.W)
+            ttk.Entry(controls, textvariable=low_var, width=10).grid(row=2 * row + 2, column=1, pady=2)
+            ttk.Entry(controls, textvariable=high_var, width=10).grid(row=2 * row + 2, column=2, pady=2)
+
+            def reset_range(event, label_var=label_var, low_var=low_var, high_var=high_var):
+                low, high = self.param_ranges[keys_by_label[label_var.get()]]
+                low_var.set(low)
+                high_var.set(high)
+            box.bind('<<ComboboxSelected>>', reset_range)
+            axis_vars.append((label_var, low_var, high_var))
+
+        ttk.Label(controls, text="Metric").grid(row=5, column=0, sticky=tk.W, pady=(10, 2))
+        metric_var = tk.StringVar(value=next(iter(DESIGN_MAP_METRICS)))
+        ttk.Combobox(controls, textvariable=metric_var, values=list(DESIGN_MAP_METRICS),
+                     state='readonly', width=24).grid(row=5, column=1, columnspan=2, pady=(10, 2))
+        ttk.Label(controls, text="Click a cell to load it into the main view",
+                  foreground="gray").grid(row=7, column=0, columnspan=3, sticky=tk.W, pady=(10, 0))
+        status = ttk.Label(controls, text="Choose two parameters and press Run", foreground="green")
+        status.grid(row=8, column=0, columnspan=3, pady=5)
+
+        fig = Figure(figsize=(7, 6), dpi=100)
+        ax = fig.add_subplot(1, 1, 1)
+        canvas = FigureCanvasTkAgg(fig, window)
+        canvas.get_tk_widget().pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        # The running map, its image and colorbar, and a counter that retires
+        # superseded runs
+        state = {'design': None, 'image': None, 'colorbar': None, 'generation': 0}
+
+        def run():
+            try:
+                self._update_params_from_vars()
+                axes = []
+                for label_var, low_var, high_var in axis_vars:
+                    key = keys_by_label[label_var.get()]
+                    axes.append((key, (self._param_from_display(key, low_var.get()),
+                                       self._param_from_display(key, high_var.get()))))
+                metric, scale = DESIGN_MAP_METRICS[metric_var.get()]
+                design = DesignMap(SPRING_PISTON, *axes[0], *axes[1], metric=metric,
+                                   params=self.params)
+            except Exception as e:
+                messagebox.showerror("Error", f"Invalid design map: {str(e)}")
+                return
+            state['generation'] += 1
+            state['design'] = design
+            if state['colorbar'] is not None:
+                state['colorbar'].remove()
+                state['colorbar'] = None
+            ax.clear()
+            (x_key, x_range), (y_key, y_range) = axes
+            extent = [self._param_to_display(x_key, value) for value in x_range] + \
+                     [self._param_to_display(y_key, value) for value in y_range]
+            state['image'] = ax.imshow(np.full(design.values.shape, np.nan), origin='lower',
+                                       extent=extent, aspect='auto', cmap='viridis',
+                                       interpolation='nearest')
+            state['colorbar'] = fig.colorbar(state['image'], ax=ax, label=metric_var.get())
+            ax.set_xlabel(axis_vars[0][0].get(), fontsize=12)
+            ax.set_ylabel(axis_vars[1][0].get(), fontsize=12)
+            ax.set_title(metric_var.get().split(' (')[0], fontsize=14, fontweight='bold')
+            canvas.draw()
+            status.config(text="Mapping...", foreground="orange")
+            updates = queue.Queue()
+            thread = threading.Thread(target=self._run_design_map,
+                                      args=(design, scale, state, state['generation'], updates))
+            thread.daemon = True
+            thread.start()
+            window.after(POLL_INTERVAL_MS, self._show_design_map_progress, window, updates, state,
+                         state['generation'], canvas, status)
+
+        def load_cell(event):
+            design = state['design']
+            if design is None or event.inaxes is not ax or event.button != 1:
+                return
+            iy, ix = design.nearest(self._param_from_display(design.x_key, event.xdata),
+                                    self._param_from_display(design.y_key, event.ydata))
+            if self._apply_params(design.params_at(iy, ix)):
+                self.run_simulation_threaded()
+
+        def close():
+            state['generation'] += 1
+            window.destroy()
+
+        canvas.mpl_connect('button_press_event', load_cell)
+        window.protocol("WM_DELETE_WINDOW", close)
+        ttk.Button(controls, text="Run", command=run).grid(row=6, column=0, columnspan=3,
+                                                           sticky=tk.EW, pady=(10, 0))
+
+    def _run_design_map(self, design, scale, state, generation, updates):
+        """Evaluate a design map off the Tk thread, queueing the image after every finished tile"""
+        tiles = design.run()
+        try:
+            for _ in tiles:
+                if state['generation'] != generation:
+                    return
+                updates.put(('tile', design.filled() * scale, design.n_evaluated))
+        except Exception as e:
+            updates.put(('error', e, design.n_evaluated))
+            return
+        finally:
+            tiles.close()
+        updates.put(('done', None, design.n_evaluated))
+
+    def _show_design_map_progress(self, window, updates, state, generation, canvas, status):
+        """Repaint the design map with the newest queued tile; polls until the map is finished"""
+        if state['generation'] != generation:
+            return
+        values = finished = None
+        while True:
+            try:
+                kind, value, n_runs = updates.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'tile':
+                # Each image holds every tile before it, so only the newest is drawn
+                values = value
+            else:
+                finished = (kind, value)
+        if values is not None:
+            image = state['image']
+            image.set_data(values)
+            if np.isfinite(values).any():
+                image.set_clim(np.nanmin(values), np.nanmax(values))
+            canvas.draw_idle()
+            status.config(text=f"Mapping... {n_runs} runs", foreground="orange")
+        if finished is None:
+            window.after(POLL_INTERVAL_MS, self._show_design_map_progress, window, updates, state,
+                         generation, canvas, status)
+        elif finished[0] == 'error':
+            messagebox.showerror("Error", f"Design map failed: {str(finished[1])}")
+            status.config(text="Design map failed", foreground="red")
+        else:
+            status.config(text=f"Design map completed ({n_runs} runs)", foreground="green")
+
+    def open_database_window(self):
+        """Window to store runs in a results database and load stored configurations"""
+        file_path = filedialog.asksaveasfilename(
+            title="Open or Create Results Database",
+            defaultextension=".sqlite",
+            filetypes=[("SQLite databases", "*.sqlite *.db"), ("All files", "*.*")],
+            confirmoverwrite=False
+        )
+        if not file_path:
+            return
+        try:
+            database = ResultsDatabase(file_path)
+        except Exception as exc:
+            messagebox.showerror("Error", f"Failed to open database: {exc}")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Results Database - {Path(file_path).name}")
+
+        def close():
+            database.close()
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+
+        filters = ttk.Frame(window)
+        filters.pack(fill=tk.X, padx=10, pady=10)
+        filter_vars = {}
+        for column, label in enumerate(("Min Velocity (fps)", "Max Velocity (fps)",
+                                        "Max Peak Pressure (bar)")):
+            ttk.Label(filters, text=label).grid(row=0, column=column, sticky=tk.W, padx=5)
+            filter_vars[label] = tk.StringVar()
+            ttk.Entry(filters, textvariable=filter_vars[label], width=12).grid(row=1, column=column, padx=5)
+
+        columns = {
+            'muzzle_velocity': ('Muzzle Velocity (fps)', FPS_PER_MPS),
+            'max_dart_velocity': ('Max Velocity (fps)', FPS_PER_MPS),
+            'peak_pressure': ('Peak Pressure (bar)', BAR_PER_PASCAL),
+            'min_pressure': ('Min Pressure (bar)', BAR_PER_PASCAL),
+            'exit_time': ('Exit Time (ms)', MS_PER_S),
+        }
+        tree = ttk.Treeview(window, columns=list(columns), show='headings', height=20)
+        for key, (heading, _) in columns.items():
+            tree.heading(key, text=heading)
+            tree.column(key, width=140, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10)
+        status = ttk.Label(window, text="", foreground="green")
+        status.pack(pady=5)
+
+        def number(label, scale):
+            text = filter_vars[label].get().strip()
+            return float(text) / scale if text else None
+
+        def search():
+            try:
+                velocity = (number("Min Velocity (fps)", FPS_PER_MPS),
+                            number("Max Velocity (fps)", FPS_PER_MPS))
+                pressure = (None, number("Max Peak Pressure (bar)", BAR_PER_PASCAL))
+            except ValueError:
+                status.config(text="Filters must be numbers", foreground="red")
+                return
+            rows = database.query(model=SPRING_PISTON, limit=DATABASE_QUERY_LIMIT,
+                                  muzzle_velocity=velocity, peak_pressure=pressure)
+            tree.delete(*tree.get_children())
+            for row in rows:
+                values = ["" if row[key] is None else f"{row[key] * scale:.3f}"
+                          for key, (_, scale) in columns.items()]
+                tree.insert('', tk.END, iid=str(row['id']), values=values)
+            shown = f"Showing the first {len(rows)}" if len(rows) == DATABASE_QUERY_LIMIT else f"{len(rows)}"
+            status.config(text=f"{shown} matching runs of {len(database)} stored", foreground="green")
+
+        def store_current():
+            if self.last_result is None:
+                status.config(text="No simulation has been run yet", foreground="red")
+                return
+            database.add_result(self.last_result)
+            search()
+
+        def load_selected(event=None):
+            selection = tree.selection()
+            if not selection:
+                return
+            stored = database.get(int(selection[0]))['params']
+            defaults = default_params(SPRING_PISTON)
+            params = {key: stored.get(key, defaults[key]) for key in self.params}
+            params['n_points'] = int(params['n_points'])
+            if self._apply_params(params):
+                self.status_label.config(text=f"Loaded stored run {selection[0]}", foreground="green")
+                self.run_simulation_threaded()
+
+        buttons = ttk.Frame(window)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Search", command=search).pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        ttk.Button(buttons, text="Store Current Run", command=store_current).pack(
+            side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+        ttk.Button(buttons, text="Load Selected", command=load_selected).pack(
+            side=tk.LEFT, expand=True, fill=tk.X, padx=(5, 0))
+        tree.bind('<Double-1>', load_selected)
+        search()
+
+    def _show_tolerance_analysis(self, result, report, status, ax, canvas):
+        """Show the histogram and report of a finished tolerance analysis"""
+        velocity_fps = result.muzzle_velocity * FPS_PER_MPS
+        ax.clear()
+        ax.hist(velocity_fps, bins=50, color='steelblue', alpha=0.8)
+        for p, style in ((5, '--'), (50, '-'), (95, '--')):
+            ax.axvline(result.percentiles[p] * FPS_PER_MPS, color='black', linestyle=style,
+                       linewidth=1.5, label=f"P{p}: {result.percentiles[p] * FPS_PER_MPS:.1f} fps")
+        ax.set_xlabel('Muzzle Velocity (fps)', fontsize=12)
+        ax.set_ylabel('Shots', fontsize=12)
+        ax.set_title('Muzzle Velocity Distribution', fontsize=14, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        canvas.draw()
+
+        labels = {key: label.split(' (')[0] for key, label in TOLERANCE_PARAMS.items()}
+        text = format_report(result, FPS_PER_MPS, 'fps', labels)
+        report.delete(1.0, tk.END)
+        report.insert(1.0, text)
+        status.config(text="Tolerance analysis completed", foreground="green")
+
+    def export_trajectory(self):
+        """Save the displayed run's trajectory in the binary trajectory format"""
+        result = self.last_result
+        if result is None:
+            messagebox.showinfo("Export Trajectory", "No simulation has been run yet.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="Export Trajectory",
+            defaultextension=".traj",
+            filetypes=[("Trajectory files", "*.traj"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        try:
+            write_trajectories(file_path, [result])
+            self.status_label.config(text="Trajectory exported", foreground="green")
+        except Exception as exc:
+            messagebox.showerror("Error", f"Failed to export trajectory: {exc}")
+            self.status_label.config(text="Trajectory export failed", foreground="red")
+
+    def export_timings(self):
+        """Save the profiles of this session's runs as JSON"""
+        if not self.profiles:
+            messagebox.showinfo("Export Timings", "No runs have been timed yet.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="Export Run Timings",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        try:
+            write_json(list(self.profiles), file_path)
+            self.status_label.config(text=f"Exported timings of {len(self.profiles)} runs",
+                                     foreground="green")
+        except Exception as exc:
+            messagebox.showerror("Error", f"Failed to export timings: {exc}")
+            self.status_label.config(text="Timing export failed", foreground="red")
+
     def save_parameters(self):
         """Save current parameters to a pickle file"""
         try:
@@ -606,13 +1110,28 @@ Max Volume: {max_volume_ml:.3f} mL
             self.status_label.config(text="Parameter load failed", foreground="red")
             return
         
+        # Older files lack newer keys (which keep their defaults) and may carry
+        # retired ones such as end_time, which are dropped
+        defaults = default_params(SPRING_PISTON)
+        loaded_params = {key: value for key, value in loaded_params.items() if key in self.params}
+        for key in OPTIONAL_PARAM_KEYS:
+            loaded_params.setdefault(key, defaults[key])
         missing_keys = [key for key in self.params if key not in loaded_params]
         if missing_keys:
             messagebox.showerror("Error", f"Loaded parameter set is missing keys: {', '.join(missing_keys)}")
             self.status_label.config(text="Parameter load failed", foreground="red")
             return
         
-        self.params.update(loaded_params)
+        if not self._apply_params(loaded_params):
+            return
+        
+        self._update_file_label(file_path)
+        self.status_label.config(text="Parameters loaded successfully", foreground="green")
+        self.run_simulation_threaded()
+    
+    def _apply_params(self, params):
+        """Put ``params`` into the entry fields; False if a value cannot be shown"""
+        self.params.update(params)
         
         for key, value in self.params.items():
             try:
@@ -621,11 +1140,8 @@ Max Volume: {max_volume_ml:.3f} mL
             except tk.TclError:
                 messagebox.showerror("Error", f"Invalid value for parameter '{key}': {value}")
                 self.status_label.config(text="Parameter load failed", foreground="red")
-                return
-        
-        self._update_file_label(file_path)
-        self.status_label.config(text="Parameters loaded successfully", foreground="green")
-        self.run_simulation_threaded()
+                return False
+        return True
     
     def _update_params_from_vars(self):
         """Sync internal param dict from GUI variables"""
@@ -658,7 +1174,17 @@ Max Volume: {max_volume_ml:.3f} mL
         else:
             self.file_label.config(text="No parameter file selected")
 
-def main():
+def main(argv=None):
+    # A worker spawned by the frozen executable runs it again; this hands
+    # control to the worker code instead of opening another window
+    multiprocessing.freeze_support()
+    startup = StartupProfile(SPRING_PISTON, _START_TIME)
+    startup.mark('imports')
+    parser = argparse.ArgumentParser(description="Spring piston simulator")
+    parser.add_argument('--startup-report', metavar='FILE',
+                        help="Write the startup timings to FILE as JSON and exit after the first plot")
+    args, _ = parser.parse_known_args(argv)
+
     root = tk.Tk()
     root.lift()
     root.focus_force()
@@ -667,7 +1193,7 @@ def main():
         root.after(100, lambda: root.attributes("-topmost", False))
     except tk.TclError:
         pass
-    app = DartPlungerSimulatorGUI(root)
+    app = DartPlungerSimulatorGUI(root, startup, args.startup_report)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,242 @@
+"""Cartesian parameter sweeps for the spring-piston and Nomad models.
+
+The grid is split into chunks that are spread over the session's worker pool
+(see ``workers``). Spring-piston chunks are integrated together with the
+vectorized batch engine; Nomad chunks are evaluated one configuration at a
+time, by quadrature where possible.
+
+Command line usage (values in SI units)::
+
+    python src/sweep.py spring_piston k=500:2000:50 L_0=0.05:0.15:50 -o sweep.csv
+    python src/sweep.py nomad p_0=300000,450000,600000 v_expand=1e-6:1e-5:20
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+import numpy as np
+
+from batch import simulate_batch
+from cache import ResultCache, cache_key, default_cache_dir
+from engine import MODELS, NOMAD, SPRING_PISTON, default_params, nomad_summary, solve, summarize
+from results_db import ResultsDatabase
+from workers import get_pool
+
+RESULT_KEYS = ('muzzle_velocity', 'max_dart_velocity', 'peak_pressure', 'min_pressure', 'exit_time')
+
+
+# Spring-piston parameters that must be positive for a run to make sense
+_SPRING_PISTON_POSITIVE = ('p_0', 'D_b', 'D_p', 'gamma', 'mass_d', 'mass_p', 'L_0', 'k',
+                           'barrel_length')
+
+
+def _failed_summary():
+    return dict.fromkeys(RESULT_KEYS, float('nan'))
+
+
+def _spring_piston_chunk(base_params, keys, combos):
+    """Summaries for a chunk of spring-piston configurations via the batch engine.
+
+    Configurations with a non-positive mass, dimension, pressure, stiffness
+    or gamma get NaN metrics without being run. If the batch integration fails anyway,
+    the chunk is run one configuration at a time, so only the configurations
+    that fail get NaN metrics.
+    """
+    values = np.asarray(combos, dtype=float).reshape(len(combos), len(keys))
+    valid = np.ones(len(combos), dtype=bool)
+    for i, key in enumerate(keys):
+        if key in _SPRING_PISTON_POSITIVE:
+            valid &= values[:, i] > 0
+    results = [_failed_summary() for _ in combos]
+    rows = np.flatnonzero(valid)
+    if not rows.size:
+        return results
+
+    params = dict(base_params)
+    for i, key in enumerate(keys):
+        params[key] = values[rows, i]
+    try:
+        result = simulate_batch(params)
+    except Exception:
+        solved = _single_run_chunk(SPRING_PISTON, base_params, keys, [combos[row] for row in rows])
+    else:
+        # Keys the batch physics ignores (friction) leave the result unbatched
+        metrics = {key: np.broadcast_to(values, rows.shape) for key, values in (
+            ('muzzle_velocity', result.muzzle_velocity),
+            ('max_dart_velocity', result.max_dart_velocity),
+            ('peak_pressure', result.max_pressure),
+            ('min_pressure', result.min_pressure),
+            ('exit_time', result.exit_time),
+        )}
+        solved = [{key: float(values[i]) for key, values in metrics.items()} for i in range(rows.size)]
+    for row, summary in zip(rows, solved):
+        results[row] = summary
+    return results
+
+
+def _single_run_chunk(model, base_params, keys, combos):
+    """Summaries for a chunk of configurations, one run each."""
+    results = []
+    for combo in combos:
+        params = dict(base_params)
+        params.update(zip(keys, combo))
+        try:
+            summary = nomad_summary(params) if model == NOMAD else None
+            if summary is None:
+                summary = summarize(model, params, solve(model, params))
+            results.append(summary)
+        except Exception:
+            results.append(_failed_summary())
+    return results
+
+
+def _run_chunk(model, base_params, keys, combos, cache=None):
+    """Summaries for a chunk, solving only the configurations not in ``cache``."""
+    if cache is None:
+        cached = [None] * len(combos)
+    else:
+        cache_keys = [cache_key(model, dict(base_params, **dict(zip(keys, combo))), kind='sweep')
+                      for combo in combos]
+        cached = [cache.get(key) for key in cache_keys]
+    todo = [combo for combo, summary in zip(combos, cached) if summary is None]
+    if not todo:
+        return cached
+
+    if model == SPRING_PISTON:
+        solved = _spring_piston_chunk(base_params, keys, todo)
+    else:
+        solved = _single_run_chunk(model, base_params, keys, todo)
+
+    solved = iter(solved)
+    results = []
+    for i, summary in enumerate(cached):
+        if summary is None:
+            summary = next(solved)
+            if cache is not None and not np.isnan(summary['peak_pressure']):
+                cache.put(cache_keys[i], summary)
+        results.append(summary)
+    return results
+
+
+def grid_sweep(model, ranges, base_params=None, processes=None, chunk_size=None, cache=None):
+    """Evaluate every combination of ``ranges`` and return one row per configuration.
+
+    ``ranges`` maps parameter keys to sequences of SI values. Parameters not swept
+    come from ``base_params`` (the model defaults if omitted). Each row holds the
+    swept values plus the ``RESULT_KEYS`` metrics (see ``engine.summarize``).
+    ``processes`` defaults to the number of CPU cores; pass 1 to run in the
+    calling process. With a ``cache.ResultCache``, configurations
+    seen before are not solved again; give it a directory to share results
+    between worker processes and later sweeps.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model!r}")
+    params = default_params(model)
+    if base_params is not None:
+        params.update(base_params)
+    unknown = [key for key in ranges if key not in params]
+    if unknown:
+        raise KeyError(f"Unknown parameters for {model}: {', '.join(unknown)}")
+
+    keys = list(ranges)
+    combos = list(itertools.product(*(np.atleast_1d(ranges[key]).tolist() for key in keys)))
+    results = evaluate_configurations(model, params, keys, combos, processes=processes,
+                                      chunk_size=chunk_size, cache=cache)
+    rows = []
+    for combo, result in zip(combos, results):
+        row = dict(zip(keys, combo))
+        row.update(result)
+        rows.append(row)
+    return rows
+
+
+def evaluate_configurations(model, params, keys, combos, processes=None, chunk_size=None, cache=None):
+    """Summaries for configurations that differ from ``params`` in ``keys``.
+
+    ``combos`` is a sequence of value tuples, one entry per key. Returns one
+    ``RESULT_KEYS`` dict per combo, in order, with NaN values for runs that
+    failed. See ``grid_sweep`` for ``processes``, ``chunk_size`` and ``cache``.
+    """
+    combos = [tuple(combo) for combo in combos]
+    if not combos:
+        return []
+
+    processes = processes or os.cpu_count() or 1
+    if chunk_size is None:
+        # A few chunks per worker keeps the pool balanced without losing batching
+        chunk_size = max(1, -(-len(combos) // (processes * 4)))
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    if processes == 1 or len(chunks) == 1:
+        chunk_results = [_run_chunk(model, params, keys, chunk, cache) for chunk in chunks]
+    else:
+        pool = get_pool(processes)
+        futures = [pool.submit(_run_chunk, model, params, keys, chunk, cache) for chunk in chunks]
+        try:
+            chunk_results = [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+    return [result for results in chunk_results for result in results]
+
+
+def write_csv(rows, path):
+    """Write sweep rows to a CSV file."""
+    if not rows:
+        raise ValueError("No rows to write")
+    with open(path, 'w', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _parse_range(text):
+    """Parse ``key=start:stop:num`` or ``key=v1,v2,...`` into a key and values."""
+    key, _, spec = text.partition('=')
+    if not spec:
+        raise argparse.ArgumentTypeError(f"Expected key=values, got {text!r}")
+    try:
+        if ':' in spec:
+            start, stop, num = spec.split(':')
+            values = np.linspace(float(start), float(stop), int(num))
+        else:
+            values = [float(v) for v in spec.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid range: {text!r}")
+    return key, values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a parameter grid sweep")
+    parser.add_argument('model', choices=MODELS)
+    parser.add_argument('ranges', nargs='+', type=_parse_range,
+                        help="key=start:stop:num or key=v1,v2,... (SI units)")
+    parser.add_argument('-o', '--output', help="CSV file to write (default: stdout)")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument('--cache', action='store_true',
+                        help="Reuse results from earlier sweeps stored in the user cache directory")
+    parser.add_argument('--db', help="Also store every configuration in this results database")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(directory=default_cache_dir()) if args.cache else None
+    ranges = dict(args.ranges)
+    rows = grid_sweep(args.model, ranges, processes=args.processes, cache=cache)
+    if args.db:
+        base_params = default_params(args.model)
+        with ResultsDatabase(args.db) as database:
+            database.add_many(args.model, ((dict(base_params, **{key: row[key] for key in ranges}), row)
+                                           for row in rows))
+        print(f"Stored {len(rows)} configurations in {args.db}", file=sys.stderr)
+    if args.output:
+        write_csv(rows, args.output)
+        print(f"Wrote {len(rows)} rows to {args.output}")
+    else:
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
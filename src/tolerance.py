@@ -0,0 +1,198 @@
+"""Monte Carlo tolerance analysis of muzzle velocity.
+
+Each toleranced parameter gets a distribution around its nominal value. The
+samples come from a randomly shifted Halton sequence, which covers the
+parameter space more evenly than pseudo-random draws, so percentiles settle
+with fewer shots. Shots are evaluated with ``sweep.evaluate_configurations``,
+which uses the vectorized batch engine for the spring-piston model and a
+process pool for larger jobs.
+
+Command line usage (widths in SI units)::
+
+    python src/tolerance.py spring_piston mass_d=normal:0.00005 k=uniform:25 -n 4096
+"""
+import argparse
+from statistics import NormalDist
+
+import numpy as np
+
+from engine import MODELS, default_params
+from sweep import evaluate_configurations
+
+# Distribution kinds: 'normal' takes a standard deviation, 'uniform' a
+# half-width, both in the parameter's SI units
+DISTRIBUTIONS = ('normal', 'uniform')
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71)
+
+
+def halton(n, dims, seed=None):
+    """``n`` points of a randomly shifted Halton sequence in [0, 1)^dims.
+
+    The first point (all zeros) is skipped, and every dimension is rotated by
+    a random offset so repeated analyses with different seeds are independent.
+    """
+    if dims > len(_PRIMES):
+        raise ValueError(f"At most {len(_PRIMES)} toleranced parameters are supported")
+    indices = np.arange(1, n + 1)
+    points = np.empty((n, dims))
+    for d in range(dims):
+        base = _PRIMES[d]
+        value = np.zeros(n)
+        fraction = 1.0 / base
+        i = indices.copy()
+        while i.any():
+            value += (i % base) * fraction
+            i //= base
+            fraction /= base
+        points[:, d] = value
+    shift = np.random.default_rng(seed).random(dims)
+    return (points + shift) % 1.0
+
+
+_inverse_normal = np.frompyfunc(NormalDist().inv_cdf, 1, 1)
+
+
+def sample_parameters(nominal, tolerances, n, seed=None):
+    """``(keys, samples)``: an ``n`` by ``len(tolerances)`` array of SI values."""
+    keys = list(tolerances)
+    u = halton(n, len(keys), seed)
+    # Keep clear of 0 and 1, where the normal quantile is infinite
+    u = np.clip(u, 1e-12, 1 - 1e-12)
+    samples = np.empty_like(u)
+    for j, key in enumerate(keys):
+        kind, width = tolerances[key]
+        if kind == 'normal':
+            samples[:, j] = nominal[key] + width * _inverse_normal(u[:, j]).astype(float)
+        elif kind == 'uniform':
+            samples[:, j] = nominal[key] + width * (2 * u[:, j] - 1)
+        else:
+            raise ValueError(f"Unknown distribution for {key}: {kind!r}")
+    return keys, samples
+
+
+class ToleranceResult:
+    """Muzzle-velocity spread from a tolerance analysis.
+
+    ``samples`` holds the sampled SI values (one column per ``keys`` entry)
+    and ``muzzle_velocity`` the matching velocities in m/s, with failed runs
+    dropped. ``percentiles`` maps each of ``PERCENTILES`` to a velocity.
+    ``contributions`` lists ``(key, share)`` pairs, largest first: the share of
+    the velocity variance explained by each parameter, from a linear fit of
+    velocity on the standardized samples. ``r_squared`` says how much of the
+    spread that fit explains overall.
+    """
+
+    def __init__(self, keys, samples, muzzle_velocity, n_failed):
+        self.keys = keys
+        self.samples = samples
+        self.muzzle_velocity = muzzle_velocity
+        self.n_failed = n_failed
+        self.mean = float(np.mean(muzzle_velocity))
+        self.std = float(np.std(muzzle_velocity))
+        self.percentiles = dict(zip(PERCENTILES, np.percentile(muzzle_velocity, PERCENTILES)))
+        self.contributions, self.r_squared = _contributions(keys, samples, muzzle_velocity)
+
+
+def _contributions(keys, samples, velocity):
+    """Variance shares from standardized regression coefficients."""
+    std = samples.std(axis=0)
+    varied = std > 0
+    if velocity.size < 2 or not varied.any() or velocity.std() == 0:
+        return [(key, 0.0) for key in keys], 0.0
+    z = (samples[:, varied] - samples[:, varied].mean(axis=0)) / std[varied]
+    v = (velocity - velocity.mean()) / velocity.std()
+    coefficients = np.linalg.lstsq(z, v, rcond=None)[0]
+    r_squared = float(1 - np.mean((v - z @ coefficients)**2))
+    squared = np.zeros(len(keys))
+    squared[varied] = coefficients**2
+    shares = squared / squared.sum() if squared.sum() > 0 else squared
+    ranked = sorted(zip(keys, shares.tolist()), key=lambda item: item[1], reverse=True)
+    return ranked, r_squared
+
+
+def tolerance_analysis(model, tolerances, params=None, n_samples=2048, seed=None,
+                       processes=None):
+    """Sample the toleranced parameters and return a ``ToleranceResult``.
+
+    ``tolerances`` maps parameter keys to ``(kind, width)`` with ``kind`` one of
+    ``DISTRIBUTIONS``; other parameters stay at their values in ``params``
+    (the model defaults if omitted). Shots where the dart does not exit count
+    as zero muzzle velocity. ``processes`` is passed to
+    ``sweep.evaluate_configurations``.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model!r}")
+    if not tolerances:
+        raise ValueError("No toleranced parameters given")
+    nominal = default_params(model)
+    if params is not None:
+        nominal.update(params)
+    unknown = [key for key in tolerances if key not in nominal]
+    if unknown:
+        raise KeyError(f"Unknown parameters for {model}: {', '.join(unknown)}")
+
+    keys, samples = sample_parameters(nominal, tolerances, n_samples, seed)
+    # Muzzle velocity comes from the exit event, so no trajectory grid is needed
+    summaries = evaluate_configurations(model, dict(nominal, n_points=2), keys, samples.tolist(),
+                                        processes=processes)
+    velocity = np.array([summary['muzzle_velocity'] for summary in summaries])
+    ok = np.isfinite(velocity)
+    if not ok.any():
+        raise ValueError("Every sampled configuration failed")
+    return ToleranceResult(keys, samples[ok], velocity[ok], int((~ok).sum()))
+
+
+def format_report(result, velocity_scale=1.0, velocity_unit='m/s', labels=None):
+    """Plain-text summary of a ``ToleranceResult``.
+
+    Velocities are multiplied by ``velocity_scale`` and shown in
+    ``velocity_unit``; ``labels`` optionally maps keys to display names.
+    """
+    labels = labels or {}
+    lines = [
+        f"Shots: {result.muzzle_velocity.size}" + (f" ({result.n_failed} failed)" if result.n_failed else ""),
+        f"Mean: {result.mean * velocity_scale:.2f} {velocity_unit}",
+        f"Std Dev: {result.std * velocity_scale:.2f} {velocity_unit}",
+        "",
+        "Percentiles:",
+    ]
+    for p, value in result.percentiles.items():
+        lines.append(f"  P{p:<3d} {value * velocity_scale:9.2f} {velocity_unit}")
+    lines += ["", f"Contributors (linear fit R² = {result.r_squared:.2f}):"]
+    for key, share in result.contributions:
+        lines.append(f"  {labels.get(key, key):<20s} {share * 100:6.1f}%")
+    return "\n".join(lines)
+
+
+def _parse_tolerance(text):
+    """Parse ``key=kind:width`` into a key and a ``(kind, width)`` pair."""
+    key, _, spec = text.partition('=')
+    kind, _, width = spec.partition(':')
+    if kind not in DISTRIBUTIONS:
+        raise argparse.ArgumentTypeError(f"Expected key=normal:std or key=uniform:half_width, got {text!r}")
+    try:
+        return key, (kind, float(width))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid width: {text!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo tolerance analysis of muzzle velocity")
+    parser.add_argument('model', choices=MODELS)
+    parser.add_argument('tolerances', nargs='+', type=_parse_tolerance,
+                        help="key=normal:std or key=uniform:half_width (SI units)")
+    parser.add_argument('-n', '--samples', type=int, default=2048, help="Number of shots")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for the sequence shift")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    result = tolerance_analysis(args.model, dict(args.tolerances), n_samples=args.samples,
+                                seed=args.seed, processes=args.processes)
+    print(format_report(result))
+
+
+if __name__ == "__main__":
+    main()
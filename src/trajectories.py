@@ -0,0 +1,270 @@
+"""Columnar binary storage of simulated trajectories.
+
+A trajectory file holds any number of runs of one model. Each quantity
+(``t``, ``dart_pos``, ``dart_vel``, ..., ``pressure``, ``volume``) is stored
+as one contiguous column holding every run back to back, with ``offsets``
+marking where each run starts. The per-run parameters and outcomes sit in
+their own small sections. Because every section is a plain little-endian
+array at a known offset, readers can memory-map the file and slice single
+runs or whole columns without loading the rest.
+
+Layout: the 8-byte magic ``PGTRAJ01``, the header length as a little-endian
+uint64, a UTF-8 JSON header describing the sections, then the sections
+themselves, each aligned to 64 bytes.
+
+Example::
+
+    with TrajectoryWriter('shots.traj', SPRING_PISTON, dtype=np.float32) as writer:
+        writer.add_batch(simulate_batch(params))
+    shots = TrajectoryFile('shots.traj')
+    shots[17]['pressure']
+"""
+import json
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from engine import EXIT, MODELS, NOMAD, SPRING_PISTON, STALL, TIMEOUT, default_params
+
+MAGIC = b'PGTRAJ01'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Stored columns per model, in file order
+COLUMNS = {
+    SPRING_PISTON: ('t', 'dart_pos', 'dart_vel', 'plunger_pos', 'plunger_vel', 'pressure', 'volume'),
+    NOMAD: ('t', 'dart_pos', 'dart_vel', 'volume', 'pressure'),
+}
+
+# Outcome codes stored in the status section
+STATUSES = (EXIT, STALL, TIMEOUT)
+
+# Column data types: float64, or float32 at half the size
+DTYPES = {'float64': '<f8', 'float32': '<f4'}
+
+_COPY_CHUNK = 16 * 1024 * 1024
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class TrajectoryWriter:
+    """Stream runs of one model into a trajectory file.
+
+    Column data goes to scratch files next to ``path`` as runs are added, so
+    memory use does not grow with the number of runs; ``close`` (or leaving
+    the ``with`` block) assembles the file. ``dtype`` is ``np.float64`` or
+    ``np.float32`` for the trajectory columns; parameters are always stored
+    as float64. If the ``with`` block raises, no file is written.
+    """
+
+    def __init__(self, path, model, dtype=np.float64):
+        if model not in MODELS:
+            raise ValueError(f"Unknown model: {model!r}")
+        dtype_name = np.dtype(dtype).name
+        if dtype_name not in DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype_name}; use float64 or float32")
+        self.path = Path(path)
+        self.model = model
+        self.dtype = np.dtype(DTYPES[dtype_name])
+        self.columns = COLUMNS[model]
+        self.param_keys = list(default_params(model))
+        self._lengths = []
+        self._status = []
+        self._params = []
+        self._scratch = tempfile.mkdtemp(dir=self.path.parent, prefix='.traj-')
+        self._files = {name: open(os.path.join(self._scratch, name), 'wb') for name in self.columns}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, t, series, params, status):
+        """Append one run: times ``t``, ``series`` arrays keyed by column name,
+        its SI ``params`` and its ``status`` (EXIT, STALL or TIMEOUT)."""
+        t = np.asarray(t)
+        for name in self.columns:
+            values = t if name == 't' else np.asarray(series[name])
+            if values.shape != t.shape:
+                raise ValueError(f"Column {name} has shape {values.shape}, expected {t.shape}")
+            self._files[name].write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        self._lengths.append(t.size)
+        self._status.append(STATUSES.index(status))
+        self._params.append([float(params.get(key, np.nan)) for key in self.param_keys])
+
+    def add_result(self, result):
+        """Append an ``engine.Result``."""
+        if result.model != self.model:
+            raise ValueError(f"Cannot store a {result.model} run in a {self.model} file")
+        self.add(result.t, result.series, result.params, result.status)
+
+    def add_batch(self, batch):
+        """Append every configuration of a ``batch.BatchResult``, in C order."""
+        if self.model != SPRING_PISTON:
+            raise ValueError("Batch results are spring-piston runs")
+        n_points = batch.t.shape[-1]
+        params = {key: np.broadcast_to(batch.params[key], batch.shape).reshape(-1)
+                  for key in self.param_keys if key in batch.params and np.ndim(batch.params[key])}
+        scalars = {key: batch.params[key] for key in self.param_keys
+                   if key in batch.params and not np.ndim(batch.params[key])}
+        series = {name: getattr(batch, name).reshape(-1, n_points) for name in self.columns}
+        status = batch.status.reshape(-1)
+        for i in range(status.size):
+            run_params = dict(scalars)
+            run_params.update({key: values[i] for key, values in params.items()})
+            self.add(series['t'][i], {name: values[i] for name, values in series.items()},
+                     run_params, status[i])
+
+    def close(self):
+        """Write the trajectory file and remove the scratch files."""
+        if self._scratch is None:
+            return
+        for handle in self._files.values():
+            handle.close()
+        n_rows = int(sum(self._lengths))
+        sections = {
+            'offsets': (np.concatenate(([0], np.cumsum(self._lengths, dtype=np.int64))).astype('<i8'), None),
+            'status': (np.array(self._status, dtype='<i1'), None),
+            'params': (np.array(self._params, dtype='<f8').reshape(len(self), len(self.param_keys)), None),
+        }
+        sections.update({name: (None, (n_rows,)) for name in self.columns})
+
+        layout = {}
+        position = 0
+        for name, (array, shape) in sections.items():
+            position = _align(position)
+            dtype = self.dtype if array is None else array.dtype
+            shape = shape if array is None else array.shape
+            layout[name] = {'offset': position, 'dtype': dtype.str, 'shape': list(shape)}
+            position += int(np.prod(shape)) * dtype.itemsize
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'model': self.model,
+            'columns': list(self.columns),
+            'param_keys': self.param_keys,
+            'statuses': list(STATUSES),
+            'sections': layout,
+        }).encode('utf-8')
+        data_start = _align(len(MAGIC) + 8 + len(header))
+
+        tmp_path = os.path.join(self._scratch, 'output')
+        with open(tmp_path, 'wb') as outfile:
+            outfile.write(MAGIC + struct.pack('<Q', len(header)) + header)
+            for name, (array, _) in sections.items():
+                outfile.seek(data_start + layout[name]['offset'])
+                if array is not None:
+                    outfile.write(array.tobytes())
+                else:
+                    with open(os.path.join(self._scratch, name), 'rb') as column:
+                        shutil.copyfileobj(column, outfile, _COPY_CHUNK)
+            outfile.truncate(data_start + position)
+        os.replace(tmp_path, self.path)
+        self._discard()
+
+    def _discard(self):
+        for handle in self._files.values():
+            handle.close()
+        if self._scratch is not None:
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            self._scratch = None
+
+
+def write_trajectories(path, results, dtype=np.float64):
+    """Write ``engine.Result`` objects, all of one model, to ``path``."""
+    results = iter(results)
+    first = next(results, None)
+    if first is None:
+        raise ValueError("No results to write")
+    with TrajectoryWriter(path, first.model, dtype=dtype) as writer:
+        writer.add_result(first)
+        for result in results:
+            writer.add_result(result)
+
+
+class TrajectoryFile:
+    """Read access to a trajectory file.
+
+    With ``mmap`` set (the default) sections are memory-mapped, so only the
+    parts that are sliced are read from disk. ``len(file)`` is the number of
+    runs; ``file[i]`` is a dict of run ``i``'s column arrays, ``column(name)``
+    one column for every run back to back, and ``params(i)``/``status(i)`` the
+    run's parameters and outcome.
+    """
+
+    def __init__(self, path, mmap=True):
+        self.path = Path(path)
+        with open(self.path, 'rb') as infile:
+            if infile.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a trajectory file")
+            (header_length,) = struct.unpack('<Q', infile.read(8))
+            header = json.loads(infile.read(header_length).decode('utf-8'))
+        if header['version'] > FORMAT_VERSION:
+            raise ValueError(f"{self.path} uses a newer format (version {header['version']})")
+        self.model = header['model']
+        self.columns = tuple(header['columns'])
+        self.param_keys = header['param_keys']
+        self._statuses = header['statuses']
+        self._data_start = _align(len(MAGIC) + 8 + header_length)
+        self._layout = header['sections']
+        self._mmap = mmap
+        self._sections = {}
+        self.offsets = self._section('offsets')
+        self.dtype = np.dtype(self._layout['t']['dtype'])
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i %= len(self)
+        start, stop = int(self.offsets[i]), int(self.offsets[i + 1])
+        return {name: self.column(name)[start:stop] for name in self.columns}
+
+    def column(self, name):
+        """Every run's values of column ``name``, concatenated."""
+        if name not in self.columns:
+            raise KeyError(name)
+        return self._section(name)
+
+    def params(self, i):
+        """SI parameter dict of run ``i``."""
+        row = self._section('params')[i]
+        return {key: float(value) for key, value in zip(self.param_keys, row) if not np.isnan(value)}
+
+    def param_values(self, key):
+        """Parameter ``key`` of every run as an array."""
+        return self._section('params')[:, self.param_keys.index(key)]
+
+    def status(self, i):
+        return self._statuses[int(self._section('status')[i])]
+
+    def _section(self, name):
+        if name not in self._sections:
+            info = self._layout[name]
+            dtype = np.dtype(info['dtype'])
+            shape = tuple(info['shape'])
+            offset = self._data_start + info['offset']
+            if int(np.prod(shape)) == 0:
+                array = np.zeros(shape, dtype=dtype)
+            elif self._mmap:
+                array = np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape)
+            else:
+                with open(self.path, 'rb') as infile:
+                    infile.seek(offset)
+                    array = np.fromfile(infile, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+            self._sections[name] = array
+        return self._sections[name]
@@ -0,0 +1,84 @@
+"""Session-wide pool of warm simulation worker processes.
+
+Starting a worker costs a fresh interpreter plus the numpy/scipy imports,
+which takes far longer than most of the tasks sent to it. ``get_pool`` hands
+out one ``ProcessPoolExecutor`` that lives until the program exits, so
+sweeps, tolerance runs and design maps pay that startup once per session
+instead of once per call. Each worker imports the simulation modules as it
+starts, and ``start`` launches every worker ahead of the first task.
+
+Workers are started with the ``spawn`` method on every platform, which is
+what Windows and macOS use anyway and is safe next to the GUI threads. In
+the frozen executables a spawned worker re-runs the executable itself, so
+GUI entry points must call ``multiprocessing.freeze_support()`` first thing.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_lock = threading.Lock()
+_pool = None
+_size = 0
+
+
+def _warm_up():
+    """Worker initializer: import everything a simulation task needs."""
+    import batch  # noqa: F401
+    import engine  # noqa: F401
+    import sweep  # noqa: F401
+    import scipy.integrate  # noqa: F401
+
+
+def _ready():
+    return os.getpid()
+
+
+def default_processes():
+    return os.cpu_count() or 1
+
+
+def get_pool(processes=None):
+    """The shared pool, with at least ``processes`` workers (default: all cores).
+
+    The pool is created on first use. Asking for more workers than it has
+    replaces it; asking for fewer returns it as is, so callers that want to
+    limit concurrency should limit how many tasks they submit. A pool left
+    broken by a worker that died is replaced too.
+    """
+    global _pool, _size
+    processes = processes or default_processes()
+    with _lock:
+        # ProcessPoolExecutor has no public flag for a broken pool
+        broken = _pool is not None and getattr(_pool, '_broken', False)
+        if _pool is None or broken or processes > _size:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=processes,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_warm_up)
+            _size = processes
+        return _pool
+
+
+def start(processes=None):
+    """Create the pool and launch all of its workers without waiting for them.
+
+    The executor otherwise starts workers one at a time as tasks arrive, so
+    the first batch job would still wait for interpreter startup.
+    """
+    pool = get_pool(processes)
+    return [pool.submit(_ready) for _ in range(_size)]
+
+
+def shutdown(wait=True):
+    """Stop the pool's workers; the next ``get_pool`` starts a new pool."""
+    global _pool, _size
+    with _lock:
+        pool, _pool, _size = _pool, None, 0
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+atexit.register(shutdown)
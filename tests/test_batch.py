@@ -0,0 +1,16 @@
+import numpy as np
+
+from batch import simulate_batch
+from engine import EXIT, SPRING_PISTON, default_params, simulate
+
+from test_engine import BELOW_AMBIENT
+
+
+def test_batch_below_ambient_holds_dart_at_breech():
+    params = default_params(SPRING_PISTON)
+    params['p_0'] = np.array(BELOW_AMBIENT)
+    result = simulate_batch(params)
+    assert list(result.status) == [EXIT] * len(BELOW_AMBIENT)
+    expected = [simulate(SPRING_PISTON, {'p_0': p_0}, method='RK45', rtol=1e-6, atol=1e-9)
+                .muzzle_velocity for p_0 in BELOW_AMBIENT]
+    np.testing.assert_allclose(result.muzzle_velocity, expected, rtol=1e-3)
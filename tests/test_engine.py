@@ -0,0 +1,26 @@
+import pytest
+
+from engine import EXIT, NOMAD, NOMAD_VALVE_DEFAULTS, SPRING_PISTON, simulate
+
+# Cylinder pressures below the 101325 Pa ambient default
+BELOW_AMBIENT = [101000.0, 90000.0, 60000.0]
+
+
+@pytest.mark.parametrize('method', ['RK45', 'Radau', 'LSODA'])
+@pytest.mark.parametrize('p_0', BELOW_AMBIENT)
+def test_spring_piston_below_ambient_holds_dart_at_breech(p_0, method):
+    # Ambient pressure pushes the dart against the breech until the plunger
+    # compresses the cylinder; that is not a stall
+    result = simulate(SPRING_PISTON, {'p_0': p_0}, method=method)
+    assert result.status == EXIT
+    assert result.muzzle_velocity > 50.0
+
+
+@pytest.mark.parametrize('method', ['auto', 'RK45'])
+def test_nomad_valve_rejects_empty_expansion_chamber(method):
+    with pytest.raises(ValueError, match='v_expand'):
+        simulate(NOMAD, dict(NOMAD_VALVE_DEFAULTS, v_expand=0.0), method=method)
+
+
+def test_nomad_without_valve_allows_empty_expansion_chamber():
+    assert simulate(NOMAD, {'v_expand': 0.0}).status == EXIT